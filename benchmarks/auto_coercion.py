@@ -0,0 +1,110 @@
+"""Benchmark the cost of assigning model attributes with and without automatic data coercion.
+
+Run with ``python benchmarks/auto_coercion.py``.
+"""
+
+# ======================================================================================================================
+# Imports
+# ======================================================================================================================
+from __future__ import annotations
+
+import timeit
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy.orm import DeclarativeBase, configure_mappers
+from sqlalchemy_utils import UUIDType, force_auto_coercion
+
+from flask_ligand.extensions.database import auto_coerce
+
+# ======================================================================================================================
+# Globals
+# ======================================================================================================================
+ASSIGNMENTS = 200_000
+REPEATS = 5
+
+
+# ======================================================================================================================
+# Classes: Public
+# ======================================================================================================================
+class Base(DeclarativeBase):
+    """Declarative base of the benchmark models."""
+
+
+class PlainModel(Base):
+    """Model without coercion."""
+
+    __tablename__ = "plain"
+
+    id = sa.Column(UUIDType(binary=False), primary_key=True)
+    name = sa.Column(sa.String(255))
+
+
+@auto_coerce("id")
+class ScopedModel(Base):
+    """Model coercing its ID only."""
+
+    __tablename__ = "scoped"
+
+    id = sa.Column(UUIDType(binary=False), primary_key=True)
+    name = sa.Column(sa.String(255))
+
+
+# Mappers configured before forcing coercion are not affected by it.
+configure_mappers()
+force_auto_coercion()
+
+
+class ForcedModel(Base):
+    """Model coerced by the global coercion listener."""
+
+    __tablename__ = "forced"
+
+    id = sa.Column(UUIDType(binary=False), primary_key=True)
+    name = sa.Column(sa.String(255))
+
+
+configure_mappers()
+
+
+# ======================================================================================================================
+# Functions: Public
+# ======================================================================================================================
+def benchmark(model: type, attribute: str, value: object) -> float:
+    """Measure the best time of assigning a value to an attribute of a model instance.
+
+    Args:
+        model: The model class.
+        attribute: The name of the attribute.
+        value: The value to assign.
+
+    Returns:
+        The time (in nanoseconds) of a single assignment.
+    """
+
+    instance = model()
+    timer = timeit.Timer(f"instance.{attribute} = value", globals={"instance": instance, "value": value})
+
+    return min(timer.repeat(REPEATS, ASSIGNMENTS)) / ASSIGNMENTS * 1e9
+
+
+def main() -> None:
+    """Print the assignment cost of every model and attribute."""
+
+    ident = uuid.uuid4()
+    cases = [
+        ("UUID object", "id", ident),
+        ("UUID string", "id", str(ident)),
+        ("string", "name", "name"),
+    ]
+
+    print(f"{'value':<12} {'plain':>10} {'auto_coerce':>12} {'forced':>10}  (ns per assignment)")
+
+    for label, attribute, value in cases:
+        timings = [benchmark(model, attribute, value) for model in (PlainModel, ScopedModel, ForcedModel)]
+
+        print(f"{label:<12} {timings[0]:>10.1f} {timings[1]:>12.1f} {timings[2]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ from flask_cors import CORS
 from flask_ligand import extensions, views
 from flask_ligand.cli import genclient
 from flask_ligand.default_settings import flask_environment_configurator
+from flask_ligand.extensions.database import QUERY_STATS_HEADER
 
 # ======================================================================================================================
 # Type Checking
@@ -74,10 +75,15 @@ def create_app(
 
     app = Flask(flask_app_name)
 
-    CORS(app, expose_headers=["x-pagination", "etag"])  # TODO: this needs to be configurable! [271]
-
     flask_environment_configurator(app, flask_env, api_title, api_version, openapi_client_name, **kwargs)
 
+    expose_headers = ["x-pagination", "etag"]
+
+    if app.config["DB_QUERY_STATS"]:
+        expose_headers.append(QUERY_STATS_HEADER.lower())
+
+    CORS(app, expose_headers=expose_headers)  # TODO: this needs to be configurable! [271]
+
     api = extensions.create_api(app, True if flask_env == "cli" else False)
 
     views.register_blueprints(api)
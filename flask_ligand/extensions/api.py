@@ -8,6 +8,15 @@ Override base classes here to allow painless customization in the future.
 # ======================================================================================================================
 from __future__ import annotations
 
+import asyncio
+import base64
+import datetime
+import inspect
+import itertools
+import json
+import threading
+from copy import deepcopy
+from functools import cached_property, wraps
 from http import HTTPStatus
 from typing import TYPE_CHECKING
 
@@ -15,25 +24,259 @@ import flask
 
 # noinspection PyPackageRequirements
 import marshmallow as ma
+from flask.views import MethodView
 from flask_smorest import Api as ApiOrig
 from flask_smorest import Blueprint as BlueprintOrig
-from flask_smorest import Page
+from flask_smorest import Page, pagination, utils
 
 # noinspection PyPackageRequirements
 from flask_sqlalchemy.query import Query as QueryOrig
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
+from sqlalchemy import Select, and_
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy import or_, tuple_
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm.exc import UnmappedColumnError
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement, UnaryExpression
+
+from flask_ligand.extensions.cache import TTLCache
 
 # ======================================================================================================================
 # Type Checking
 # ======================================================================================================================
 if TYPE_CHECKING:  # pragma: no cover
-    from typing import Any, Optional
+    from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
+
+    from sqlalchemy.orm import Session
+    from sqlalchemy.sql.compiler import SQLCompiler
+
+
+# ======================================================================================================================
+# Classes: Private
+# ======================================================================================================================
+class _ExplainJson(Executable, ClauseElement):
+    """
+    An ``EXPLAIN (FORMAT JSON)`` of a statement, compiled with the paramstyle of the dialect that executes it.
+
+    Args:
+        statement: The statement to explain.
+    """
+
+    inherit_cache = False
+
+    def __init__(self, statement: Any):
+        self.statement = statement
 
 
 # ======================================================================================================================
 # Globals
 # ======================================================================================================================
 ISO_8601_DATETIME_FMT = "%Y-%m-%dT%H:%M:%SZ"  # This is acceptable in ISO 8601 and RFC 3339
+BEARER_AUTH_SCHEME = "bearerAuth"
+COUNT_MODES = ("exact", "cached", "estimate", "has_next")
+COUNT_CACHE_EXTENSION = "flask_ligand_count_cache"
+_ASYNC_SESSION_LOCK_KEY = "flask_ligand_async_lock"
+
+
+# ======================================================================================================================
+# Functions: Private
+# ======================================================================================================================
+@compiles(_ExplainJson)
+def _compile_explain_json(element: _ExplainJson, compiler: SQLCompiler, **kwargs: Any) -> str:
+    """Render an :class:`_ExplainJson` clause.
+
+    Args:
+        element: The clause to render.
+        compiler: The SQL compiler of the dialect.
+        kwargs: Keyword arguments passed to the compiler.
+    """
+
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kwargs)}"
+
+
+def _keyset_pagination_parameters_schema_factory(def_page_size: int, def_max_page_size: int) -> type[ma.Schema]:
+    """Generate a schema which deserializes keyset pagination query arguments into
+    :class:`KeysetPaginationParameters`.
+
+    Args:
+        def_page_size: Default requested page size.
+        def_max_page_size: Maximum page size.
+    """
+
+    class KeysetPaginationParametersSchema(ma.Schema):
+        class Meta:
+            unknown = ma.EXCLUDE
+
+        cursor = ma.fields.Str(
+            load_default=None, metadata={"description": "Opaque cursor of the page as returned by the previous page."}
+        )
+        page_size = ma.fields.Integer(
+            load_default=def_page_size, validate=ma.validate.Range(min=1, max=def_max_page_size)
+        )
+
+        @ma.post_load
+        def make_paginator(self, data: dict[str, Any], **_: Any) -> KeysetPaginationParameters:
+            return KeysetPaginationParameters(**data)
+
+    return KeysetPaginationParametersSchema
+
+
+def _encode_cursor(values: list[Any]) -> str:
+    """Encode the sort key values of a row into an opaque cursor token.
+
+    Args:
+        values: The sort key values.
+    """
+
+    def _default(value: Any) -> str:
+        return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+    return base64.urlsafe_b64encode(json.dumps(values, default=_default).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, columns: list[Any]) -> list[Any]:
+    """Decode an opaque cursor token into the sort key values for the given sort columns.
+
+    Args:
+        cursor: The cursor token.
+        columns: The sort columns.
+
+    Raises:
+        werkzeug.exceptions.HTTPException: The cursor is malformed or does not match the sort columns.
+    """
+
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("Cursor does not match the sort columns")
+
+        return [_coerce_column_value(column, value) for column, value in zip(columns, values)]
+    except (TypeError, ValueError):
+        abort(HTTPStatus(400), message="Invalid pagination cursor!")
+        raise  # pragma: no cover (Unreachable since 'abort' always raises)
+
+
+def _coerce_column_value(column: Any, value: Any) -> Any:
+    """Convert a decoded value, e.g. from a pagination cursor or a request, into the Python type of its column.
+
+    Args:
+        column: The column of the value.
+        value: The decoded value.
+    """
+
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+
+    if value is None or isinstance(value, python_type):
+        return value
+    if python_type in (datetime.datetime, datetime.date, datetime.time):
+        return python_type.fromisoformat(value)
+
+    return python_type(value)
+
+
+def _chunked_rows(rows: Any, chunk_size: int, session: Session) -> Iterator[Sequence[Any]]:
+    """Load the rows of a query, select statement or any other iterable in chunks.
+
+    Queries and select statements are executed with ``yield_per`` so that the database driver streams the rows with
+    a server-side cursor where supported and only one chunk of ORM objects is held in memory at a time.
+
+    Args:
+        rows: A :class:`Query`, a select statement or an iterable of objects.
+        chunk_size: The number of rows per chunk.
+        session: The session executing queries and select statements.
+    """
+
+    if isinstance(rows, QueryOrig):
+        rows = rows.with_session(session).yield_per(chunk_size)
+    elif isinstance(rows, Select):
+        yield from session.execute(rows.execution_options(yield_per=chunk_size)).scalars().partitions()
+        return
+
+    iterator = iter(rows)
+
+    while chunk := list(itertools.islice(iterator, chunk_size)):
+        yield chunk
+
+
+def _prefetch_chunks(rows: Any, chunk_size: int, session: Session) -> Iterator[Sequence[Any]]:
+    """Load the first chunk of rows, or more than the ``max_rows`` limit of the request, before streaming the rest.
+
+    Executing the statement before the response starts lets a statement timeout abort with 503 and a row limit abort
+    with 413 like the routes which are not streamed.
+
+    Args:
+        rows: A :class:`Query`, a select statement or an iterable of objects.
+        chunk_size: The number of rows per chunk.
+        session: The session executing queries and select statements.
+
+    Returns:
+        The loaded chunks followed by the chunks still to load.
+    """
+
+    # Imported here because the database extension depends on this module.
+    from flask_ligand.extensions.database import get_request_db_limits
+
+    limits = get_request_db_limits()
+    max_rows = limits.max_rows if limits is not None else None
+    chunks = _chunked_rows(rows, chunk_size, session)
+    loaded: list[Sequence[Any]] = []
+    count = 0
+
+    for chunk in chunks:
+        loaded.append(chunk)
+        count += len(chunk)
+
+        if max_rows is None or count > max_rows:
+            break
+
+    if max_rows is not None and count > max_rows:
+        _abort_row_limit(max_rows)
+
+    return itertools.chain(loaded, chunks)
+
+
+def _abort_row_limit(max_rows: int) -> None:
+    """Count and abort a request that matches more rows than allowed.
+
+    Args:
+        max_rows: The maximum number of rows the request may load.
+
+    Raises:
+        werkzeug.exceptions.HTTPException: Always, with a 413 status code.
+    """
+
+    # Imported here because the database extension depends on this module.
+    from flask_ligand.extensions.database import get_db_limit_stats
+
+    get_db_limit_stats().increment("row_limits")
+    abort(HTTPStatus(413), message=f"The request matches more than {max_rows} rows!")
+
+
+def _stream_json_array(chunks: Iterable[Sequence[Any]], schema: ma.Schema) -> Iterator[str]:
+    """Serialize chunks of rows into an incrementally written JSON array.
+
+    Args:
+        chunks: The chunks of rows.
+        schema: The schema dumping a list of rows.
+    """
+
+    yield "["
+
+    separator = ""
+
+    for chunk in chunks:
+        # Dump each chunk as a list and strip its brackets so that the chunks join into a single array.
+        yield separator + flask.json.dumps(schema.dump(chunk))[1:-1]
+        separator = ","
+
+    yield "]"
 
 
 # ======================================================================================================================
@@ -47,6 +290,8 @@ def abort(http_status: HTTPStatus, message: Optional[str] = None) -> None:
         http_status: A valid HTTPStatus enum which will be used for reporting the HTTP response status and code.
         message: Custom message to return within the body or a default HTTP status message will be returned instead.
 
+    Note: Raising the exception does not block, so this is also safe to call from ``async def`` views.
+
     Raises:
         werkzeug.exceptions.HTTPException: An exception containing the HTTP status code and custom message if supplied.
     """
@@ -72,8 +317,495 @@ class Blueprint(BlueprintOrig):
     """
     :class:`Blueprint <flask_smorest.Blueprint>` override example. See comments below on how to create a custom
     converter for your schemas.
+
+    A role requirement can be declared for every route of the Blueprint with ``role_required`` or per route with the
+    :meth:`role_required <Blueprint.role_required>` decorator. These requirements are enforced before any request body
+    or query arguments are parsed, regardless of the decorator order, and automatically document the route as requiring
+    bearer authentication.
+
+    Role requirements (including those declared with
+    :func:`jwt_role_required <flask_ligand.extensions.jwt.jwt_role_required>`) are collected when routes are added so
+    that they can be validated when the Blueprint is registered with the :class:`Api <flask_ligand.extensions.api.Api>`.
+
+    Limits of the database work of a request can likewise be declared for every route of the Blueprint with
+    ``statement_timeout`` and ``max_rows`` or per route with the :meth:`db_limits <Blueprint.db_limits>` decorator,
+    and so can whether committing expires the loaded objects with ``expire_on_commit`` or the
+    :meth:`expire_on_commit <Blueprint.expire_on_commit>` decorator.
+
+    Args:
+        args: Positional arguments passed to :class:`Blueprint <flask_smorest.Blueprint>`.
+        role_required: A realm role name or :class:`RolePolicy <flask_ligand.extensions.jwt.RolePolicy>` required
+            by the user to access every route of this Blueprint.
+        statement_timeout: The maximum time (in seconds) a single statement of every route of this Blueprint may run.
+        max_rows: The maximum number of rows a :class:`Query` of every route of this Blueprint may load.
+        expire_on_commit: Whether committing expires the loaded objects in every route of this Blueprint. (The
+            ``DB_EXPIRE_ON_COMMIT`` setting if not specified)
+        kwargs: Keyword arguments passed to :class:`Blueprint <flask_smorest.Blueprint>`.
     """
 
+    def __init__(
+        self,
+        *args: Any,
+        role_required: Any = None,
+        statement_timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        expire_on_commit: Optional[bool] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(*args, **kwargs)
+
+        self.role_required_default = role_required
+        self.statement_timeout_default = statement_timeout
+        self.max_rows_default = max_rows
+        self.expire_on_commit_default = expire_on_commit
+        self._role_policies: dict[str, list[Any]] = {}
+        self._statement_timeouts = statement_timeout is not None
+
+    def role_required(self, role: Any) -> Callable[[Any], Any]:
+        """Decorator requiring a role for a route before its request body or query arguments are parsed.
+
+        Overrides the ``role_required`` requirement of the Blueprint for the decorated route.
+
+        Args:
+            role: A realm role name or :class:`RolePolicy <flask_ligand.extensions.jwt.RolePolicy>`.
+        """
+
+        def decorator(func: Any) -> Any:
+            func._route_role_required = role
+            return func
+
+        return decorator
+
+    def db_limits(
+        self, statement_timeout: Optional[float] = None, max_rows: Optional[int] = None
+    ) -> Callable[[Any], Any]:
+        """Decorator limiting the database work of a route so that one expensive request cannot hold a connection.
+
+        A statement running longer than ``statement_timeout`` is cancelled by the database (or interrupted by SQLite)
+        and the request is aborted with 503. A :class:`Query` loading more than ``max_rows`` rows with ``all`` (which
+        paginated routes use too) aborts the request with 413, while rows loaded otherwise are not counted. Either way the counters of
+        :func:`get_db_limit_stats <flask_ligand.extensions.database.get_db_limit_stats>` are incremented.
+
+        Overrides the ``statement_timeout`` and ``max_rows`` limits of the Blueprint for the decorated route.
+
+        Args:
+            statement_timeout: The maximum time (in seconds) a single statement may run.
+            max_rows: The maximum number of rows a :class:`Query` may load.
+        """
+
+        def decorator(func: Any) -> Any:
+            func._route_db_limits = (statement_timeout, max_rows)
+            return func
+
+        return decorator
+
+    def expire_on_commit(self, enabled: bool) -> Callable[[Any], Any]:
+        """Decorator controlling whether committing expires the objects loaded by the session of a route.
+
+        Write endpoints following the ``session.add(item); session.commit(); return item`` pattern can disable it so
+        that the response is dumped from the committed objects instead of reloading every one of them. Models with
+        values generated by the database should set ``__mapper_args__ = {"eager_defaults": True}`` so that those values
+        are fetched while flushing, with RETURNING where the dialect supports it, instead of lazily after the commit.
+
+        Overrides the ``expire_on_commit`` option of the Blueprint and the ``DB_EXPIRE_ON_COMMIT`` setting for the
+        decorated route.
+
+        Args:
+            enabled: Whether committing expires the loaded objects.
+        """
+
+        def decorator(func: Any) -> Any:
+            func._route_expire_on_commit = enabled
+            return func
+
+        return decorator
+
+    def bulk_arguments(self, schema: Any, *, max_items: Optional[int] = None, **kwargs: Any) -> Callable[[Any], Any]:
+        """Decorator loading a JSON array request body where every item is deserialized and validated by ``schema``.
+
+        The validation errors of every item are reported together in a single response keyed by the index of the
+        item. Pass the loaded items to :func:`bulk_insert <flask_ligand.extensions.database.bulk_insert>` and friends to
+        write them in a few round trips.
+
+        Args:
+            schema: The item schema class or instance, e.g. an :class:`AutoSchema`.
+            max_items: Abort with 413 before deserializing a request body holding more items.
+            kwargs: Keyword arguments passed to :meth:`Blueprint.arguments <flask_smorest.Blueprint.arguments>`.
+        """
+
+        if isinstance(schema, type):
+            schema = schema(many=True)
+        elif not schema.many:
+            schema = type(schema)(many=True)
+
+        def decorator(func: Any) -> Any:
+            view = self.arguments(schema, **kwargs)(func)
+
+            @wraps(view)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                items = flask.request.get_json(silent=True)
+
+                if max_items is not None and isinstance(items, list) and len(items) > max_items:
+                    abort(HTTPStatus(413), message=f"A maximum of {max_items} items can be sent at once!")
+
+                return view(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def stream_response(
+        self, status_code: int, schema: Any, *, chunk_size: int = 1000, **kwargs: Any
+    ) -> Callable[[Any], Any]:
+        """Decorator streaming the rows returned by the decorated function as an incrementally written JSON array.
+
+        Unlike :meth:`response <flask_smorest.Blueprint.response>` with a ``many`` schema, the rows are loaded, dumped
+        and sent in chunks of ``chunk_size`` so that memory use stays bounded regardless of the number of rows. The
+        decorated function returns a :class:`Query`, a select statement or any other iterable of objects, optionally
+        along with a status code and headers.
+
+        The rows are loaded by a session of their own which outlives the session of the request. The first chunk is
+        loaded before the response starts, so the limits declared with :meth:`db_limits` abort the request as usual.
+        With a ``max_rows`` limit, up to ``max_rows + 1`` rows are loaded upfront to tell whether the limit is exceeded.
+        A database error while loading a later chunk ends the response early since its status code has already been
+        sent.
+
+        Args:
+            status_code: The status code of the response.
+            schema: The item schema class or instance, e.g. an :class:`AutoSchema`.
+            chunk_size: The number of rows loaded and dumped at a time.
+            kwargs: Keyword arguments passed to :meth:`Blueprint.response <flask_smorest.Blueprint.response>` for
+                documenting the response.
+        """
+
+        if isinstance(schema, type):
+            schema = schema(many=True)
+        elif not schema.many:
+            schema = type(schema)(many=True)
+
+        def decorator(func: Any) -> Any:
+            @wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                # Imported here because the database extension depends on this module.
+                from flask_ligand.extensions.database import DB
+
+                rows, r_status_code, r_headers = utils.unpack_tuple_response(
+                    flask.current_app.ensure_sync(func)(*args, **kwargs)
+                )
+
+                # The session of the request is removed once the view returns, before the rows are streamed.
+                session = DB.session.session_factory()
+
+                try:
+                    chunks = _prefetch_chunks(rows, chunk_size, session)
+                except BaseException:
+                    session.close()
+                    raise
+
+                response = flask.Response(
+                    flask.stream_with_context(_stream_json_array(chunks, schema)),
+                    status=r_status_code or status_code,
+                    headers=r_headers,
+                    mimetype="application/json",
+                )
+                response.call_on_close(session.close)
+
+                return response
+
+            return self.response(status_code, schema, **kwargs)(wrapper)
+
+        return decorator
+
+    def add_url_rule(
+        self,
+        rule: str,
+        endpoint: Optional[str] = None,
+        view_func: Any = None,
+        provide_automatic_options: Optional[bool] = None,
+        **options: Any,
+    ) -> None:
+        if isinstance(view_func, type) and issubclass(view_func, MethodView):
+            funcs = []
+
+            for method in view_func.methods or ():
+                func = self._enforce_role(self._apply_db_policies(getattr(view_func, method.lower())))
+                setattr(view_func, method.lower(), func)
+                funcs.append(func)
+        else:
+            view_func = self._enforce_role(self._apply_db_policies(view_func))
+            funcs = [view_func]
+
+        super().add_url_rule(rule, endpoint, view_func, provide_automatic_options, **options)
+
+        policies = [func._role_policy for func in funcs if hasattr(func, "_role_policy")]
+
+        if policies:
+            self._role_policies[self._endpoints[-1]] = policies
+
+    def _enforce_role(self, func: Any) -> Any:
+        """Wrap a view function so that its role requirement is verified before anything else.
+
+        Args:
+            func: The fully decorated view function.
+        """
+
+        # Imported here because the JWT extension depends on this module.
+        from flask_ligand.extensions.jwt import (
+            as_role_policy,
+            verify_jwt_role,
+            verify_jwt_role_async,
+        )
+
+        role = getattr(func, "_route_role_required", self.role_required_default)
+
+        if role is None or getattr(func, "_role_enforced", False):
+            return func
+
+        policy = as_role_policy(role)
+        wrapper: Callable[..., Any]
+
+        # flask-smorest decorators already run coroutine functions to completion from regular functions.
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                await verify_jwt_role_async(policy)
+
+                return await func(*args, **kwargs)
+
+        else:
+
+            @wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                verify_jwt_role(policy)
+
+                return func(*args, **kwargs)
+
+        # Document the route as protected without mutating the documentation of the wrapped function.
+        wrapper._apidoc = deepcopy(getattr(func, "_apidoc", {}))  # type: ignore[attr-defined]
+        wrapper._apidoc.setdefault("manual_doc", {}).setdefault("security", [{BEARER_AUTH_SCHEME: []}])  # type: ignore
+        wrapper._role_policy = policy  # type: ignore[attr-defined]
+        wrapper._role_enforced = True  # type: ignore[attr-defined]
+
+        return wrapper
+
+    def _apply_db_policies(self, func: Any) -> Any:
+        """Wrap a view function so that its database work is limited and its session configured while it runs.
+
+        Args:
+            func: The fully decorated view function.
+        """
+
+        # Imported here because the database extension depends on this module.
+        from flask_ligand.extensions.database import (
+            DB,
+            DBLimits,
+            get_db_limit_stats,
+            is_statement_timeout,
+        )
+
+        statement_timeout, max_rows = getattr(
+            func, "_route_db_limits", (self.statement_timeout_default, self.max_rows_default)
+        )
+        expire_on_commit = getattr(func, "_route_expire_on_commit", self.expire_on_commit_default)
+
+        if statement_timeout is not None:
+            self._statement_timeouts = True
+
+        if getattr(func, "_db_policies_applied", False) or (
+            statement_timeout is None and max_rows is None and expire_on_commit is None
+        ):
+            return func
+
+        limits = (
+            DBLimits(statement_timeout, max_rows) if statement_timeout is not None or max_rows is not None else None
+        )
+
+        def apply() -> Optional[bool]:
+            if limits is not None:
+                flask.g._flask_ligand_db_limits = limits
+            if expire_on_commit is None:
+                return None
+
+            previous: bool = DB.session().expire_on_commit
+            DB.session().expire_on_commit = expire_on_commit
+
+            return previous
+
+        def restore(previous: Optional[bool]) -> None:
+            if previous is not None:
+                DB.session().expire_on_commit = previous
+
+        def on_error(error: DBAPIError) -> None:
+            if limits is None or not is_statement_timeout(error):
+                raise error
+
+            DB.session.rollback()
+            get_db_limit_stats().increment("statement_timeouts")
+            abort(HTTPStatus(503), message="The database did not respond in time!")
+
+        wrapper: Callable[..., Any]
+
+        # flask-smorest decorators already run coroutine functions to completion from regular functions.
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                previous = apply()
+
+                try:
+                    return await func(*args, **kwargs)
+                except DBAPIError as e:
+                    on_error(e)
+                finally:
+                    restore(previous)
+
+        else:
+
+            @wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                previous = apply()
+
+                try:
+                    return func(*args, **kwargs)
+                except DBAPIError as e:
+                    on_error(e)
+                finally:
+                    restore(previous)
+
+        wrapper._db_policies_applied = True  # type: ignore[attr-defined]
+
+        return wrapper
+
+    def validate_role_policies(self, allowed_roles: list[str]) -> None:
+        """Verify that the role requirements of every route only reference allowed roles.
+
+        Args:
+            allowed_roles: The roles allowed for endpoint protection.
+
+        Raises:
+            RuntimeError: A route requires a role that is not an allowed role.
+        """
+
+        for endpoint, policies in self._role_policies.items():
+            for policy in policies:
+                try:
+                    policy.validate(allowed_roles)
+                except RuntimeError as e:
+                    raise RuntimeError(f"The '{self.name}.{endpoint}' endpoint is misconfigured! {e}") from e
+
+    def paginate(
+        self,
+        pager: Optional[type[Page]] = None,
+        *,
+        page: Optional[int] = None,
+        page_size: Optional[int] = None,
+        max_page_size: Optional[int] = None,
+    ) -> Callable[[Any], Any]:
+        """Decorator adding pagination to the endpoint.
+
+        Pagers derived from :class:`SQLKeysetPage` replace the ``page`` query argument with an opaque ``cursor`` and
+        report the cursor of the next page in the pagination header instead of page numbers. Otherwise this behaves
+        exactly like :meth:`Blueprint.paginate <flask_smorest.Blueprint.paginate>`.
+
+        Args:
+            pager: Page class used to paginate response data.
+            page: Default requested page number. (Ignored by keyset pagers)
+            page_size: Default requested page size.
+            max_page_size: Maximum page size.
+        """
+
+        if not (isinstance(pager, type) and issubclass(pager, SQLKeysetPage)):
+            return super().paginate(pager, page=page, page_size=page_size, max_page_size=max_page_size)  # type: ignore
+
+        page_params_schema = _keyset_pagination_parameters_schema_factory(
+            page_size or self.DEFAULT_PAGINATION_PARAMETERS["page_size"],
+            max_page_size or self.DEFAULT_PAGINATION_PARAMETERS["max_page_size"],
+        )
+        error_status_code = self.PAGINATION_ARGUMENTS_PARSER.DEFAULT_VALIDATION_STATUS
+
+        def decorator(func: Any) -> Any:
+            @wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                page_params = self.PAGINATION_ARGUMENTS_PARSER.parse(
+                    page_params_schema, flask.request, location="query"
+                )
+
+                result, status, headers = utils.unpack_tuple_response(
+                    flask.current_app.ensure_sync(func)(*args, **kwargs)
+                )
+                result = pager(result, page_params=page_params).items
+
+                if self.PAGINATION_HEADER_NAME is not None:
+                    headers = {} if headers is None else headers
+                    headers[self.PAGINATION_HEADER_NAME] = json.dumps(
+                        KeysetPaginationMetadataSchema().dump(page_params)
+                    )
+
+                return result, status, headers
+
+            wrapper._apidoc = deepcopy(getattr(wrapper, "_apidoc", {}))  # type: ignore[attr-defined]
+            wrapper._apidoc["pagination"] = {  # type: ignore[attr-defined]
+                "parameters": {"in": "query", "schema": page_params_schema},
+                "response": {error_status_code: HTTPStatus(error_status_code).name},
+                "keyset": True,
+            }
+
+            return wrapper
+
+        return decorator
+
+    def _prepare_pagination_doc(self, doc: dict[str, Any], doc_info: dict[str, Any], **kwargs: Any) -> Any:
+        operation = doc_info.get("pagination")
+
+        if not operation or not operation.get("keyset"):
+            return super()._prepare_pagination_doc(doc, doc_info, **kwargs)
+
+        doc.setdefault("parameters", []).append(operation["parameters"])
+        doc.setdefault("responses", {}).update(operation["response"])
+
+        if self.PAGINATION_HEADER_NAME is not None:
+            for success_status_code in doc_info.get("success_status_codes", []):
+                doc["responses"][success_status_code].setdefault("headers", {})[self.PAGINATION_HEADER_NAME] = {
+                    "description": "Keyset pagination metadata",
+                    "schema": KeysetPaginationMetadataSchema,
+                }
+
+        return doc
+
+    def _set_pagination_metadata(self, page_params: Any, result: Any, headers: Any) -> tuple[Any, Any]:
+        """Add pagination metadata to the headers, including whether the total is exact.
+
+        Without a total (the ``has_next`` count mode of :class:`SQLCursorPage`) only the current, previous and next
+        page numbers are reported.
+        """
+
+        if headers is None:
+            headers = {}
+
+        has_next = getattr(page_params, "has_next", None)
+
+        if has_next is None:
+            metadata = self._make_pagination_metadata(page_params.page, page_params.page_size, page_params.item_count)
+        else:
+            metadata = {"first_page": 1, "page": page_params.page}
+
+            if page_params.page > 1:
+                metadata["previous_page"] = page_params.page - 1
+            if has_next:
+                metadata["next_page"] = page_params.page + 1
+
+        metadata["total_exact"] = getattr(page_params, "total_exact", True)
+        headers[self.PAGINATION_HEADER_NAME] = json.dumps(PaginationHeaderSchema().dump(metadata))
+
+        return result, headers
+
+    def _document_pagination_metadata(self, spec: Any, resp_doc: dict[str, Any]) -> None:
+        resp_doc.setdefault("headers", {})[self.PAGINATION_HEADER_NAME] = {
+            "description": "Pagination metadata",
+            "schema": PaginationHeaderSchema,
+        }
+
 
 # Define custom converter to schema function
 # def customconverter2paramschema(converter):
@@ -98,7 +830,35 @@ class Api(ApiOrig):
         super().__init__(app, spec_kwargs=spec_kwargs)
 
         # This adds an "Authorize" button to the SwaggerUI docs configured for custom "bearerAuth" doc decorators.
-        self.spec.components.security_scheme("bearerAuth", {"type": "http", "scheme": "bearer", "bearerFormat": "JWT"})
+        self.spec.components.security_scheme(
+            BEARER_AUTH_SCHEME, {"type": "http", "scheme": "bearer", "bearerFormat": "JWT"}
+        )
+
+    def register_blueprint(self, blp: BlueprintOrig, *, parameters: Optional[list[Any]] = None, **options: Any) -> None:
+        """Register a Blueprint in the application after validating the role requirements of its routes.
+
+        Statement timeouts are only applied to the statements of the application once a Blueprint declaring them is
+        registered.
+
+        Args:
+            blp: Blueprint to register.
+            parameters: List of parameter descriptions for the path parameters in the ``url_prefix`` of the Blueprint.
+            options: Keyword arguments overriding :class:`Blueprint <flask.Blueprint>` defaults.
+
+        Raises:
+            RuntimeError: A route requires a role that is not an allowed role.
+        """
+
+        # Imported here because the database extension depends on this module.
+        from flask_ligand.extensions.database import enable_statement_timeouts
+
+        if isinstance(blp, Blueprint) and self._app.config.get("ALLOWED_ROLES") is not None:
+            blp.validate_role_policies(self._app.config["ALLOWED_ROLES"])
+
+        super().register_blueprint(blp, parameters=parameters, **options)
+
+        if isinstance(blp, Blueprint) and blp._statement_timeouts:
+            enable_statement_timeouts(self._app)
 
 
 class Schema(ma.Schema):
@@ -138,20 +898,332 @@ class AutoSchema(SQLAlchemyAutoSchema):  # type: ignore
         return {key: value for key, value in data.items() if value is not None}
 
 
+class PaginationHeaderSchema(pagination.PaginationMetadataSchema):  # type: ignore
+    """Extend the pagination metadata to report whether the total number of items is exact."""
+
+    total_exact = ma.fields.Bool(metadata={"description": "Whether the total number of items is exact."})
+
+
 class SQLCursorPage(Page):
-    """:doc:`SQL cursor pager used for paginated endpoints. <flask-smorest:pagination>`"""
+    """
+    :doc:`SQL cursor pager used for paginated endpoints. <flask-smorest:pagination>`
+
+    Counting every matching row can cost more than fetching the page itself, so how the total is determined is
+    selected by ``count_mode`` (override it in a subclass to choose per endpoint) which defaults to the
+    ``PAGINATION_COUNT_MODE`` setting:
+
+        ``exact``: Count the matching rows on every request.
+
+        ``cached``: Count the matching rows and cache the count for ``PAGINATION_COUNT_CACHE_TTL`` seconds keyed by
+        the compiled query. Counts served from the cache are reported as not exact.
+
+        ``estimate``: Use the row estimate of the query planner as returned by :meth:`estimate_count`, falling back to
+        an exact count for dialects without estimates.
+
+        ``has_next``: Skip counting altogether and fetch one extra row to determine whether there is a next page. No
+        total is reported.
+
+    The ``total_exact`` field of the pagination header reports whether the ``total`` is exact.
+    """
+
+    count_mode: Optional[str] = None
+
+    def __init__(self, collection: Any, page_params: Any):
+        self.mode = self.count_mode or flask.current_app.config["PAGINATION_COUNT_MODE"]
+
+        if self.mode not in COUNT_MODES:
+            raise RuntimeError(f"The '{self.mode}' pagination count mode is not supported!")
+
+        page_params.total_exact = True
+        page_params.has_next = None
+
+        super().__init__(collection, page_params)
+
+    @cached_property
+    def _rows(self) -> list[Any]:
+        """The rows of the current page followed by the first row of the next page if any."""
+
+        first_item = self.page_params.first_item
+
+        return list(self.collection[first_item : first_item + self.page_params.page_size + 1])
+
+    @property
+    def items(self) -> list[Any]:
+        if self.mode == "has_next":
+            return self._rows[: self.page_params.page_size]
+
+        return super().items  # type: ignore[no-any-return]
 
     @property
     def item_count(self) -> int:
+        if self.mode == "has_next":
+            self.page_params.total_exact = False
+            self.page_params.has_next = len(self._rows) > self.page_params.page_size
+
+            # Only a lower bound which is not reported.
+            return int(self.page_params.first_item + len(self._rows))
+
+        if self.mode == "estimate":
+            estimate = self.estimate_count()
+
+            if estimate is not None:
+                self.page_params.total_exact = False
+
+                return estimate
+
+        if self.mode == "cached":
+            return self._cached_count()
+
         return self.collection.count()  # type: ignore
 
+    def _cached_count(self) -> int:
+        """Count the matching rows unless a count for the same compiled query is cached."""
+
+        cache = flask.current_app.extensions.get(COUNT_CACHE_EXTENSION)
+
+        if cache is None:
+            cache = flask.current_app.extensions.setdefault(
+                COUNT_CACHE_EXTENSION,
+                TTLCache(
+                    flask.current_app.config["PAGINATION_COUNT_CACHE_SIZE"],
+                    ttl=flask.current_app.config["PAGINATION_COUNT_CACHE_TTL"],
+                ),
+            )
+
+        compiled = self.collection.statement.compile()
+        key = (str(compiled), repr(sorted(compiled.params.items())))
+        count: Optional[int] = cache.get(key)
+
+        if count is None:
+            count = self.collection.count()
+            cache.set(key, count)
+        else:
+            self.page_params.total_exact = False
+
+        return count  # type: ignore[return-value]
+
+    def estimate_count(self) -> Optional[int]:
+        """Estimate the number of matching rows from the query plan.
+
+        Only PostgreSQL is supported out of the box. Override this to support other dialects.
+
+        Returns:
+            The estimated number of rows or ``None`` if the dialect does not provide estimates.
+        """
+
+        statement = self.collection.statement
+        connection = self.collection.session.connection(bind_arguments={"clause": statement})
+
+        if connection.dialect.name != "postgresql":
+            return None
+
+        plan = connection.execute(_ExplainJson(statement)).scalar()
+
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class KeysetPaginationParameters:
+    """
+    Holds keyset pagination arguments along with the cursor of the next page once the page has been fetched.
+
+    Args:
+        page_size: Page size.
+        cursor: Opaque cursor of the requested page. (The first page if not specified)
+    """
+
+    def __init__(self, page_size: int, cursor: Optional[str] = None):
+        self.page_size = page_size
+        self.cursor = cursor
+        self.has_next = False
+        self.next_cursor: Optional[str] = None
+
+
+class KeysetPaginationMetadataSchema(ma.Schema):
+    """Keyset pagination metadata returned in the pagination header."""
+
+    class Meta:
+        ordered = True
+
+    page_size = ma.fields.Int(metadata={"description": "Page size."})
+    has_next = ma.fields.Bool(metadata={"description": "Whether another page follows this one."})
+    next_cursor = ma.fields.Str(metadata={"description": "Cursor of the next page."})
+
+    @ma.post_dump
+    def remove_none_values(self, data: dict[Any, Any], **_: dict[Any, Any]) -> dict[Any, Any]:
+        return {key: value for key, value in data.items() if value is not None}
+
+
+class SQLKeysetPage(Page):
+    """
+    :doc:`SQL keyset (seek) pager used for paginated endpoints. <flask-smorest:pagination>`
+
+    Rather than skipping rows with ``OFFSET`` every page seeks directly past the last row of the previous page, so
+    fetching a deep page costs the same as fetching the first. The query is sorted by its ``ORDER BY`` columns followed
+    by the primary key as a tie-breaker, which must all be non-nullable columns of the queried model and should be
+    covered by an index. No total is reported since counting would defeat the purpose.
+
+    Use with :meth:`Blueprint.paginate <flask_ligand.extensions.api.Blueprint.paginate>` exactly like
+    :class:`SQLCursorPage`; clients follow the ``next_cursor`` of the pagination header with the ``cursor`` query
+    argument.
+    """
+
+    def __init__(self, collection: Any, page_params: KeysetPaginationParameters):
+        self.collection = collection
+        self.page_params = page_params
+
+    @property
+    def item_count(self) -> Optional[int]:  # type: ignore[override]
+        return None
+
+    def _sort_keys(self) -> list[tuple[Any, str, bool]]:
+        """Determine the sort columns of the query with their model attribute names and whether they are descending.
+
+        Raises:
+            RuntimeError: The query is sorted by something other than a column of the queried model.
+        """
+
+        mapper = sa_inspect(self.collection.column_descriptions[0]["entity"])
+        keys: list[tuple[Any, str, bool]] = []
+
+        for clause in self.collection._order_by_clauses:
+            descending = isinstance(clause, UnaryExpression) and clause.modifier is operators.desc_op
+            column = clause.element if isinstance(clause, UnaryExpression) and clause.modifier else clause
+
+            try:
+                keys.append((column, mapper.get_property_by_column(column).key, descending))
+            except UnmappedColumnError as e:
+                raise RuntimeError(
+                    f"Keyset pagination only supports sorting by columns of the '{mapper.class_.__name__}' model!"
+                ) from e
+
+        sorted_columns = {key[0] for key in keys}
+        keys.extend(
+            (column, mapper.get_property_by_column(column).key, False)
+            for column in mapper.primary_key
+            if column not in sorted_columns
+        )
+
+        return keys
+
+    @cached_property
+    def items(self) -> list[Any]:  # type: ignore[override]
+        keys = self._sort_keys()
+        columns = [column for column, _, _ in keys]
+        query = self.collection.order_by(None).order_by(
+            *(column.desc() if descending else column.asc() for column, _, descending in keys)
+        )
+
+        if self.page_params.cursor is not None:
+            values = _decode_cursor(self.page_params.cursor, columns)
+
+            # (a, b) after (x, y) is "a > x OR (a = x AND b > y)", flipping the comparison for descending columns.
+            query = query.filter(
+                or_(
+                    *(
+                        and_(
+                            *(columns[j] == values[j] for j in range(i)),
+                            columns[i] < values[i] if keys[i][2] else columns[i] > values[i],
+                        )
+                        for i in range(len(keys))
+                    )
+                )
+            )
+
+        rows: list[Any] = query.limit(self.page_params.page_size + 1).all()
+        items = rows[: self.page_params.page_size]
+
+        self.page_params.has_next = len(rows) > self.page_params.page_size
+
+        if self.page_params.has_next:
+            self.page_params.next_cursor = _encode_cursor([getattr(items[-1], name) for _, name, _ in keys])
+
+        return items
+
 
 class Query(QueryOrig):  # type: ignore
     """
     Enable customized REST JSON error messages for 'get_or_404' and 'first_or_404' methods for
     :class:`Query <flask_sqlalchemy.query.Query>`.
+
+    Primary key lookups of models declared :func:`cacheable <flask_ligand.extensions.database.cacheable>` and queries
+    declared with :meth:`cache` are served from the query cache of the app.
     """
 
+    def _query_cache(self, declared: bool) -> tuple[Any, Any]:
+        """Find the query cache for the model of this query.
+
+        Args:
+            declared: Only use the cache when the query was declared with :meth:`cache`.
+
+        Returns:
+            The query cache and the model class or ``(None, None)`` if the query cannot be cached.
+        """
+
+        # Imported here because the database extension depends on this module.
+        from flask_ligand.extensions.database import get_query_cache
+
+        descriptions = self.column_descriptions
+
+        if declared and not self.get_execution_options().get("query_cache"):
+            return None, None
+        if len(descriptions) != 1 or descriptions[0]["expr"] is not descriptions[0]["entity"]:
+            return None, None
+
+        model: Any = descriptions[0]["entity"]
+
+        return get_query_cache(model), model
+
+    def cache(self) -> Query:
+        """Declare that the results of this query may be served from the query cache of its model.
+
+        Only queries for a single :func:`cacheable <flask_ligand.extensions.database.cacheable>` model are cached.
+        Cached results are invalidated whenever a committed transaction changes any row of the model.
+        """
+
+        return self.execution_options(query_cache=True)  # type: ignore[no-any-return]
+
+    def get(self, ident: object) -> Any:
+        query_cache, model = self._query_cache(declared=False)
+
+        if query_cache is None:
+            return super().get(ident)
+
+        return query_cache.get(self, model, ident, super().get)
+
+    def all(self) -> list[Any]:
+        # Imported here because the database extension depends on this module.
+        from flask_ligand.extensions.database import get_request_db_limits
+
+        query_cache, model = self._query_cache(declared=True)
+        limits = get_request_db_limits()
+        max_rows = limits.max_rows if limits is not None else None
+        query = self
+
+        # Load one row more than allowed to tell whether the limit is exceeded without loading every row.
+        if max_rows is not None and self._limit_clause is None:
+            query = self.limit(max_rows + 1)
+
+        if query_cache is None:
+            rows = QueryOrig.all(query)
+        else:
+            rows = query_cache.all(query, model, lambda: QueryOrig.all(query))
+
+        if max_rows is not None and len(rows) > max_rows:
+            _abort_row_limit(max_rows)
+
+        return rows  # type: ignore[no-any-return]
+
+    def first(self) -> Any:
+        query_cache, model = self._query_cache(declared=True)
+
+        if query_cache is None:
+            return super().first()
+
+        query = self.limit(1)
+        rows = query_cache.all(query, model, lambda: QueryOrig.all(query))
+
+        return rows[0] if rows else None
+
     def get_or_404(self, ident: object, description: Optional[str] = None) -> Any:
         """Like `get` but aborts with 404 if not found instead of returning ``None``.
 
@@ -177,3 +1249,162 @@ class Query(QueryOrig):  # type: ignore
         if rv is None:
             abort(HTTPStatus(404), message=description)
         return rv
+
+    def _primary_key_values(self, mapper: Any, ident: object) -> tuple[Any, ...]:
+        """Normalize a primary key given as a scalar, tuple or dictionary into a tuple of Python values.
+
+        Args:
+            mapper: The mapper of the model.
+            ident: A scalar, tuple, or dictionary representing the primary key.
+
+        Raises:
+            TypeError: The key does not match the primary key columns.
+            ValueError: A value cannot be converted into the Python type of its column.
+        """
+
+        columns = mapper.primary_key
+
+        if isinstance(ident, dict):
+            values = tuple(ident[mapper.get_property_by_column(column).key] for column in columns)
+        elif isinstance(ident, tuple):
+            values = ident
+        else:
+            values = (ident,)
+
+        if len(values) != len(columns):
+            raise TypeError(f"Expected {len(columns)} primary key values but got {len(values)}!")
+
+        return tuple(_coerce_column_value(column, value) for column, value in zip(columns, values))
+
+    def get_many_or_404(
+        self, idents: Iterable[object], description: Optional[str] = None, chunk_size: int = 1000
+    ) -> list[Any]:
+        """Like `get_or_404` but looks up many primary keys at once and aborts with a single 404 listing every key
+        that is not found.
+
+        Objects already in the identity map of the session are returned without querying them. The others are
+        loaded with one ``IN`` query per ``chunk_size`` keys. Filter criteria of the query apply to every key. The
+        ``max_rows`` limit of the route does not apply since the number of objects is bounded by the keys.
+
+        Args:
+            idents: Scalars, tuples, or dictionaries representing the primary keys. For a composite (e.g. multiple
+                column) primary key, tuples or dictionaries should be passed.
+            description: Override default 404 status code message with a custom message instead. (The missing keys
+                are appended to it)
+            chunk_size: The maximum number of keys looked up per query.
+
+        Returns:
+            The objects in the order of ``idents``.
+        """
+
+        mapper: Any = sa_inspect(self.column_descriptions[0]["entity"])
+        columns = mapper.primary_key
+        idents = list(idents)
+        keys: list[Optional[tuple[Any, ...]]] = []
+
+        for ident in idents:
+            try:
+                keys.append(self._primary_key_values(mapper, ident))
+            except (KeyError, TypeError, ValueError):
+                keys.append(None)
+
+        found: dict[tuple[Any, ...], Any] = {}
+
+        # Like 'get', serve objects from the identity map unless filter criteria could exclude them.
+        if self.whereclause is None:
+            for key in keys:
+                if key is None or key in found:
+                    continue
+
+                instance = self.session.identity_map.get(mapper.identity_key_from_primary_key(key))
+
+                if instance is not None and not sa_inspect(instance).expired:
+                    found[key] = instance
+
+        pending = list(dict.fromkeys(key for key in keys if key is not None and key not in found))
+
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start : start + chunk_size]
+
+            if len(columns) == 1:
+                criterion = columns[0].in_([key[0] for key in chunk])
+            else:
+                criterion = tuple_(*columns).in_(chunk)
+
+            # Every chunk loads at most one row per key, so the row limit of the route does not apply.
+            for instance in QueryOrig.all(self.filter(criterion)):
+                found[tuple(mapper.primary_key_from_instance(instance))] = instance
+
+        missing = [ident for ident, key in zip(idents, keys) if key not in found]
+
+        if missing:
+            message = f"Missing keys: {', '.join(dict.fromkeys(str(ident) for ident in missing))}"
+            abort(HTTPStatus(404), message=f"{description} {message}" if description else message)
+
+        return [found[key] for key in keys]  # type: ignore[index]
+
+    async def _run_in_thread(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Call a method of this query in a worker thread, one call at a time per session.
+
+        A session is not thread-safe, so calls awaited concurrently (e.g. with ``asyncio.gather``) are serialized
+        instead of sharing the session between worker threads.
+
+        Args:
+            func: The method to call.
+            args: The positional arguments of the method.
+        """
+
+        lock: threading.Lock = self.session.info.setdefault(_ASYNC_SESSION_LOCK_KEY, threading.Lock())
+
+        def _locked() -> Any:
+            with lock:
+                return func(*args)
+
+        return await asyncio.to_thread(_locked)
+
+    async def get_or_404_async(self, ident: object, description: Optional[str] = None) -> Any:
+        """Asynchronous variant of `get_or_404` for use within ``async def`` views.
+
+        The query runs in a worker thread so that it does not block the event loop. Asynchronous queries using the same
+        session run one at a time, so awaiting them concurrently does not make them faster. Do not use the session
+        from the view while such a query is pending.
+
+        Args:
+            ident: A scalar, tuple, or dictionary representing the primary key.  For a composite (e.g. multiple column)
+                primary key, a tuple or dictionary should be passed.
+            description: Override default 404 status code message with a custom message instead.
+        """
+
+        return await self._run_in_thread(self.get_or_404, ident, description)
+
+    async def first_or_404_async(self, description: Optional[str] = None) -> Any:
+        """Asynchronous variant of `first_or_404` for use within ``async def`` views.
+
+        The query runs in a worker thread so that it does not block the event loop. Like `get_or_404_async`, it waits
+        for the other asynchronous queries using the same session.
+
+        Args:
+            description: Override default 404 status code message with a custom message instead.
+        """
+
+        return await self._run_in_thread(self.first_or_404, description)
+
+    async def get_many_or_404_async(
+        self, idents: Iterable[object], description: Optional[str] = None, chunk_size: int = 1000
+    ) -> list[Any]:
+        """Asynchronous variant of `get_many_or_404` for use within ``async def`` views.
+
+        The queries run in a worker thread so that they do not block the event loop. Like `get_or_404_async`, they wait
+        for the other asynchronous queries using the same session.
+
+        Args:
+            idents: Scalars, tuples, or dictionaries representing the primary keys. For a composite (e.g. multiple
+                column) primary key, tuples or dictionaries should be passed.
+            description: Override default 404 status code message with a custom message instead. (The missing keys
+                are appended to it)
+            chunk_size: The maximum number of keys looked up per query.
+        """
+
+        items: list[Any] = await self._run_in_thread(self.get_many_or_404, idents, description, chunk_size)
+
+        return items
@@ -0,0 +1,153 @@
+"""In-process caching primitives shared by the extensions."""
+
+# ======================================================================================================================
+# Imports
+# ======================================================================================================================
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+# ======================================================================================================================
+# Type Checking
+# ======================================================================================================================
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import Any, Hashable, Optional
+
+
+# ======================================================================================================================
+# Globals
+# ======================================================================================================================
+_MISSING = object()
+
+
+# ======================================================================================================================
+# Classes: Public
+# ======================================================================================================================
+@dataclass
+class CacheStats:
+    """
+    A snapshot of the counters for a cache.
+
+    Args:
+        hits: The number of lookups that were served from the cache.
+        misses: The number of lookups that were not found in the cache or had expired.
+        evictions: The number of entries removed to make room for new entries.
+        size: The number of entries currently held by the cache.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        """The ratio of lookups served from the cache."""
+
+        lookups = self.hits + self.misses
+
+        return self.hits / lookups if lookups else 0.0
+
+
+class TTLCache:
+    """
+    A thread-safe, size bounded, least recently used (LRU) cache with per-entry expiration.
+
+    Args:
+        maxsize: The maximum number of entries to hold before evicting the least recently used entry.
+        ttl: The default time-to-live (in seconds) of an entry. ``None`` means entries never expire on their own.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        if maxsize < 1:
+            raise ValueError("The cache 'maxsize' must be a positive integer!")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._entries: OrderedDict[Hashable, tuple[Optional[float], Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    @property
+    def stats(self) -> CacheStats:
+        """A snapshot of the cache counters."""
+
+        return CacheStats(hits=self._hits, misses=self._misses, evictions=self._evictions, size=len(self._entries))
+
+    def get(self, key: Hashable, default: Any = None, count: bool = True) -> Any:
+        """Retrieve an entry from the cache.
+
+        Args:
+            key: The key of the entry.
+            default: The value to return if the entry is missing or expired.
+            count: Record the lookup in the hit and miss counters.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] is not None and entry[0] <= time.time():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                if count:
+                    self._misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            if count:
+                self._hits += 1
+
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None) -> None:
+        """Add or replace an entry in the cache.
+
+        Args:
+            key: The key of the entry.
+            value: The value to cache.
+            ttl: Override the default time-to-live (in seconds) for this entry.
+            expires_at: An absolute UNIX timestamp at which the entry expires. Takes precedence over ``ttl``.
+        """
+
+        if expires_at is None:
+            ttl = self.ttl if ttl is None else ttl
+            expires_at = time.time() + ttl if ttl is not None else None
+
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """Remove an entry from the cache if present.
+
+        Args:
+            key: The key of the entry.
+        """
+
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries from the cache without resetting the counters."""
+
+        with self._lock:
+            self._entries.clear()
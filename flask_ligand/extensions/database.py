@@ -5,20 +5,58 @@
 # ======================================================================================================================
 from __future__ import annotations
 
+import hashlib
+import itertools
+import json
+import logging
+import math
+import queue
+import random
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+import zlib
+from collections import Counter
+from contextlib import closing, contextmanager
+from dataclasses import dataclass, field
+from http import HTTPStatus
 from typing import TYPE_CHECKING
 
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from flask import current_app, g, has_app_context, has_request_context, request
 from flask_migrate import Migrate, upgrade
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, create_engine, delete, event, insert
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy import make_url, text, tuple_, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession as AsyncSessionOrig
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase  # type: ignore[attr-defined]
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.pool import NullPool, QueuePool
 from sqlalchemy_utils import force_auto_coercion
 
-from flask_ligand.extensions.api import Query
+from flask_ligand.extensions.api import Query, abort
+from flask_ligand.extensions.cache import TTLCache
 
 # ======================================================================================================================
 # Type Checking
 # ======================================================================================================================
 if TYPE_CHECKING:  # pragma: no cover
-    from flask import Flask
+    from typing import Any, Callable, Iterable, Iterator, Optional, Sequence, Union
+
+    from flask import Flask, Response
+    from sqlalchemy.engine import URL, Connection, Engine, ExecutionContext
+    from sqlalchemy.ext.asyncio import AsyncEngine
+    from sqlalchemy.orm import ORMExecuteState
+    from sqlalchemy.pool import ConnectionPoolEntry
 
 
 # ======================================================================================================================
@@ -27,14 +65,1373 @@ if TYPE_CHECKING:  # pragma: no cover
 class _Base(DeclarativeBase):
     """SQLAlchemy declarative base class."""
 
-    pass
+    pass
+
+
+class _InstrumentedQueuePool(QueuePool):
+    """
+    Extend :class:`QueuePool <sqlalchemy.pool.QueuePool>` to record how long checkouts wait on the pool and the age
+    of the pooled connections.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+
+        self._records: weakref.WeakSet[ConnectionPoolEntry] = weakref.WeakSet()
+        self._stats_lock = threading.Lock()
+        self._checkouts = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+
+        try:
+            record = super()._do_get()
+        finally:
+            wait_time = time.perf_counter() - start
+
+            with self._stats_lock:
+                self._checkouts += 1
+                self._wait_time_total += wait_time
+                self._wait_time_max = max(self._wait_time_max, wait_time)
+
+        self._records.add(record)
+
+        return record
+
+    @property
+    def metrics(self) -> PoolMetrics:
+        """A snapshot of the pool counters."""
+
+        now = time.time()
+        ages = [
+            now - record.starttime  # type: ignore[attr-defined]
+            for record in list(self._records)
+            if record.dbapi_connection is not None
+        ]
+
+        return PoolMetrics(
+            size=self.size(),
+            checked_out=self.checkedout(),
+            overflow=max(0, self.overflow()),
+            checkouts=self._checkouts,
+            wait_time_total=self._wait_time_total,
+            wait_time_max=self._wait_time_max,
+            connection_age_max=max(ages, default=0.0),
+        )
+
+
+class _ReplicaSet:
+    """
+    The read replicas of the default database along with the clients pinned to the primary after writing.
+
+    A client is pinned by a cookie holding the end of its read-your-writes window, so that the pin reaches every
+    worker process, and additionally by its ``Authorization`` header in ``backend`` for clients ignoring cookies.
+
+    Args:
+        bind_keys: The bind keys of the replica engines.
+        strategy: How to select a replica, either ``round_robin`` or ``least_connections``.
+        read_your_writes_window: How long (in seconds) a client reads from the primary after writing.
+        backend: Stores the pinned credentials. Any object providing the ``get`` and ``set`` methods of
+            :class:`TTLCache <flask_ligand.extensions.cache.TTLCache>` can be used, e.g. a wrapper around a cache shared
+            by every process. (A cache local to this process if not specified)
+    """
+
+    def __init__(self, bind_keys: list[str], strategy: str, read_your_writes_window: float, backend: Any = None):
+        if strategy not in ("round_robin", "least_connections"):
+            raise RuntimeError(f"The '{strategy}' replica selection strategy is not supported!")
+
+        self.bind_keys = bind_keys
+        self.strategy = strategy
+        self.read_your_writes_window = read_your_writes_window
+
+        self._counter = itertools.count()
+        self._pinned_clients = backend or TTLCache(10000, ttl=read_your_writes_window)
+
+    def select(self) -> Engine:
+        """Select the replica engine for a read-only statement."""
+
+        engines = [DB.engines[bind_key] for bind_key in self.bind_keys]
+
+        if self.strategy == "least_connections":
+            return min(engines, key=lambda engine: getattr(engine.pool, "checkedout", lambda: 0)())
+
+        return engines[next(self._counter) % len(engines)]
+
+    def pin_client(self) -> None:
+        """Pin the client of the current request to the primary for the read-your-writes window."""
+
+        if not has_request_context() or self.read_your_writes_window <= 0:
+            return
+
+        g._flask_ligand_primary_until = time.time() + self.read_your_writes_window
+        credentials = _credentials_key()
+
+        if credentials is not None:
+            self._pinned_clients.set(credentials, True, ttl=self.read_your_writes_window)
+
+    def is_client_pinned(self) -> bool:
+        """Whether the client of the current request recently wrote to the primary."""
+
+        if not has_request_context():
+            return False
+
+        try:
+            until = float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0))
+        except ValueError:
+            until = 0
+
+        # The cookie is not signed, so a client can pin itself to the primary no longer than by writing.
+        now = time.time()
+
+        if now < until <= now + self.read_your_writes_window:
+            return True
+
+        credentials = _credentials_key()
+
+        return credentials is not None and self._pinned_clients.get(credentials) is not None
+
+
+class _RoutingSession(Session):
+    """
+    Extend the Flask-SQLAlchemy :class:`Session <flask_sqlalchemy.session.Session>` to send read-only statements for
+    the default database to the replicas configured by the ``SQLALCHEMY_REPLICA_URIS`` setting.
+
+    Once a transaction writes (or flushes) everything up to its commit or rollback stays on the primary. Requests with
+    an HTTP method other than GET, HEAD, OPTIONS or TRACE use the primary from their first statement, so that the rows
+    they read before writing are current.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        # The session factory passes 'None' unless the caller chose whether committing expires the loaded objects.
+        if kwargs.get("expire_on_commit") is None:
+            kwargs["expire_on_commit"] = current_app.config["DB_EXPIRE_ON_COMMIT"]
+
+        super().__init__(*args, **kwargs)
+
+        self._wrote = False
+        self._force_primary = 0
+
+    def get_bind(
+        self,
+        mapper: Any = None,
+        clause: Any = None,
+        bind: Optional[Engine | Connection] = None,
+        **kwargs: Any,
+    ) -> Engine | Connection:
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        replicas: Optional[_ReplicaSet] = current_app.extensions.get(REPLICA_SET_EXTENSION)
+
+        if replicas is None or bind is not None or engine is not self._db.engines.get(None):
+            return engine
+
+        if self._flushing or not _is_read_only(clause):
+            self._wrote = True
+
+        if self._wrote or self._force_primary or _is_write_request() or replicas.is_client_pinned():
+            return engine
+
+        return replicas.select()
+
+    def commit(self) -> None:
+        super().commit()
+
+        if self._wrote:
+            self._wrote = False
+
+            replicas: Optional[_ReplicaSet] = current_app.extensions.get(REPLICA_SET_EXTENSION)
+
+            if replicas is not None:
+                replicas.pin_client()
+
+    def rollback(self) -> None:
+        super().rollback()
+
+        self._wrote = False
+
+
+class _SlowQueryLog:
+    """
+    Logs statements slower than a threshold along with a sample of their query plans.
+
+    Query plans are captured one at a time by a background thread on connections of a dedicated engine without a pool,
+    so that neither the slow statement nor other requests wait on them or on a connection of the pool. Plans are
+    captured at most once per ``explain_interval`` for the same statement and at most ``explain_rate_limit`` times per
+    minute overall. Slow statements arriving while ``EXPLAIN_QUEUE_SIZE`` plans are pending are only logged.
+
+    Args:
+        threshold: The duration (in seconds) from which a statement is considered slow.
+        explain_sample_rate: The ratio of slow statements to capture the query plan for.
+        explain_interval: The minimum time (in seconds) between capturing query plans for the same statement.
+        explain_rate_limit: The maximum number of query plans captured per minute.
+    """
+
+    EXPLAIN_PREFIXES = {
+        "postgresql": "EXPLAIN",
+        "mysql": "EXPLAIN",
+        "mariadb": "EXPLAIN",
+        "sqlite": "EXPLAIN QUERY PLAN",
+    }
+    EXPLAINABLE_STATEMENTS = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+    EXPLAIN_QUEUE_SIZE = 16
+
+    def __init__(self, threshold: float, explain_sample_rate: float, explain_interval: float, explain_rate_limit: int):
+        self.threshold = threshold
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_spacing = 60 / explain_rate_limit if explain_rate_limit > 0 else None
+
+        self._recently_explained = TTLCache(1024, ttl=explain_interval)
+        self._next_explain_at = 0.0
+        self._queue: queue.Queue[tuple[Engine, str, Any, bool, Optional[str]]] = queue.Queue(self.EXPLAIN_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._explain_engines: weakref.WeakKeyDictionary[Engine, Engine] = weakref.WeakKeyDictionary()
+
+    def after_cursor_execute(
+        self,
+        conn: Connection,
+        _cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: ExecutionContext,
+        executemany: bool,
+    ) -> None:
+        """Log the statement if it was slow.
+
+        Args:
+            conn: The connection that executed the statement.
+            _cursor: The DBAPI cursor. (Unused argument)
+            statement: The SQL statement.
+            parameters: The parameters of the statement.
+            context: The execution context of the statement.
+            executemany: Whether the statement was executed for many parameter sets.
+        """
+
+        start = getattr(context, "_flask_ligand_query_start", None)
+
+        if start is None:
+            return
+
+        duration = time.perf_counter() - start
+
+        if duration < self.threshold:
+            return
+
+        endpoint = request.endpoint if has_request_context() else None
+
+        LOGGER.warning(
+            "Slow query (%.3fs) in the '%s' endpoint with parameters %s: %s",
+            duration,
+            endpoint,
+            _parameter_shape(parameters, executemany),
+            statement,
+        )
+
+        dialect = conn.dialect.name
+
+        if (
+            dialect in self.EXPLAIN_PREFIXES
+            and statement.lstrip().upper().startswith(self.EXPLAINABLE_STATEMENTS)
+            and random.random() < self.explain_sample_rate
+            and statement not in self._recently_explained
+            and self._acquire_explain_slot()
+        ):
+            self._recently_explained.set(statement, True)
+
+            try:
+                self._queue.put_nowait(
+                    (conn.engine, f"{self.EXPLAIN_PREFIXES[dialect]} {statement}", parameters, executemany, endpoint)
+                )
+            except queue.Full:
+                LOGGER.debug("Skipped the query plan of a slow query, too many query plans are pending")
+            else:
+                self._start_worker()
+
+    def _acquire_explain_slot(self) -> bool:
+        """Determine whether the overall rate limit allows capturing another query plan now, consuming the slot."""
+
+        if self.explain_spacing is None:
+            return False
+
+        with self._lock:
+            now = time.monotonic()
+
+            if now < self._next_explain_at:
+                return False
+
+            self._next_explain_at = now + self.explain_spacing
+
+            return True
+
+    def _start_worker(self) -> None:
+        """Start the background thread capturing query plans unless it is already running."""
+
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._work, name="slow-query-explain", daemon=True)
+                self._worker.start()
+
+    def _work(self) -> None:
+        """Capture the queued query plans one at a time."""
+
+        while True:
+            engine, statement, parameters, executemany, endpoint = self._queue.get()
+
+            try:
+                self._explain(engine, statement, parameters, executemany, endpoint)
+            finally:
+                self._queue.task_done()
+
+    def _explain_engine(self, engine: Engine) -> Engine:
+        """Retrieve the engine without a pool connecting to the same database as an engine.
+
+        Args:
+            engine: The engine that executed the statement.
+        """
+
+        explain_engine = self._explain_engines.get(engine)
+
+        if explain_engine is None:
+            explain_engine = self._explain_engines[engine] = create_engine(engine.url, poolclass=NullPool)
+
+        return explain_engine
+
+    def _explain(
+        self, engine: Engine, statement: str, parameters: Any, executemany: bool, endpoint: Optional[str]
+    ) -> None:
+        """Capture and log the query plan of a statement, logging failures instead of raising them.
+
+        Args:
+            engine: The engine that executed the statement.
+            statement: The EXPLAIN statement.
+            parameters: The parameters of the statement.
+            executemany: Whether the statement was executed for many parameter sets.
+            endpoint: The endpoint that executed the statement.
+        """
+
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+
+        try:
+            with self._explain_engine(engine).connect() as conn:
+                plan = conn.exec_driver_sql(statement, parameters).all()
+        except Exception as e:
+            LOGGER.warning("Failed to capture the query plan of a slow query in the '%s' endpoint: %s", endpoint, e)
+        else:
+            LOGGER.warning(
+                "Query plan of a slow query in the '%s' endpoint:\n%s",
+                endpoint,
+                "\n".join(" ".join(str(value) for value in row) for row in plan),
+            )
+
+
+# ======================================================================================================================
+# Globals
+# ======================================================================================================================
+DB = SQLAlchemy(  # pylint: disable=invalid-name
+    model_class=_Base, query_class=Query, session_options={"class_": _RoutingSession, "expire_on_commit": None}
+)
+MIGRATE = Migrate()
+REPLICA_SET_EXTENSION = "flask_ligand_replica_set"
+READ_YOUR_WRITES_COOKIE = "flask_ligand_primary_until"
+REPLICA_BIND_KEY_PREFIX = "_flask_ligand_replica_"
+_READ_ONLY_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "TRACE"})
+BULK_BATCH_SIZE = 1000
+QUERY_CACHE_EXTENSION = "flask_ligand_query_cache"
+QUERY_STATS_HEADER = "X-DB-Queries"
+SLOW_QUERY_LOG_EXTENSION = "flask_ligand_slow_query_log"
+AUTO_UPGRADE_LOCK_NAME = "flask_ligand_auto_upgrade"
+AUTO_UPGRADE_LOCK_POLL_INTERVAL = 0.5
+ASYNC_DB_EXTENSION = "flask_ligand_async_db"
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql", "mariadb": "aiomysql"}
+_UPGRADE_LOCK_STATEMENTS = {
+    "postgresql": ("SELECT pg_try_advisory_lock(:key)", "SELECT pg_advisory_unlock(:key)"),
+    "mysql": ("SELECT GET_LOCK(:name, 0)", "SELECT RELEASE_LOCK(:name)"),
+    "mariadb": ("SELECT GET_LOCK(:name, 0)", "SELECT RELEASE_LOCK(:name)"),
+}
+LOGGER = logging.getLogger(__name__)
+_CACHEABLE_MODELS: dict[type, Optional[float]] = {}
+_AUTO_COERCED_COLUMNS: dict[type, Optional[frozenset[str]]] = {}
+_FORCED_AUTO_COERCION = threading.Event()
+_CHANGED_CACHEABLE_ROWS_KEY = "_flask_ligand_changed_cacheable_rows"
+DB_LIMIT_STATS_EXTENSION = "flask_ligand_db_limit_stats"
+_DB_LIMIT_STATS_LOCK = threading.Lock()
+_STATEMENT_TIMEOUT_KEY = "_flask_ligand_statement_timeout"
+_PROGRESS_HANDLER_KEY = "_flask_ligand_progress_handler"
+STATEMENT_TIMEOUT_EXTENSION = "flask_ligand_statement_timeout"
+# Error messages of statements cancelled by SQLite, PostgreSQL, MySQL and MariaDB respectively.
+_STATEMENT_TIMEOUT_MESSAGES = (
+    "interrupted",
+    "canceling statement due to statement timeout",
+    "maximum statement execution time exceeded",
+    "max_statement_time exceeded",
+)
+
+
+# ======================================================================================================================
+# Classes: Public
+# ======================================================================================================================
+@dataclass
+class PoolMetrics:
+    """
+    A snapshot of the counters for a database connection pool.
+
+    Args:
+        size: The number of connections kept persistently by the pool.
+        checked_out: The number of connections currently in use.
+        overflow: The number of connections opened beyond ``size`` that are currently in use.
+        checkouts: The number of connections handed out by the pool.
+        wait_time_total: The total time (in seconds) spent waiting on the pool for a connection.
+        wait_time_max: The longest time (in seconds) spent waiting on the pool for a connection.
+        connection_age_max: The age (in seconds) of the oldest open connection.
+    """
+
+    size: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    wait_time_total: float
+    wait_time_max: float
+    connection_age_max: float
+
+    @property
+    def wait_time_mean(self) -> float:
+        """The average time (in seconds) spent waiting on the pool for a connection."""
+
+        return self.wait_time_total / self.checkouts if self.checkouts else 0.0
+
+
+@dataclass
+class QueryCacheStats:
+    """
+    A snapshot of the query cache counters for a model.
+
+    Args:
+        hits: The number of lookups that were served from the cache.
+        misses: The number of lookups that went to the database.
+        invalidations: The number of committed transactions that changed rows of the model.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """The ratio of lookups served from the cache."""
+
+        lookups = self.hits + self.misses
+
+        return self.hits / lookups if lookups else 0.0
+
+
+class QueryCache:
+    """
+    Caches the rows of models declared :func:`cacheable` across requests. Cached rows are attached to the session of
+    the query without a round trip to the database.
+
+    Rows looked up by primary key are invalidated when a committed transaction changes them, while cached query results
+    are invalidated whenever a committed transaction changes any row of the model. Bulk statements (e.g.
+    :func:`bulk_update`) invalidate every cached row of the model.
+
+    Args:
+        backend: Stores the cached rows. Any object providing the ``get``, ``set`` and ``delete`` methods of
+            :class:`TTLCache <flask_ligand.extensions.cache.TTLCache>` can be used, e.g. a wrapper around a cache shared
+            by every process. Keys are strings and values are lists or dicts of column values.
+        ttl: The default time-to-live (in seconds) of cached rows.
+    """
+
+    def __init__(self, backend: Any, ttl: Optional[float] = None):
+        self.backend = backend
+        self.ttl = ttl
+
+        self._stats: dict[str, QueryCacheStats] = {}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def stats(self) -> dict[str, QueryCacheStats]:
+        """A snapshot of the counters per model name."""
+
+        with self._stats_lock:
+            return {name: QueryCacheStats(**vars(stats)) for name, stats in self._stats.items()}
+
+    def _count(self, model: type, counter: str) -> None:
+        """Increment a counter of a model.
+
+        Args:
+            model: The model class.
+            counter: The name of the counter.
+        """
+
+        with self._stats_lock:
+            stats = self._stats.setdefault(model.__name__, QueryCacheStats())
+            setattr(stats, counter, getattr(stats, counter) + 1)
+
+    def _token(self, model: type, kind: str, renew: bool = False) -> str:
+        """Retrieve the token embedded in cache keys which, when renewed, makes previously cached entries unreachable.
+
+        Args:
+            model: The model class.
+            kind: Either ``epoch`` (renewed by bulk statements) or ``generation`` (renewed by any change).
+            renew: Replace the token.
+        """
+
+        key = f"{model.__module__}.{model.__qualname__}:{kind}"
+        token = None if renew else self.backend.get(key)
+
+        if token is None:
+            token = uuid.uuid4().hex
+            self.backend.set(key, token)
+
+        return token  # type: ignore[no-any-return]
+
+    def _identity_key(self, model: type, identity: tuple[Any, ...]) -> str:
+        """Build the cache key of a row looked up by primary key.
+
+        Args:
+            model: The model class.
+            identity: The primary key values of the row.
+        """
+
+        return f"{model.__module__}.{model.__qualname__}:{self._token(model, 'epoch')}:identity:{identity!r}"
+
+    def _query_key(self, model: type, query: Any) -> str:
+        """Build the cache key of a query from its compiled statement and parameters.
+
+        Args:
+            model: The model class.
+            query: The query.
+        """
+
+        compiled = query.statement.compile()
+        digest = hashlib.sha256(f"{compiled}|{sorted(compiled.params.items())!r}".encode()).hexdigest()
+
+        return (
+            f"{model.__module__}.{model.__qualname__}:{self._token(model, 'epoch')}:"
+            f"{self._token(model, 'generation')}:query:{digest}"
+        )
+
+    @staticmethod
+    def _dump(instance: Any) -> Optional[dict[str, Any]]:
+        """Capture the loaded column values of an instance, unless it holds changes which are not committed.
+
+        Args:
+            instance: The model instance.
+        """
+
+        state = sa_inspect(instance)
+
+        if state.modified or state.identity is None:
+            return None
+
+        return {attr.key: state.dict[attr.key] for attr in state.mapper.column_attrs if attr.key in state.dict}
+
+    @staticmethod
+    def _load(session: Any, model: type, values: dict[str, Any]) -> Any:
+        """Attach an instance built from cached column values to a session without querying the database.
+
+        Args:
+            session: The session to attach the instance to.
+            model: The model class.
+            values: The cached column values.
+        """
+
+        instance: Any = sa_inspect(model).class_manager.new_instance()
+
+        for key, value in values.items():
+            set_committed_value(instance, key, value)
+
+        make_transient_to_detached(instance)
+
+        return session.merge(instance, load=False)
+
+    @staticmethod
+    def _bypass(session: Any, model: type) -> bool:
+        """Determine whether the session holds changes to a model that cached rows would not reflect.
+
+        Args:
+            session: The session of the query.
+            model: The model class.
+        """
+
+        return model in session.info.get(_CHANGED_CACHEABLE_ROWS_KEY, {}) or any(
+            isinstance(instance, model) for instance in (*session.new, *session.dirty, *session.deleted)
+        )
+
+    def get(self, query: Any, model: type, ident: Any, loader: Callable[[Any], Any]) -> Any:
+        """Look up a row by primary key in the session, then the cache and finally the database.
+
+        Args:
+            query: The query of the model.
+            model: The model class.
+            ident: The primary key.
+            loader: Loads the row from the session or the database when it is not cached.
+        """
+
+        session = query.session
+
+        # Coerce the key (e.g. a UUID given as a string) so that it matches the key invalidated by commits.
+        try:
+            identity = query._primary_key_values(sa_inspect(model), ident)
+        except (KeyError, TypeError, ValueError):
+            return loader(ident)
+
+        identity_key = session.identity_key(model, identity)
+
+        if identity_key in session.identity_map or self._bypass(session, model):
+            return loader(ident)
+
+        key = self._identity_key(model, identity_key[1])
+        values = self.backend.get(key)
+
+        if values is not None:
+            self._count(model, "hits")
+
+            return self._load(session, model, values)
+
+        self._count(model, "misses")
+        instance = loader(ident)
+        values = None if instance is None else self._dump(instance)
+
+        if values is not None:
+            self.backend.set(key, values, ttl=_CACHEABLE_MODELS.get(model) or self.ttl)
+
+        return instance
+
+    def all(self, query: Any, model: type, loader: Callable[[], list[Any]]) -> list[Any]:
+        """Retrieve the results of a query from the cache or else the database.
+
+        Args:
+            query: The query of the model.
+            model: The model class.
+            loader: Executes the query.
+        """
+
+        session = query.session
+
+        if self._bypass(session, model):
+            return loader()
+
+        key = self._query_key(model, query)
+        rows = self.backend.get(key)
+
+        if rows is not None:
+            self._count(model, "hits")
+
+            return [self._load(session, model, values) for values in rows]
+
+        self._count(model, "misses")
+        instances = loader()
+        rows = [self._dump(instance) for instance in instances]
+
+        if all(values is not None for values in rows):
+            self.backend.set(key, rows, ttl=_CACHEABLE_MODELS.get(model) or self.ttl)
+
+        return instances
+
+    def invalidate(self, model: type, identities: Optional[Iterable[tuple[Any, ...]]] = None) -> None:
+        """Invalidate cached rows of a model.
+
+        Args:
+            model: The model class.
+            identities: The primary key values of the changed rows. (Every row of the model if not specified)
+        """
+
+        self._count(model, "invalidations")
+
+        if identities is None:
+            self._token(model, "epoch", renew=True)
+            return
+
+        for identity in identities:
+            self.backend.delete(self._identity_key(model, identity))
+
+        self._token(model, "generation", renew=True)
+
+
+@dataclass
+class RequestQueryStats:
+    """
+    The SQL statements executed while handling the current request.
+
+    Args:
+        count: The number of executed statements.
+        duration: The total time (in seconds) spent executing statements.
+        statements: The number of executions of every distinct statement. (Parameters are not part of the statement)
+    """
+
+    count: int = 0
+    duration: float = 0.0
+    statements: Counter[str] = field(default_factory=Counter)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Find statements executed often enough to suggest N+1 queries, e.g. relationships loaded one by one.
+
+        Args:
+            threshold: The number of executions of the same statement considered suspicious.
+
+        Returns:
+            The suspicious statements and their number of executions, most executed first.
+        """
+
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+@dataclass
+class DBLimits:
+    """
+    Limits of the database work of a request. (See :meth:`Blueprint.db_limits
+    <flask_ligand.extensions.api.Blueprint.db_limits>`)
+
+    Args:
+        statement_timeout: The maximum time (in seconds) a single statement may run before the request is aborted with
+            503.
+        max_rows: The maximum number of rows a :class:`Query <flask_ligand.extensions.api.Query>` may load with
+            ``all`` (which paginated routes use too) before the request is aborted with 413. Rows loaded otherwise,
+            e.g. by iterating over a query or with ``DB.session.execute``, are not counted.
+    """
+
+    statement_timeout: Optional[float] = None
+    max_rows: Optional[int] = None
+
+
+@dataclass
+class DBLimitStats:
+    """
+    The number of requests aborted for exceeding their :class:`DBLimits`.
+
+    Args:
+        statement_timeouts: The number of requests aborted because a statement ran longer than its timeout.
+        row_limits: The number of requests aborted because a query matched more rows than allowed.
+    """
+
+    statement_timeouts: int = 0
+    row_limits: int = 0
+
+    def increment(self, counter: str) -> None:
+        """Increment a counter.
+
+        Args:
+            counter: The name of the counter.
+        """
+
+        with _DB_LIMIT_STATS_LOCK:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+class AsyncSession(AsyncSessionOrig):
+    """
+    Enable customized REST JSON error messages for 'get_or_404' and 'first_or_404' methods for
+    :class:`AsyncSession <sqlalchemy.ext.asyncio.AsyncSession>`.
+
+    The session works with the same models as :data:`DB`. A session must not be shared between concurrently running
+    tasks, so open one session per task to run independent queries concurrently. (See :func:`async_session`)
+    """
+
+    async def get_or_404(self, entity: Any, ident: object, description: Optional[str] = None) -> Any:
+        """Like `get` but aborts with 404 if not found instead of returning ``None``.
+
+        Args:
+            entity: The model class to look up.
+            ident: A scalar, tuple, or dictionary representing the primary key.  For a composite (e.g. multiple column)
+                primary key, a tuple or dictionary should be passed.
+            description: Override default 404 status code message with a custom message instead.
+        """
+
+        rv = await self.get(entity, ident)
+        if rv is None:
+            abort(HTTPStatus(404), message=description)
+        return rv
+
+    async def first_or_404(self, statement: Select[Any], description: Optional[str] = None) -> Any:
+        """Like 'first' but aborts with 404 if the select statement finds nothing instead of returning ``None``.
+
+        Args:
+            statement: The select statement to execute.
+            description: Override default 404 status code message with a custom message instead.
+        """
+
+        rv = (await self.scalars(statement.limit(1))).first()
+        if rv is None:
+            abort(HTTPStatus(404), message=description)
+        return rv
+
+
+# ======================================================================================================================
+# Functions: Private
+# ======================================================================================================================
+def _pool_options(config: dict[str, Any]) -> dict[str, Any]:
+    """Build the connection pool engine options, sized from the worker and thread count of the app.
+
+    Every worker holds its own pool, so the pool is sized to the threads of a worker while the ``DB_MAX_CONNECTIONS``
+    setting (if set) caps the connections of all workers combined.
+
+    Args:
+        config: The settings of the app.
+    """
+
+    workers = max(1, config["WORKER_COUNT"])
+    pool_size = config["DB_POOL_SIZE"] or max(1, config["WORKER_THREADS"])
+    max_overflow = config["DB_MAX_OVERFLOW"]
+
+    if config["DB_MAX_CONNECTIONS"]:
+        per_worker = max(1, config["DB_MAX_CONNECTIONS"] // workers)
+        pool_size = min(pool_size, per_worker)
+        max_overflow = per_worker - pool_size if max_overflow is None else min(max_overflow, per_worker - pool_size)
+    elif max_overflow is None:
+        max_overflow = pool_size
+
+    return {
+        "poolclass": _InstrumentedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+    }
+
+
+def _async_engine_options(config: dict[str, Any]) -> dict[str, Any]:
+    """Build the engine options of the async engine.
+
+    Async engines need an asyncio compatible pool, so only the sizing of the regular connection pool is reused.
+
+    Args:
+        config: The settings of the app.
+    """
+
+    if not config["DB_ASYNC_POOLED"]:
+        return {"poolclass": NullPool}
+
+    return {key: value for key, value in _pool_options(config).items() if key != "poolclass"}
+
+
+def _async_database_url(config: dict[str, Any], url: URL) -> Union[str, URL]:
+    """Determine the URL of the async engine, deriving it from the URL of the regular engine if not set.
+
+    Args:
+        config: The settings of the app.
+        url: The URL of the regular engine. (Relative SQLite paths are already resolved against the instance folder)
+
+    Raises:
+        RuntimeError: No async driver is known for the database dialect, or the database is an in-memory SQLite
+            database which cannot be shared with the async engine.
+    """
+
+    if config["SQLALCHEMY_ASYNC_DATABASE_URI"]:
+        return config["SQLALCHEMY_ASYNC_DATABASE_URI"]  # type: ignore[no-any-return]
+
+    backend = url.get_backend_name()
+
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(
+            f"No async driver is known for the '{backend}' database dialect! Set 'SQLALCHEMY_ASYNC_DATABASE_URI' instead."
+        )
+
+    if _is_memory_database(url):
+        raise RuntimeError(
+            "An in-memory SQLite database cannot be shared with the async engine! Use a database file instead."
+        )
+
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def _is_read_only(clause: Any) -> bool:
+    """Determine whether a statement can be served by a replica.
+
+    Args:
+        clause: The statement being executed.
+    """
+
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+def _is_write_request() -> bool:
+    """Determine whether the current request uses an HTTP method meant for changing data."""
+
+    return has_request_context() and request.method not in _READ_ONLY_METHODS
+
+
+def _credentials_key() -> Optional[str]:
+    """Identify the client of the current request by its credentials, if any."""
+
+    authorization = request.headers.get("Authorization")
+
+    return hashlib.sha256(authorization.encode()).hexdigest() if authorization else None
+
+
+def _set_read_your_writes_cookie(response: Response) -> Response:
+    """Hand the end of the read-your-writes window to a client which wrote during the request.
+
+    Args:
+        response: The response of the request.
+    """
+
+    until = g.get("_flask_ligand_primary_until")
+
+    if until is not None:
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE,
+            f"{until:.3f}",
+            max_age=math.ceil(current_app.config["DB_READ_YOUR_WRITES_WINDOW"]),
+            httponly=True,
+            samesite="Lax",
+        )
+
+    return response
+
+
+def _batches(items: Iterable[Any], batch_size: int) -> Iterator[list[Any]]:
+    """Split items into lists of at most ``batch_size`` items.
+
+    Args:
+        items: The items to split.
+        batch_size: The maximum number of items per list.
+    """
+
+    batch: list[Any] = []
+
+    for item in items:
+        batch.append(item)
+
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def _collect_cacheable_row_changes(session: Session, _flush_context: Any) -> None:
+    """Remember the rows of cacheable models changed by a flush so that they can be invalidated upon commit.
+
+    Args:
+        session: The session being flushed.
+        _flush_context: The internal state of the flush. (Unused argument)
+    """
+
+    changed = session.info.setdefault(_CHANGED_CACHEABLE_ROWS_KEY, {})
+
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        model = type(instance)
+
+        if model in _CACHEABLE_MODELS:
+            identities = changed.setdefault(model, set())
+            identity = sa_inspect(instance).identity
+
+            if identities is not None and identity is not None:
+                identities.add(identity)
+
+
+def _collect_cacheable_bulk_changes(orm_execute_state: ORMExecuteState) -> None:
+    """Remember the cacheable models changed by bulk statements, which change rows unknown to the session.
+
+    Args:
+        orm_execute_state: The statement being executed.
+    """
+
+    mapper = orm_execute_state.bind_mapper
+
+    if (
+        mapper is not None
+        and mapper.class_ in _CACHEABLE_MODELS
+        and (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete)
+    ):
+        orm_execute_state.session.info.setdefault(_CHANGED_CACHEABLE_ROWS_KEY, {})[mapper.class_] = None
+
+
+def _invalidate_changed_cacheable_rows(session: Session) -> None:
+    """Invalidate the cached rows changed by a committed transaction.
+
+    Args:
+        session: The session that was committed.
+    """
+
+    changed = session.info.pop(_CHANGED_CACHEABLE_ROWS_KEY, {})
+    query_cache: Optional[QueryCache] = current_app.extensions.get(QUERY_CACHE_EXTENSION) if has_app_context() else None
+
+    if query_cache is not None:
+        for model, identities in changed.items():
+            query_cache.invalidate(model, identities)
+
+
+def _discard_cacheable_row_changes(session: Session, _previous_transaction: Any) -> None:
+    """Forget the rows changed by a transaction that was rolled back.
+
+    Args:
+        session: The session that was rolled back.
+        _previous_transaction: The transaction that was rolled back. (Unused argument)
+    """
+
+    session.info.pop(_CHANGED_CACHEABLE_ROWS_KEY, None)
+
+
+def _start_query_timer(
+    _conn: Connection, _cursor: Any, _statement: str, _parameters: Any, context: ExecutionContext, _executemany: bool
+) -> None:
+    """Record when a statement started.
+
+    Args:
+        _conn: The connection executing the statement. (Unused argument)
+        _cursor: The DBAPI cursor. (Unused argument)
+        _statement: The SQL statement. (Unused argument)
+        _parameters: The parameters of the statement. (Unused argument)
+        context: The execution context of the statement.
+        _executemany: Whether the statement is executed for many parameter sets. (Unused argument)
+    """
+
+    context._flask_ligand_query_start = time.perf_counter()  # type: ignore[attr-defined]
+
+
+def _record_query(
+    _conn: Connection, _cursor: Any, statement: str, _parameters: Any, context: ExecutionContext, _executemany: bool
+) -> None:
+    """Add a statement executed during a request to the query statistics of the request.
+
+    Args:
+        _conn: The connection executing the statement. (Unused argument)
+        _cursor: The DBAPI cursor. (Unused argument)
+        statement: The SQL statement.
+        _parameters: The parameters of the statement. (Unused argument)
+        context: The execution context of the statement.
+        _executemany: Whether the statement is executed for many parameter sets. (Unused argument)
+    """
+
+    start = getattr(context, "_flask_ligand_query_start", None)
+
+    if start is None or not has_request_context():
+        return
+
+    stats = get_request_query_stats()
+
+    if stats is None:
+        stats = g._flask_ligand_query_stats = RequestQueryStats()
+
+    stats.count += 1
+    stats.duration += time.perf_counter() - start
+    stats.statements[statement] += 1
+
+
+def _apply_statement_timeout(
+    conn: Connection, cursor: Any, statement: str, parameters: Any, _context: ExecutionContext, _executemany: bool
+) -> tuple[str, Any]:
+    """Apply the statement timeout of the current request to a statement in the way the dialect supports it.
+
+    PostgreSQL uses a transaction scoped ``statement_timeout``, MySQL and MariaDB a per statement optimizer hint or
+    clause and SQLite a progress handler interrupting the statement once it runs too long.
+
+    Args:
+        conn: The connection executing the statement.
+        cursor: The DBAPI cursor.
+        statement: The SQL statement.
+        parameters: The parameters of the statement.
+        _context: The execution context of the statement. (Unused argument)
+        _executemany: Whether the statement is executed for many parameter sets. (Unused argument)
+
+    Returns:
+        The statement and parameters to execute.
+    """
+
+    limits = get_request_db_limits()
+    timeout = limits.statement_timeout if limits is not None else None
+    dialect = conn.dialect.name
+
+    if dialect == "sqlite":
+        set_progress_handler = getattr(conn.connection.dbapi_connection, "set_progress_handler", None)
+
+        if set_progress_handler is None:
+            return statement, parameters
+
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+            set_progress_handler(lambda: time.monotonic() > deadline, 1000)
+            conn.info[_PROGRESS_HANDLER_KEY] = True
+        elif conn.info.pop(_PROGRESS_HANDLER_KEY, False):
+            set_progress_handler(None, 0)
+    elif timeout is None:
+        pass
+    elif dialect == "postgresql":
+        # 'SET LOCAL' lasts until the end of the transaction, which clears the marker.
+        if conn.info.get(_STATEMENT_TIMEOUT_KEY) != timeout:
+            cursor.execute(f"SET LOCAL statement_timeout = {int(timeout * 1000)}")
+            conn.info[_STATEMENT_TIMEOUT_KEY] = timeout
+    elif dialect == "mariadb":
+        statement = f"SET STATEMENT max_statement_time={timeout} FOR {statement}"
+    elif dialect == "mysql" and statement.lstrip()[:6].upper() == "SELECT":
+        statement = f"SELECT /*+ MAX_EXECUTION_TIME({int(timeout * 1000)}) */{statement.lstrip()[6:]}"
+
+    return statement, parameters
+
+
+def _reset_statement_timeout(conn: Connection, *_args: Any) -> None:
+    """Forget the transaction scoped statement timeout of a connection once its transaction (or savepoint) ends.
+
+    Args:
+        conn: The connection.
+        _args: The arguments of the transaction event. (Unused argument)
+    """
+
+    conn.info.pop(_STATEMENT_TIMEOUT_KEY, None)
+
+
+def _parameter_shape(parameters: Any, executemany: bool) -> str:
+    """Describe the parameters of a statement by their types so that no values end up in the logs.
+
+    Args:
+        parameters: The parameters of the statement.
+        executemany: Whether the statement was executed for many parameter sets.
+    """
+
+    if executemany:
+        return f"{len(parameters)} x {_parameter_shape(parameters[0], False) if parameters else '()'}"
+
+    if isinstance(parameters, dict):
+        return repr({key: type(value).__name__ for key, value in parameters.items()})
+
+    return repr(tuple(type(value).__name__ for value in parameters or ()))
+
+
+def _report_query_stats(response: Response) -> Response:
+    """Report the statements executed by a request in a response header, warn about suspected N+1 queries and enforce
+    the query budget.
+
+    Args:
+        response: The response of the request.
+
+    Raises:
+        RuntimeError: The request executed more statements than allowed by the ``DB_QUERY_BUDGET`` setting while the
+            app is in testing or debug mode. (Logged as a warning otherwise)
+    """
+
+    stats = get_request_query_stats() or RequestQueryStats()
+    repeated = stats.repeated(current_app.config["DB_N_PLUS_ONE_THRESHOLD"])
+
+    for statement, count in repeated:
+        LOGGER.warning(
+            "Possible N+1 queries in the '%s' endpoint, executed %d times: %s", request.endpoint, count, statement
+        )
+
+    response.headers[QUERY_STATS_HEADER] = json.dumps(
+        {"count": stats.count, "time_ms": round(stats.duration * 1000, 3), "repeated": len(repeated)}
+    )
+
+    budget = current_app.config["DB_QUERY_BUDGET"]
+
+    if budget is not None and stats.count > budget:
+        if current_app.testing or current_app.debug:
+            raise RuntimeError(
+                f"The '{request.endpoint}' endpoint executed {stats.count} SQL statements which exceeds the query "
+                f"budget of {budget}!"
+            )
+
+        LOGGER.warning(
+            "The '%s' endpoint executed %d SQL statements which exceeds the query budget of %d",
+            request.endpoint,
+            stats.count,
+            budget,
+        )
+
+    return response
+
+
+def _is_memory_database(uri: Union[str, URL, None]) -> bool:
+    """Determine whether a database URI refers to an in-memory SQLite database which cannot use a connection pool.
+
+    Args:
+        uri: The database URI.
+    """
+
+    if uri is None:
+        return False
+
+    url = make_url(uri)
+
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _at_head(directory: str) -> bool:
+    """Determine whether the database is already at the head revision without loading the migration environment.
+
+    Args:
+        directory: The migration directory.
+    """
+
+    script = ScriptDirectory.from_config(MIGRATE.get_config(directory))
+
+    with DB.engine.connect() as conn:
+        return set(MigrationContext.configure(conn).get_current_heads()) == set(script.get_heads())
+
+
+def _wait_for_lock(try_lock: Callable[[], bool], timeout: float) -> None:
+    """Poll a lock until it is acquired.
+
+    Args:
+        try_lock: Tries to acquire the lock without blocking, returning whether it succeeded.
+        timeout: The maximum time (in seconds) to wait for the lock.
+
+    Raises:
+        RuntimeError: Timed out waiting for the lock.
+    """
+
+    deadline = time.monotonic() + timeout
+
+    while not try_lock():
+        if time.monotonic() >= deadline:
+            raise RuntimeError(
+                f"Timed out after {timeout} seconds waiting for another process to upgrade the database!"
+            )
+
+        time.sleep(AUTO_UPGRADE_LOCK_POLL_INTERVAL)
+
+
+def _try_sqlite_lock(lock_db: sqlite3.Connection) -> bool:
+    """Try to start an exclusive transaction on a SQLite lock file without blocking.
+
+    Args:
+        lock_db: The connection to the lock file.
+    """
+
+    try:
+        lock_db.execute("BEGIN EXCLUSIVE")
+    except sqlite3.OperationalError:
+        return False
+
+    return True
+
+
+@contextmanager
+def _upgrade_lock(timeout: float) -> Iterator[None]:
+    """Hold a database wide lock so that only one process upgrades the database at a time.
+
+    PostgreSQL and MySQL use a named lock held by a dedicated connection, SQLite uses an exclusive transaction on a lock
+    file next to the database. Either way the lock is released if the holding process dies.
+
+    Args:
+        timeout: The maximum time (in seconds) to wait for another process to release the lock.
+
+    Raises:
+        RuntimeError: Timed out waiting for the lock.
+    """
+
+    engine = DB.engine
+    dialect = engine.dialect.name
+
+    if dialect in _UPGRADE_LOCK_STATEMENTS:
+        acquire, release = _UPGRADE_LOCK_STATEMENTS[dialect]
+        params = {"name": AUTO_UPGRADE_LOCK_NAME, "key": zlib.crc32(AUTO_UPGRADE_LOCK_NAME.encode())}
+
+        with engine.connect() as conn:
+            _wait_for_lock(lambda: bool(conn.execute(text(acquire), params).scalar()), timeout)
+
+            try:
+                yield
+            finally:
+                conn.execute(text(release), params)
+    elif dialect == "sqlite" and not _is_memory_database(str(engine.url)):
+        lock_file = f"{engine.url.database}.{AUTO_UPGRADE_LOCK_NAME}.lock"
+
+        with closing(sqlite3.connect(lock_file, timeout=0, isolation_level=None)) as lock_db:
+            _wait_for_lock(lambda: _try_sqlite_lock(lock_db), timeout)
+
+            try:
+                yield
+            finally:
+                lock_db.execute("ROLLBACK")
+    else:
+        LOGGER.warning("Database locks are not supported for the '%s' dialect, upgrading without one!", dialect)
+        yield
+
+
+def _auto_upgrade(directory: str, lock_timeout: float) -> None:
+    """Upgrade the database to the head revision unless it is already there.
+
+    Args:
+        directory: The migration directory.
+        lock_timeout: The maximum time (in seconds) to wait for another process upgrading the database.
+    """
+
+    if _at_head(directory):
+        LOGGER.debug("The database is already at the head revision, skipping the upgrade.")
+        return
+
+    with _upgrade_lock(lock_timeout):
+        # Another process may have upgraded the database while this one was waiting for the lock.
+        if not _at_head(directory):
+            upgrade(directory=directory)
+
+
+def _listen_for_coercion(mapper: Any, model: type) -> None:
+    """Coerce the values assigned to the coercion capable columns of a model declared :func:`auto_coerce`.
+
+    Args:
+        mapper: The mapper of the model.
+        model: The model class.
+    """
+
+    columns = _AUTO_COERCED_COLUMNS[model]
+
+    for prop in mapper.column_attrs:
+        listener = getattr(prop.columns[0].type, "coercion_listener", None)
+
+        if listener is not None and (columns is None or prop.key in columns):
+            event.listen(getattr(model, prop.key), "set", listener, retval=True)
 
 
 # ======================================================================================================================
-# Globals
+# Decorators: Public
 # ======================================================================================================================
-DB = SQLAlchemy(model_class=_Base, query_class=Query)  # pylint: disable=invalid-name
-MIGRATE = Migrate()
+def cacheable(ttl: Optional[float] = None) -> Callable[[type], type]:
+    """Class decorator opting a model into the query cache.
+
+    Rows of the model looked up with :meth:`Query.get <flask_ligand.extensions.api.Query.get>` or
+    :meth:`Query.get_or_404 <flask_ligand.extensions.api.Query.get_or_404>` and the results of queries declared with
+    :meth:`Query.cache <flask_ligand.extensions.api.Query.cache>` are then served from the cache of the app.
+
+    Committed changes invalidate the cache of the worker process that committed them only. Unless the
+    ``DB_QUERY_CACHE_BACKEND`` setting provides a store shared by every process, the other workers keep serving the
+    previous rows until their ``ttl`` expires, so only declare models cacheable when such staleness is acceptable.
+    Changes made outside the app (e.g. by another service) are never seen before the ``ttl`` expires.
+
+    Args:
+        ttl: The time-to-live (in seconds) of the cached rows of this model. (The ``DB_QUERY_CACHE_TTL`` setting if
+            not specified)
+    """
+
+    def decorator(model: type) -> type:
+        if not _CACHEABLE_MODELS:
+            event.listen(Session, "after_flush", _collect_cacheable_row_changes)
+            event.listen(Session, "do_orm_execute", _collect_cacheable_bulk_changes)
+            event.listen(Session, "after_commit", _invalidate_changed_cacheable_rows)
+            event.listen(Session, "after_soft_rollback", _discard_cacheable_row_changes)
+
+        _CACHEABLE_MODELS[model] = ttl
+
+        return model
+
+    return decorator
+
+
+def auto_coerce(*columns: str) -> Callable[[type], type]:
+    """Class decorator coercing the values assigned to the coercion capable columns of a model, e.g. strings assigned
+    to a ``UUIDType`` column become :class:`UUID <uuid.UUID>` objects.
+
+    Unlike the ``DB_FORCE_AUTO_COERCION`` setting, only attribute assignments of the decorated model pay for the
+    coercion. (See `SQLAlchemy-Utils`_ for more information)
+
+    Args:
+        columns: The names of the columns to coerce. (Every coercion capable column if not specified)
+
+    .. _SQLAlchemy-Utils: https://sqlalchemy-utils.readthedocs.io/en/latest/listeners.html#automatic-data-coercion
+    """
+
+    def decorator(model: type) -> type:
+        _AUTO_COERCED_COLUMNS[model] = frozenset(columns) or None
+        event.listen(model, "mapper_configured", _listen_for_coercion)
+
+        return model
+
+    return decorator
 
 
 # ======================================================================================================================
@@ -47,12 +1444,358 @@ def init_app(app: Flask) -> None:
         app: The root Flask app to configure with the given extension.
     """
 
+    if not _is_memory_database(app.config["SQLALCHEMY_DATABASE_URI"]):
+        # Explicitly configured engine options take precedence over the pool settings.
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+            **_pool_options(app.config),
+            **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+        }
+
+    replica_uris = app.config["SQLALCHEMY_REPLICA_URIS"] or []
+    replica_bind_keys = [f"{REPLICA_BIND_KEY_PREFIX}{i}" for i in range(len(replica_uris))]
+
+    if replica_uris:
+        app.config["SQLALCHEMY_BINDS"] = {
+            **app.config.get("SQLALCHEMY_BINDS", {}),
+            **dict(zip(replica_bind_keys, replica_uris)),
+        }
+
     DB.init_app(app)
     MIGRATE.init_app(app, DB)
 
-    if app.config["DB_AUTO_UPGRADE"]:  # pragma: no cover (Covered by integration tests)
+    app.extensions[QUERY_CACHE_EXTENSION] = QueryCache(
+        app.config["DB_QUERY_CACHE_BACKEND"]
+        or TTLCache(app.config["DB_QUERY_CACHE_SIZE"], ttl=app.config["DB_QUERY_CACHE_TTL"]),
+        ttl=app.config["DB_QUERY_CACHE_TTL"],
+    )
+
+    app.extensions[DB_LIMIT_STATS_EXTENSION] = DBLimitStats()
+
+    slow_query_log = None
+
+    if app.config["DB_SLOW_QUERY_THRESHOLD"] is not None:
+        slow_query_log = _SlowQueryLog(
+            app.config["DB_SLOW_QUERY_THRESHOLD"],
+            app.config["DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE"],
+            app.config["DB_SLOW_QUERY_EXPLAIN_INTERVAL"],
+            app.config["DB_SLOW_QUERY_EXPLAIN_RATE_LIMIT"],
+        )
+        app.extensions[SLOW_QUERY_LOG_EXTENSION] = slow_query_log
+
+    if app.config["DB_QUERY_STATS"] or slow_query_log is not None:
+        with app.app_context():
+            for engine in DB.engines.values():
+                event.listen(engine, "before_cursor_execute", _start_query_timer)
+
+                if app.config["DB_QUERY_STATS"]:
+                    event.listen(engine, "after_cursor_execute", _record_query)
+                if slow_query_log is not None:
+                    event.listen(engine, "after_cursor_execute", slow_query_log.after_cursor_execute)
+
+    if app.config["DB_QUERY_STATS"]:
+        app.after_request(_report_query_stats)
+
+    if replica_uris:
+        # The metadata registry is shared by every app, so keep the replica binds out of it. Otherwise 'create_all'
+        # and 'drop_all' would look for the replica bind keys in apps without replicas, and replicas are never
+        # migrated directly.
+        for bind_key in replica_bind_keys:
+            DB.metadatas.pop(bind_key, None)
+
+        app.extensions[REPLICA_SET_EXTENSION] = _ReplicaSet(
+            replica_bind_keys,
+            app.config["DB_REPLICA_STRATEGY"],
+            app.config["DB_READ_YOUR_WRITES_WINDOW"],
+            app.config["DB_READ_YOUR_WRITES_BACKEND"],
+        )
+        app.after_request(_set_read_your_writes_cookie)
+
+    if app.config["DB_ASYNC"]:
+        with app.app_context():
+            async_url = _async_database_url(app.config, DB.engine.url)
+
+        async_engine = create_async_engine(async_url, **_async_engine_options(app.config))
+        app.extensions[ASYNC_DB_EXTENSION] = async_sessionmaker(
+            async_engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+    if app.config["DB_AUTO_UPGRADE"]:
         with app.app_context():
-            upgrade(directory=app.config["DB_MIGRATION_DIR"])
+            _auto_upgrade(app.config["DB_MIGRATION_DIR"], app.config["DB_AUTO_UPGRADE_LOCK_TIMEOUT"])
 
+    # The coercion listener is global, so it is only registered once per process no matter how many apps are created.
     # See https://sqlalchemy-utils.readthedocs.io/en/latest/listeners.html?highlight=force#automatic-data-coercion
-    force_auto_coercion()
+    if app.config["DB_FORCE_AUTO_COERCION"] and not _FORCED_AUTO_COERCION.is_set():
+        force_auto_coercion()
+        _FORCED_AUTO_COERCION.set()
+
+
+def get_async_engine() -> AsyncEngine:
+    """Retrieve the async engine of the current app.
+
+    Raises:
+        RuntimeError: Async database support is not enabled.
+    """
+
+    if ASYNC_DB_EXTENSION not in current_app.extensions:
+        raise RuntimeError("Async database support is not enabled! Set 'DB_ASYNC' to use it.")
+
+    return current_app.extensions[ASYNC_DB_EXTENSION].kw["bind"]  # type: ignore[no-any-return]
+
+
+def async_session() -> AsyncSession:
+    """Open a new async session for the current app.
+
+    Use the session as an async context manager so that it is closed once done. Open one session per task to run
+    independent queries concurrently::
+
+        async def count(model):
+            async with async_session() as session:
+                return await session.scalar(select(func.count()).select_from(model))
+
+        users, groups = await asyncio.gather(count(User), count(Group))
+
+    Raises:
+        RuntimeError: Async database support is not enabled.
+    """
+
+    get_async_engine()
+
+    return current_app.extensions[ASYNC_DB_EXTENSION]()  # type: ignore[no-any-return]
+
+
+def get_pool_metrics(bind_key: Optional[str] = None) -> Optional[PoolMetrics]:
+    """Retrieve the live connection pool counters of the current app.
+
+    Args:
+        bind_key: The bind key of the engine. (The default engine if not specified)
+
+    Returns:
+        The pool counters or ``None`` if the engine does not use a pool configured by the ``DB_POOL_*`` settings.
+    """
+
+    pool = DB.engines[bind_key].pool
+
+    return pool.metrics if isinstance(pool, _InstrumentedQueuePool) else None
+
+
+def get_query_cache(model: type) -> Optional[QueryCache]:
+    """Retrieve the query cache of the current app for a model.
+
+    Args:
+        model: The model class.
+
+    Returns:
+        The query cache or ``None`` if the model is not :func:`cacheable` or no query cache is configured.
+    """
+
+    if model not in _CACHEABLE_MODELS or not has_app_context():
+        return None
+
+    return current_app.extensions.get(QUERY_CACHE_EXTENSION)
+
+
+def get_request_query_stats() -> Optional[RequestQueryStats]:
+    """Retrieve the SQL statements executed so far by the current request.
+
+    Returns:
+        The statistics or ``None`` if the ``DB_QUERY_STATS`` setting is disabled or no statement has been executed.
+    """
+
+    return g.get("_flask_ligand_query_stats")  # type: ignore[no-any-return]
+
+
+def get_request_db_limits() -> Optional[DBLimits]:
+    """Retrieve the limits of the database work of the current request.
+
+    Returns:
+        The limits or ``None`` if the route declares none or there is no request.
+    """
+
+    if not has_request_context():
+        return None
+
+    return g.get("_flask_ligand_db_limits")  # type: ignore[no-any-return]
+
+
+def enable_statement_timeouts(app: Flask) -> None:
+    """Apply the statement timeouts declared with :meth:`Blueprint.db_limits
+    <flask_ligand.extensions.api.Blueprint.db_limits>` to the statements of an app.
+
+    Registering a :class:`Blueprint <flask_ligand.extensions.api.Blueprint>` which declares statement timeouts calls
+    this, so apps without statement timeouts do not inspect every statement. Calling it again has no effect.
+
+    Args:
+        app: The Flask app. (Ignored if the database extension is not initialized)
+    """
+
+    if app.extensions.get(STATEMENT_TIMEOUT_EXTENSION) or "sqlalchemy" not in app.extensions:
+        return
+
+    app.extensions[STATEMENT_TIMEOUT_EXTENSION] = True
+
+    with app.app_context():
+        for engine in DB.engines.values():
+            event.listen(engine, "before_cursor_execute", _apply_statement_timeout, retval=True)
+
+            for name in ("begin", "commit", "rollback", "rollback_savepoint"):
+                event.listen(engine, name, _reset_statement_timeout)
+
+
+def is_statement_timeout(error: DBAPIError) -> bool:
+    """Determine whether a database error was raised because a statement exceeded its timeout.
+
+    Args:
+        error: The error raised by SQLAlchemy.
+    """
+
+    message = str(error.orig).lower()
+
+    return any(timeout_message in message for timeout_message in _STATEMENT_TIMEOUT_MESSAGES)
+
+
+def get_db_limit_stats() -> DBLimitStats:
+    """Retrieve the number of requests of the current app aborted for exceeding their database limits."""
+
+    return current_app.extensions[DB_LIMIT_STATS_EXTENSION]  # type: ignore[no-any-return]
+
+
+def get_query_cache_stats() -> dict[str, QueryCacheStats]:
+    """Retrieve the query cache counters of the current app per model name."""
+
+    return current_app.extensions[QUERY_CACHE_EXTENSION].stats  # type: ignore[no-any-return]
+
+
+@contextmanager
+def use_primary() -> Iterator[None]:
+    """Send every statement of the current session to the primary database, even read-only ones.
+
+    Use this for reads that must observe writes made by other clients or processes.
+    """
+
+    session: _RoutingSession = DB.session()  # type: ignore[assignment]
+    session._force_primary += 1
+
+    try:
+        yield
+    finally:
+        session._force_primary -= 1
+
+
+def bulk_insert(model: Any, rows: Sequence[dict[str, Any]], batch_size: int = BULK_BATCH_SIZE) -> int:
+    """Insert rows with batched multi-row ``INSERT`` statements instead of adding one model instance at a time.
+
+    Column defaults (e.g. generated primary keys) are applied just like for model instances. The current session is
+    not committed.
+
+    Args:
+        model: The model class to insert rows for.
+        rows: The column values of every row, e.g. as loaded by ``AutoSchema(many=True)``.
+        batch_size: The maximum number of rows per statement.
+
+    Returns:
+        The number of inserted rows.
+    """
+
+    for batch in _batches(rows, batch_size):
+        DB.session.execute(insert(model), batch)
+
+    return len(rows)
+
+
+def bulk_upsert(
+    model: Any,
+    rows: Sequence[dict[str, Any]],
+    index_elements: Optional[list[str]] = None,
+    batch_size: int = BULK_BATCH_SIZE,
+) -> int:
+    """Insert rows or update the rows they conflict with using the upsert statement of the database dialect.
+    (``ON CONFLICT DO UPDATE`` for PostgreSQL and SQLite or ``ON DUPLICATE KEY UPDATE`` for MySQL and MariaDB)
+
+    Only the columns present in the rows are updated. The current session is not committed.
+
+    Args:
+        model: The model class to upsert rows for.
+        rows: The column values of every row, which must all specify the same columns.
+        index_elements: The columns of the unique constraint to detect conflicts on. (The primary key if not
+            specified; ignored by MySQL which uses every unique constraint)
+        batch_size: The maximum number of rows per statement.
+
+    Returns:
+        The number of upserted rows.
+
+    Raises:
+        RuntimeError: The database dialect does not support upserts.
+    """
+
+    if not rows:
+        return 0
+
+    mapper = sa_inspect(model)
+    dialect = DB.session.get_bind(mapper=mapper).dialect.name
+    index_elements = index_elements or [column.key for column in mapper.primary_key]
+    updated_columns = [column for column in rows[0] if column not in index_elements]
+
+    if dialect in ("postgresql", "sqlite"):
+        statement = (postgresql if dialect == "postgresql" else sqlite).insert(model)
+        statement = statement.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={column: statement.excluded[column] for column in updated_columns},
+        )
+    elif dialect in ("mysql", "mariadb"):
+        statement = mysql.insert(model)
+        statement = statement.on_duplicate_key_update(
+            {column: statement.inserted[column] for column in updated_columns}
+        )
+    else:
+        raise RuntimeError(f"Upserts are not supported for the '{dialect}' database dialect!")
+
+    for batch in _batches(rows, batch_size):
+        DB.session.execute(statement, batch)
+
+    return len(rows)
+
+
+def bulk_update(model: Any, rows: Sequence[dict[str, Any]], batch_size: int = BULK_BATCH_SIZE) -> int:
+    """Update rows by primary key with batched ``UPDATE`` statements without loading them first.
+
+    The current session is not committed.
+
+    Args:
+        model: The model class to update rows for.
+        rows: The primary key and the new column values of every row.
+        batch_size: The maximum number of rows per batch.
+
+    Returns:
+        The number of updated rows.
+    """
+
+    for batch in _batches(rows, batch_size):
+        DB.session.execute(update(model), batch)
+
+    return len(rows)
+
+
+def bulk_delete(model: Any, idents: Sequence[Any], batch_size: int = BULK_BATCH_SIZE) -> int:
+    """Delete rows by primary key with batched ``DELETE ... WHERE ... IN`` statements without loading them first.
+
+    Model instances already loaded in the session are not expired. The current session is not committed.
+
+    Args:
+        model: The model class to delete rows for.
+        idents: The primary keys of the rows. Use tuples for composite primary keys.
+        batch_size: The maximum number of primary keys per statement.
+
+    Returns:
+        The number of deleted rows.
+    """
+
+    primary_key = sa_inspect(model).primary_key
+    key = primary_key[0] if len(primary_key) == 1 else tuple_(*primary_key)
+    deleted = 0
+
+    for batch in _batches(idents, batch_size):
+        result = DB.session.execute(delete(model).where(key.in_(batch)).execution_options(synchronize_session=False))
+        deleted += result.rowcount  # type: ignore[attr-defined]
+
+    return deleted
@@ -5,33 +5,219 @@
 # ======================================================================================================================
 from __future__ import annotations
 
+import abc
+import asyncio
+import hashlib
+import inspect
 import json
-from dataclasses import dataclass
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from functools import wraps
 from http import HTTPStatus
 from typing import TYPE_CHECKING
 
-from flask import current_app
+from flask import current_app, g, has_app_context
 from flask_jwt_extended import JWTManager, get_current_user, verify_jwt_in_request
-from jwt.algorithms import RSAAlgorithm
-from requests import get
+from flask_jwt_extended.config import config as jwt_config
+from jwt import PyJWK
+from jwt.exceptions import InvalidTokenError, PyJWKError
+from requests import get, post
 from requests.exceptions import RequestException
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
 from flask_ligand.extensions.api import abort
+from flask_ligand.extensions.cache import TTLCache
+from flask_ligand.extensions.revocation import (
+    FileRevocationSource,
+    RevocationList,
+    RevocationSource,
+)
 
 # ======================================================================================================================
 # Type Checking
 # ======================================================================================================================
 if TYPE_CHECKING:  # pragma: no cover
-    from typing import Any, Callable
+    from typing import Any, Callable, Iterable, Iterator, Optional, Union
 
     from flask import Flask
 
+    from flask_ligand.extensions.cache import CacheStats
+    from flask_ligand.extensions.revocation import RevocationStats
+
+
+# ======================================================================================================================
+# Classes: Private
+# ======================================================================================================================
+class _RoleRegistry:
+    """
+    Interns the ``ALLOWED_ROLES`` of an app as bits so that role policies compile to integer mask checks.
+
+    Args:
+        allowed_roles: The roles allowed for endpoint protection. Client roles are specified as ``<client>:<role>``.
+    """
+
+    def __init__(self, allowed_roles: Iterable[str]):
+        self.bits: dict[str, int] = {role: 1 << i for i, role in enumerate(dict.fromkeys(allowed_roles))}
+        self._compiled: dict[RolePolicy, Callable[[int], bool]] = {}
+
+    def mask(self, roles: Iterable[str], client_roles: Optional[dict[str, frozenset[str]]] = None) -> int:
+        """Build the role bitset for a user.
+
+        Args:
+            roles: The realm roles assigned to the user.
+            client_roles: The roles assigned to the user indexed by client.
+        """
+
+        bits = self.bits
+        mask = 0
+
+        for role in roles:
+            mask |= bits.get(role, 0)
+
+        for client, roles_for_client in (client_roles or {}).items():
+            for role in roles_for_client:
+                mask |= bits.get(f"{client}:{role}", 0)
+
+        return mask
+
+    def compile(self, policy: RolePolicy) -> Callable[[int], bool]:
+        """Compile a role policy into a check against a user role bitset.
+
+        Args:
+            policy: The role policy to compile.
+
+        Raises:
+            RuntimeError: The policy references a role that is not an allowed role.
+        """
+
+        check = self._compiled.get(policy)
+
+        if check is None:
+            policy.validate(self.bits)
+            check = self._compiled[policy] = policy.compile(self.bits)
+
+        return check
+
+
+@dataclass
+class _VerifiedToken:
+    """
+    A JWT that has already passed signature verification along with the user constructed from it.
+
+    Args:
+        jwt_data: Payload data of the JWT.
+        user: The user constructed by the user lookup callback for this token.
+    """
+
+    jwt_data: dict[str, Any]
+    user: Optional[User] = None
+
+
+class _JWTManager(JWTManager):
+    """
+    Extend :class:`JWTManager <flask_jwt_extended.JWTManager>` to serve repeated bearer tokens from a bounded cache
+    of already verified tokens instead of redoing the signature verification, to check tokens against the
+    revocation list configured by the ``JWT_REVOCATION_SOURCE`` or ``JWT_REVOCATION_FILE`` settings and to enrich
+    users with cached profiles.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+
+        self._user_profile_callback: Optional[Callable[[str], Any]] = None
+
+    def init_app(self, app: Flask, add_context_processor: bool = False) -> None:
+        super().init_app(app, add_context_processor)
+
+        if app.config["JWT_VERIFIED_TOKEN_CACHE_SIZE"]:
+            app.extensions[VERIFIED_TOKEN_CACHE_EXTENSION] = TTLCache(app.config["JWT_VERIFIED_TOKEN_CACHE_SIZE"])
+
+        if app.config["OIDC_CLIENT_ID"] and app.config["OIDC_CLIENT_SECRET"]:
+            app.extensions[CLIENT_CREDENTIALS_EXTENSION] = ClientCredentialsTokenProvider(
+                app.config["OIDC_CLIENT_ID"],
+                app.config["OIDC_CLIENT_SECRET"],
+                token_url=app.config["OIDC_TOKEN_URL"],
+                discovery_url=app.config["OIDC_DISCOVERY_URL"],
+                verify_ssl_cert=app.config["VERIFY_SSL_CERT"],
+                timeout=app.config["OIDC_DISCOVERY_TIMEOUT"],
+            )
+
+        if app.config["JWT_USER_PROFILE_CACHE_SIZE"]:
+            app.extensions[USER_PROFILE_CACHE_EXTENSION] = TTLCache(
+                app.config["JWT_USER_PROFILE_CACHE_SIZE"], ttl=app.config["JWT_USER_PROFILE_CACHE_TTL"]
+            )
+
+        source: Optional[RevocationSource] = app.config["JWT_REVOCATION_SOURCE"]
+
+        if source is None and app.config["JWT_REVOCATION_FILE"]:
+            source = FileRevocationSource(os.path.join(app.instance_path, app.config["JWT_REVOCATION_FILE"]))
+
+        if source is not None:
+            app.extensions[REVOCATION_LIST_EXTENSION] = RevocationList(
+                source,
+                capacity=app.config["JWT_REVOCATION_CAPACITY"],
+                error_rate=app.config["JWT_REVOCATION_ERROR_RATE"],
+                refresh_interval=app.config["JWT_REVOCATION_REFRESH_INTERVAL"],
+            )
+
+    def user_profile_loader(self, callback: Callable[[str], Any]) -> Callable[[str], Any]:
+        """Register the function used to load the profile of a user for :attr:`User.profile`.
+
+        The callback receives the user ID (the ``sub`` claim) and returns the profile of the user or ``None``. Profiles
+        are cached per worker by user ID (see the ``JWT_USER_PROFILE_CACHE_SIZE`` setting) so the callback should
+        return plain data (e.g. a dictionary or a dataclass) rather than instances bound to a database session.
+
+        Args:
+            callback: The function that loads the profile for a user ID.
+        """
+
+        self._user_profile_callback = callback
+
+        return callback
+
+    def _decode_jwt_from_config(
+        self, encoded_token: str, csrf_value: Optional[str] = None, allow_expired: bool = False
+    ) -> dict[str, Any]:
+        token_cache: Optional[TTLCache] = current_app.extensions.get(VERIFIED_TOKEN_CACHE_EXTENSION)
+
+        if token_cache is None or csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)  # type: ignore
+
+        digest = hashlib.sha256(encoded_token.encode()).digest()
+        verified_token: Optional[_VerifiedToken] = token_cache.get(digest)
+
+        if verified_token is None:
+            verified_token = _VerifiedToken(super()._decode_jwt_from_config(encoded_token))
+
+            # Tokens without an expiration can never be evicted based on time so they are not worth the risk.
+            if "exp" in verified_token.jwt_data:
+                token_cache.set(digest, verified_token, expires_at=verified_token.jwt_data["exp"])
+
+        g._flask_ligand_verified_token = verified_token
+
+        return verified_token.jwt_data
+
 
 # ======================================================================================================================
 # Globals
 # ======================================================================================================================
-JWT = JWTManager()
+JWT = _JWTManager()
+JWKS_KEY_STORE_EXTENSION = "flask_ligand_jwks_key_store"
+VERIFIED_TOKEN_CACHE_EXTENSION = "flask_ligand_verified_token_cache"
+ROLE_REGISTRY_EXTENSION = "flask_ligand_role_registry"
+REVOCATION_LIST_EXTENSION = "flask_ligand_revocation_list"
+USER_PROFILE_CACHE_EXTENSION = "flask_ligand_user_profile_cache"
+CLIENT_CREDENTIALS_EXTENSION = "flask_ligand_client_credentials"
+_MISSING = object()
+_USER_PROFILE_MODELS: dict[type, str] = {}
+_CHANGED_USER_PROFILES_KEY = "_flask_ligand_changed_user_profiles"
+LOGGER = logging.getLogger(__name__)
 
 
 # ======================================================================================================================
@@ -44,40 +230,783 @@ class User:
 
     Args:
         id: The UUID of the user.
-        roles: A list of roles that the user has been assigned.
+        roles: The realm roles that the user has been assigned.
+        client_roles: The client roles that the user has been assigned indexed by client. (Keycloak 'resource_access')
+        role_mask: The bitset of the allowed roles held by the user, used by compiled role policies.
     """
 
     id: str
-    roles: list[str]
+    roles: frozenset[str]
+    client_roles: dict[str, frozenset[str]] = field(default_factory=dict)
+    role_mask: int = field(default=0, repr=False, compare=False)
+
+    @property
+    def profile(self) -> Any:
+        """The profile of the user loaded by the :meth:`JWT.user_profile_loader <_JWTManager.user_profile_loader>`
+        callback, or ``None`` if no loader is registered."""
+
+        return _load_user_profile(self.id)
+
+
+class RolePolicy(abc.ABC):
+    """
+    Base class for role requirements that are compiled once per app into a bitset check.
+
+    Use :class:`Role`, :func:`any_of`, :func:`all_of` and :func:`not_` to build policies.
+    """
+
+    @abc.abstractmethod
+    def roles(self) -> set[str]:
+        """The names of all the roles referenced by this policy."""
+
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def compile(self, bits: dict[str, int]) -> Callable[[int], bool]:
+        """Compile this policy into a check against a user role bitset.
+
+        Args:
+            bits: The bit assigned to each allowed role.
+        """
+
+        raise NotImplementedError
+
+    @property
+    def forbidden_message(self) -> str:
+        """The message returned to users that do not satisfy this policy."""
+
+        return f"This endpoint requires the user to satisfy the '{self}' role policy!"
+
+    def validate(self, allowed_roles: Iterable[str]) -> None:
+        """Verify that every role referenced by this policy is an allowed role.
+
+        Args:
+            allowed_roles: The roles allowed for endpoint protection.
+
+        Raises:
+            RuntimeError: The policy references a role that is not an allowed role.
+        """
+
+        not_allowed = sorted(self.roles() - set(allowed_roles))
+
+        if not_allowed:
+            raise RuntimeError(
+                f"The '{self}' role policy requires roles that are not allowed: {', '.join(not_allowed)}"
+            )
+
+
+@dataclass(frozen=True)
+class Role(RolePolicy):
+    """
+    A policy requiring the user to have a single role.
+
+    Policies compare and hash by value so that equivalent policies share a single compiled check.
+
+    Args:
+        name: The name of the role.
+        client: The client (Keycloak 'resource_access' entry) the role belongs to. Realm role if not specified.
+    """
+
+    name: str
+    client: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        """The name of the role in ``ALLOWED_ROLES``."""
+
+        return f"{self.client}:{self.name}" if self.client else self.name
+
+    def __str__(self) -> str:
+        return self.key
+
+    @property
+    def forbidden_message(self) -> str:
+        if self.client is not None:
+            return super().forbidden_message
+
+        return f"This endpoint requires the user to have the '{self}' role!"
+
+    def roles(self) -> set[str]:
+        return {self.key}
+
+    def compile(self, bits: dict[str, int]) -> Callable[[int], bool]:
+        bit = bits[self.key]
+
+        return lambda mask: mask & bit != 0
+
+
+@dataclass(frozen=True)
+class _AnyOf(RolePolicy):
+    """A policy requiring the user to satisfy at least one of the given policies."""
+
+    policies: tuple[RolePolicy, ...]
+
+    def __str__(self) -> str:
+        return f"any_of({', '.join(str(p) for p in self.policies)})"
+
+    def roles(self) -> set[str]:
+        return set().union(*(p.roles() for p in self.policies))
+
+    def compile(self, bits: dict[str, int]) -> Callable[[int], bool]:
+        if all(isinstance(p, Role) for p in self.policies):
+            required = self._combined_mask(bits)
+            return lambda mask: mask & required != 0
+
+        checks = [p.compile(bits) for p in self.policies]
+
+        return lambda mask: any(check(mask) for check in checks)
+
+    def _combined_mask(self, bits: dict[str, int]) -> int:
+        combined = 0
+
+        for policy in self.policies:
+            combined |= bits[policy.key]  # type: ignore[attr-defined]
+
+        return combined
+
+
+@dataclass(frozen=True)
+class _AllOf(_AnyOf):
+    """A policy requiring the user to satisfy all the given policies."""
+
+    def __str__(self) -> str:
+        return f"all_of({', '.join(str(p) for p in self.policies)})"
+
+    def compile(self, bits: dict[str, int]) -> Callable[[int], bool]:
+        if all(isinstance(p, Role) for p in self.policies):
+            required = self._combined_mask(bits)
+            return lambda mask: mask & required == required
+
+        checks = [p.compile(bits) for p in self.policies]
+
+        return lambda mask: all(check(mask) for check in checks)
+
+
+@dataclass(frozen=True)
+class _Not(RolePolicy):
+    """A policy requiring the user to not satisfy the given policy."""
+
+    policy: RolePolicy
+
+    def __str__(self) -> str:
+        return f"not_({self.policy})"
+
+    def roles(self) -> set[str]:
+        return self.policy.roles()
+
+    def compile(self, bits: dict[str, int]) -> Callable[[int], bool]:
+        check = self.policy.compile(bits)
+
+        return lambda mask: not check(mask)
+
+
+class JwksKeyStore:
+    """
+    A cache of the public keys published by an OIDC issuer's JSON Web Key Set (JWKS) indexed by key ID ('kid').
+
+    The key set is refreshed in a background thread once it is older than ``ttl`` seconds while the stale keys keep
+    being served. A token signed with an unknown key ID triggers a synchronous refetch, rate-limited to once every
+    ``min_refresh_interval`` seconds, so that key rotation on the issuer requires neither a restart nor a failed
+    request.
+
+    When a ``cache_file`` is specified the key set is shared through that file by every process on the host (e.g.
+    gunicorn workers). Only the process holding the file lock contacts the OIDC issuer while the others read the file.
+    A stale file no older than ``max_stale`` seconds is used if the OIDC issuer is unavailable.
+
+    Args:
+        discovery_url: The OIDC discovery URL used to locate the ``jwks_uri`` endpoint.
+        verify_ssl_cert: Verify the SSL/TLS certificate of the OIDC endpoints.
+        ttl: How long (in seconds) the key set is considered fresh.
+        min_refresh_interval: Minimum time (in seconds) between refetches triggered by an unknown key ID.
+        timeout: The maximum time (in seconds) to wait on the OIDC issuer for each request.
+        cache_file: Path of a file used to share the key set between processes.
+        max_stale: How long (in seconds) a cached key set may be used when the OIDC issuer is unavailable.
+    """
+
+    def __init__(
+        self,
+        discovery_url: str,
+        verify_ssl_cert: bool = True,
+        ttl: float = 300,
+        min_refresh_interval: float = 30,
+        timeout: float = 10,
+        cache_file: Optional[str] = None,
+        max_stale: float = 86400,
+    ):
+        self.discovery_url = discovery_url
+        self.verify_ssl_cert = verify_ssl_cert
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self.cache_file = cache_file
+        self.max_stale = max_stale
+
+        self._keys: dict[str, Any] = {}
+        self._default_key: Any = None
+        self._fetched_at: Optional[float] = None
+        self._last_attempt: Optional[float] = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    @property
+    def kids(self) -> list[str]:
+        """The key IDs currently held by the key store."""
+
+        return list(self._keys)
+
+    @property
+    def ready(self) -> bool:
+        """Whether the key set has been loaded at least once."""
+
+        return self._ready.is_set()
+
+    def load_in_background(self) -> None:
+        """Start loading the key set in a background thread without blocking the caller."""
+
+        self._refresh_if_stale()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until an in-progress load of the key set has completed.
+
+        Args:
+            timeout: The maximum time (in seconds) to wait. Defaults to the OIDC request timeout.
+
+        Returns:
+            Whether the key set is available.
+        """
+
+        if not self._refreshing:
+            return self.ready
+
+        return self._ready.wait(self.timeout if timeout is None else timeout)
+
+    def refresh(self, missing_kid: Optional[str] = None) -> None:
+        """Fetch the key set from the OIDC issuer (or the shared cache file) and replace the cached keys.
+
+        Args:
+            missing_kid: A key ID the refresh was triggered for. A fresh cache file that does not contain it is
+                bypassed so that keys rotated on the OIDC issuer are picked up immediately.
+
+        Raises:
+            RuntimeError: The key set could not be retrieved or it contained no usable signing keys.
+        """
+
+        self._last_attempt = time.monotonic()
+
+        if self.cache_file is None:
+            self.load(self._fetch())
+            return
+
+        cached = self._read_cache_file()
+
+        if cached is not None and self._is_usable(cached, missing_kid):
+            self.load(cached[1], age=cached[0])
+            return
+
+        # Allow enough time for the lock holder to complete both requests to the OIDC issuer.
+        with _file_lock(f"{self.cache_file}.lock", timeout=self.timeout * 2, stale_after=self.timeout * 3) as acquired:
+            # Another process might have refreshed the file while this one was waiting on the lock.
+            cached = self._read_cache_file() or cached
+
+            if cached is not None and self._is_usable(cached, missing_kid):
+                self.load(cached[1], age=cached[0])
+                return
+
+            if acquired:
+                try:
+                    jwks_keys = self._fetch()
+                except RuntimeError:
+                    if cached is None or cached[0] >= self.max_stale:
+                        raise
+                else:
+                    self._write_cache_file(jwks_keys)
+                    self.load(jwks_keys)
+                    return
+
+        if cached is None or cached[0] >= self.max_stale:
+            raise RuntimeError(f"Failed to retrieve public key from the '{self.discovery_url}' OIDC Discovery URL!")
+
+        LOGGER.warning("Using a JWKS cached %d seconds ago, the OIDC issuer is unavailable", cached[0])
+        self.load(cached[1], age=cached[0])
+
+    def _is_usable(self, cached: tuple[float, list[dict[str, Any]]], missing_kid: Optional[str]) -> bool:
+        """Determine whether a cached key set is fresh and, if a refresh was triggered by an unknown key ID, has it.
+
+        Args:
+            cached: The age (in seconds) and the JWK entries of the cache file.
+            missing_kid: The key ID the refresh was triggered for.
+        """
+
+        if cached[0] >= self.ttl:
+            return False
+
+        return missing_kid is None or any(jwk.get("kid") == missing_kid for jwk in cached[1])
+
+    def _fetch(self) -> list[dict[str, Any]]:
+        """Retrieve the JWK entries from the OIDC issuer.
+
+        Raises:
+            RuntimeError: The key set could not be retrieved.
+        """
+
+        try:
+            # Retrieve master openid-configuration endpoint from issuer realm
+            oidc_config = get(self.discovery_url, verify=self.verify_ssl_cert, timeout=self.timeout).json()
+
+            # Retrieve data from jwks_uri endpoint
+            jwks = get(oidc_config["jwks_uri"], verify=self.verify_ssl_cert, timeout=self.timeout).json()
+            jwks_keys = jwks["keys"]
+        except (RequestException, KeyError, TypeError, ValueError):
+            raise RuntimeError(f"Failed to retrieve public key from the '{self.discovery_url}' OIDC Discovery URL!")
+
+        return jwks_keys  # type: ignore
+
+    def _read_cache_file(self) -> Optional[tuple[float, list[dict[str, Any]]]]:
+        """Read the key set shared by other processes.
+
+        Returns:
+            A tuple with the age (in seconds) and the JWK entries or ``None`` if there is no usable cache file.
+        """
+
+        try:
+            with open(self.cache_file, encoding="utf-8") as f:  # type: ignore
+                cached = json.load(f)
+
+            if cached["discovery_url"] != self.discovery_url:
+                return None
+
+            return max(0.0, time.time() - cached["fetched_at"]), cached["keys"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_cache_file(self, jwks_keys: list[dict[str, Any]]) -> None:
+        """Atomically replace the key set shared with other processes.
+
+        Args:
+            jwks_keys: The JWK entries to share.
+        """
+
+        cache_dir = os.path.dirname(os.path.abspath(self.cache_file))  # type: ignore
+
+        try:
+            with tempfile.NamedTemporaryFile("w", dir=cache_dir, delete=False, encoding="utf-8") as f:
+                json.dump({"discovery_url": self.discovery_url, "fetched_at": time.time(), "keys": jwks_keys}, f)
+
+            os.replace(f.name, self.cache_file)  # type: ignore
+        except OSError as e:
+            LOGGER.warning("Unable to write the JWKS cache file '%s': %s", self.cache_file, e)
+
+    def load(self, jwks_keys: list[dict[str, Any]], age: float = 0) -> None:
+        """Replace the cached keys with the signing keys found in a list of JWK entries.
+
+        Args:
+            jwks_keys: The ``keys`` entry of a JWKS document.
+            age: How long ago (in seconds) the JWK entries were retrieved from the OIDC issuer.
+
+        Raises:
+            RuntimeError: The JWK entries contained no usable signing keys.
+        """
+
+        keys: dict[str, Any] = {}
+        default_key: Any = None
+
+        for jwk in jwks_keys:
+            if jwk.get("use", "sig") != "sig":
+                continue
+
+            try:
+                key = PyJWK(jwk).key
+            except PyJWKError:
+                LOGGER.warning("Skipping unsupported JWK with the '%s' key ID", jwk.get("kid"))
+                continue
+
+            keys[jwk.get("kid", "")] = key
+            default_key = key if default_key is None else default_key
+
+        if default_key is None:
+            raise RuntimeError(f"The '{self.discovery_url}' OIDC Discovery URL did not provide any signing keys!")
+
+        with self._lock:
+            self._keys = keys
+            self._default_key = default_key
+            self._fetched_at = time.monotonic() - age
+
+        self._ready.set()
+
+    def get_key(self, kid: Optional[str]) -> Any:
+        """Retrieve the public key for a given key ID.
+
+        Args:
+            kid: The key ID from the JWT header. The first signing key of the key set is returned for tokens that do
+                not specify a key ID.
+
+        Returns:
+            The public key or ``None`` if the key ID is unknown to the OIDC issuer or the key set has not been loaded.
+        """
+
+        self._refresh_if_stale()
+
+        if not self.ready:
+            return None
+
+        if kid is None:
+            return self._default_key
+
+        key = self._keys.get(kid)
+
+        if key is None and self._may_refetch():
+            try:
+                self.refresh(missing_kid=kid)
+            except RuntimeError as e:
+                LOGGER.warning("Unable to refresh the JWKS for the unknown '%s' key ID: %s", kid, e)
+
+            key = self._keys.get(kid)
+
+        return key
+
+    def _may_refetch(self) -> bool:
+        """Determine whether enough time has elapsed since the last fetch attempt to contact the issuer again."""
+
+        return self._last_attempt is None or time.monotonic() - self._last_attempt >= self.min_refresh_interval
+
+    def _refresh_if_stale(self) -> None:
+        """Start a background refresh of the key set if it is older than the TTL."""
+
+        if self._fetched_at is not None and time.monotonic() - self._fetched_at < self.ttl:
+            return
+
+        with self._lock:
+            if self._refreshing or not self._may_refetch():
+                return
+            self._refreshing = True
+
+        threading.Thread(target=self._background_refresh, name="jwks-refresh", daemon=True).start()
+
+    def _background_refresh(self) -> None:
+        """Refresh the key set while continuing to serve the stale keys if the issuer is unavailable."""
+
+        try:
+            self.refresh()
+        except RuntimeError as e:
+            LOGGER.warning("Background JWKS refresh failed, continuing to use the cached keys: %s", e)
+        finally:
+            self._refreshing = False
+
+
+class ClientCredentialsTokenProvider:
+    """
+    Obtains access tokens for service-to-service calls with the OAuth 2.0 client credentials grant and caches them.
+
+    A cached token is refreshed in a background thread once fewer than ``refresh_before`` seconds (or half of its
+    lifetime, whichever is less) remain while it keeps being served. Only when a token is about to expire (fewer than
+    ``min_validity`` seconds remain) does a caller wait on the OIDC issuer. Concurrent refreshes are coalesced so that a
+    burst of calls results in a single token request.
+
+    Args:
+        client_id: The ID of the client requesting the tokens.
+        client_secret: The secret of the client requesting the tokens.
+        token_url: The token endpoint of the OIDC issuer. Looked up through the ``discovery_url`` if not specified.
+        discovery_url: The OIDC discovery URL used to locate the ``token_endpoint``.
+        scope: The space separated scopes to request.
+        verify_ssl_cert: Verify the SSL/TLS certificate of the OIDC endpoints.
+        timeout: The maximum time (in seconds) to wait on the OIDC issuer for each request.
+        refresh_before: How long (in seconds) before a token expires to refresh it in the background.
+        min_validity: The minimum time (in seconds) a token must remain valid to be handed out.
+
+    Raises:
+        ValueError: Neither the token URL nor the OIDC discovery URL was specified.
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        token_url: Optional[str] = None,
+        discovery_url: Optional[str] = None,
+        scope: Optional[str] = None,
+        verify_ssl_cert: bool = True,
+        timeout: float = 10,
+        refresh_before: float = 60,
+        min_validity: float = 10,
+    ):
+        if token_url is None and discovery_url is None:
+            raise ValueError("Either the 'token_url' or the 'discovery_url' must be specified!")
+
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.token_url = token_url
+        self.discovery_url = discovery_url
+        self.scope = scope
+        self.verify_ssl_cert = verify_ssl_cert
+        self.timeout = timeout
+        self.refresh_before = refresh_before
+        self.min_validity = min_validity
+
+        self._access_token: Optional[str] = None
+        self._refresh_at = 0.0
+        self._expires_at = 0.0
+        self._refreshing = False
+        self._fetch_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+
+    def get_token(self) -> str:
+        """Retrieve a cached access token, requesting a new one from the OIDC issuer only when required.
+
+        Returns:
+            The access token.
+
+        Raises:
+            RuntimeError: A new access token was required but could not be retrieved.
+        """
+
+        now = time.monotonic()
+        access_token = self._access_token
+
+        if access_token is not None and now < self._expires_at:
+            if now >= self._refresh_at:
+                self._refresh_in_background()
+
+            return access_token
+
+        with self._fetch_lock:
+            # Another caller might have refreshed the token while this one was waiting on the lock.
+            if self._access_token is None or time.monotonic() >= self._expires_at:
+                self._fetch()
+
+            return self._access_token  # type: ignore
+
+    def get_headers(self) -> dict[str, str]:
+        """Retrieve the headers for authenticating a request with a cached access token.
+
+        Raises:
+            RuntimeError: A new access token was required but could not be retrieved.
+        """
+
+        return {"Authorization": f"Bearer {self.get_token()}"}
+
+    def _fetch(self) -> None:
+        """Request a new access token from the OIDC issuer and cache it. The caller must hold the fetch lock.
+
+        Raises:
+            RuntimeError: The access token could not be retrieved.
+        """
+
+        payload = {"grant_type": "client_credentials", "client_id": self.client_id, "client_secret": self.client_secret}
+
+        if self.scope:
+            payload["scope"] = self.scope
+
+        requested_at = time.monotonic()
+
+        try:
+            if self.token_url is None:
+                oidc_config = get(self.discovery_url, verify=self.verify_ssl_cert, timeout=self.timeout).json()  # type: ignore
+                self.token_url = oidc_config["token_endpoint"]
+
+            ret = post(self.token_url, data=payload, verify=self.verify_ssl_cert, timeout=self.timeout)
+            ret.raise_for_status()
+            token = ret.json()
+            access_token, expires_in = token["access_token"], float(token["expires_in"])
+        except (RequestException, KeyError, TypeError, ValueError):
+            raise RuntimeError(f"Failed to retrieve an access token for the '{self.client_id}' client!")
+
+        self._access_token = access_token
+        self._refresh_at = requested_at + max(expires_in - self.refresh_before, expires_in / 2)
+        self._expires_at = requested_at + expires_in - self.min_validity
+
+    def _refresh_in_background(self) -> None:
+        """Start a background refresh of the access token unless one is already in progress."""
+
+        with self._state_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        threading.Thread(target=self._background_refresh, name="client-credentials-refresh", daemon=True).start()
+
+    def _background_refresh(self) -> None:
+        """Refresh the access token while continuing to serve the cached token if the issuer is unavailable."""
+
+        try:
+            with self._fetch_lock:
+                if time.monotonic() >= self._refresh_at:
+                    self._fetch()
+        except RuntimeError as e:
+            LOGGER.warning("Background access token refresh failed, continuing to use the cached token: %s", e)
+        finally:
+            self._refreshing = False
+
+
+# ======================================================================================================================
+# Functions: Private
+# ======================================================================================================================
+def _role_registry() -> _RoleRegistry:
+    """Retrieve the role registry of the current app, creating it from the ``ALLOWED_ROLES`` setting if needed."""
+
+    registry: Optional[_RoleRegistry] = current_app.extensions.get(ROLE_REGISTRY_EXTENSION)
+
+    if registry is None:
+        registry = current_app.extensions[ROLE_REGISTRY_EXTENSION] = _RoleRegistry(current_app.config["ALLOWED_ROLES"])
+
+    return registry
+
+
+def _load_user_profile(user_id: str) -> Any:
+    """Load the profile of a user through the per-worker user profile cache.
+
+    Args:
+        user_id: The ID of the user.
+    """
+
+    callback = JWT._user_profile_callback
+
+    if callback is None:
+        return None
+
+    profile_cache: Optional[TTLCache] = current_app.extensions.get(USER_PROFILE_CACHE_EXTENSION)
+
+    if profile_cache is None:
+        return callback(user_id)
+
+    profile = profile_cache.get(user_id, _MISSING)
+
+    if profile is _MISSING:
+        profile = callback(user_id)
+        profile_cache.set(user_id, profile)
+
+    return profile
+
+
+def _collect_user_profile_changes(session: Session, _flush_context: Any) -> None:
+    """Remember the users whose profiles were changed by a flush so that they can be invalidated upon commit.
+
+    Args:
+        session: The session being flushed.
+        _flush_context: The internal state of the flush. (Unused argument)
+    """
+
+    changed = session.info.setdefault(_CHANGED_USER_PROFILES_KEY, set())
+
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        attribute = _USER_PROFILE_MODELS.get(type(instance))
+
+        if attribute is not None:
+            changed.add(getattr(instance, attribute))
+
+
+def _invalidate_changed_user_profiles(session: Session) -> None:
+    """Invalidate the cached profiles of the users changed by a committed transaction.
+
+    Args:
+        session: The session that was committed.
+    """
+
+    changed = session.info.pop(_CHANGED_USER_PROFILES_KEY, set())
+
+    if changed and has_app_context():
+        for user_id in changed:
+            invalidate_user_profile(user_id)
+
+
+def _discard_user_profile_changes(session: Session, _previous_transaction: Any) -> None:
+    """Forget the users changed by a transaction that was rolled back.
+
+    Args:
+        session: The session that was rolled back.
+        _previous_transaction: The transaction that was rolled back. (Unused argument)
+    """
+
+    session.info.pop(_CHANGED_USER_PROFILES_KEY, None)
+
+
+@contextmanager
+def _file_lock(path: str, timeout: float, stale_after: float) -> Iterator[bool]:
+    """An advisory inter-process lock based on the exclusive creation of a lock file.
+
+    Args:
+        path: The path of the lock file.
+        timeout: The maximum time (in seconds) to wait for the lock.
+        stale_after: Lock files older than this (in seconds) are considered abandoned (e.g. the holder was killed) and
+            are broken.
+
+    Yields:
+        Whether the lock was acquired before the timeout.
+    """
+
+    deadline = time.monotonic() + timeout
+    acquired = False
+
+    while True:
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            acquired = True
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > stale_after:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue
+
+        if time.monotonic() >= deadline:
+            break
+
+        time.sleep(0.05)
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                os.remove(path)
+            except OSError:  # pragma: no cover
+                pass
 
 
 # ======================================================================================================================
 # Decorators: Public
 # ======================================================================================================================
-def jwt_role_required(role: str):  # type: ignore
+def jwt_role_required(role: Union[str, RolePolicy]):  # type: ignore
     """A decorator for restricting access to an endpoint based on role membership.
 
+    The role requirement is compiled once per app into a bitset check against the ``ALLOWED_ROLES`` setting. Routes
+    registered through :class:`Api <flask_ligand.extensions.api.Api>` have their requirements validated against the
+    ``ALLOWED_ROLES`` setting upon registration.
+
+    Both regular and ``async def`` view functions are supported. (See :func:`verify_jwt_role_async`)
+
     Note: This decorator style was chosen because of: https://stackoverflow.com/a/42581103
 
     Args:
-        role: The role membership required by the user in order to access this endpoint.
+        role: The role membership required by the user in order to access this endpoint. Either a realm role name or a
+            :class:`RolePolicy` built with :class:`Role`, :func:`any_of`, :func:`all_of` and :func:`not_`.
     """
 
+    policy = as_role_policy(role)
+
     def decorator(fn: Callable[[Any], Any]) -> Callable[[Any], Any]:
-        @wraps(fn)
-        def wrapper(*args: Any, **kwargs: Any) -> Any:
-            # standard flask_jwt_extended token verifications
-            verify_jwt_in_request()
+        wrapper: Callable[..., Any]
+
+        if inspect.iscoroutinefunction(fn):
 
-            if role not in current_app.config["ALLOWED_ROLES"]:
-                abort(HTTPStatus(500), message="Endpoint required role is not an allowed role!")
+            @wraps(fn)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                await verify_jwt_role_async(policy)
 
-            # custom role membership verification
-            user: User = get_current_user()
-            if role not in user.roles:
-                abort(HTTPStatus(403), message=f"This endpoint requires the user to have the '{role}' role!")
+                return await fn(*args, **kwargs)
 
-            return fn(*args, **kwargs)
+        else:
+
+            @wraps(fn)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                verify_jwt_role(policy)
+
+                return fn(*args, **kwargs)
+
+        # Exposed for validating the role requirement when the route is registered.
+        wrapper._role_policy = policy  # type: ignore[attr-defined]
 
         return wrapper
 
@@ -98,32 +1027,314 @@ def user_lookup_callback(_jwt_header: dict[str, Any], jwt_data: dict[str, Any])
         jwt_data: Payload data of the JWT.
     """
 
-    return User(
+    verified_token: Optional[_VerifiedToken] = g.get("_flask_ligand_verified_token")
+
+    if verified_token is not None and verified_token.jwt_data is jwt_data and verified_token.user is not None:
+        return verified_token.user
+
+    roles = frozenset(jwt_data.get("realm_access", {}).get("roles", ()))
+    client_roles = {
+        client: frozenset(access.get("roles", ())) for client, access in jwt_data.get("resource_access", {}).items()
+    }
+
+    user = User(
         id=jwt_data["sub"],
-        roles=jwt_data["realm_access"]["roles"],
+        roles=roles,
+        client_roles=client_roles,
+        role_mask=_role_registry().mask(roles, client_roles),
     )
 
+    if verified_token is not None and verified_token.jwt_data is jwt_data:
+        verified_token.user = user
+
+    return user
+
+
+@JWT.decode_key_loader
+def decode_key_callback(jwt_header: dict[str, Any], _jwt_data: dict[str, Any]) -> Any:
+    """This callback function selects the public key used to verify a JWT based on the 'kid' of the token header.
+
+    Note: https://flask-jwt-extended.readthedocs.io/en/stable/api/#flask_jwt_extended.JWTManager.decode_key_loader
+
+    Args:
+        jwt_header: Header data of the JWT.
+        _jwt_data: Payload data of the JWT. (Unused argument)
+
+    Raises:
+        jwt.exceptions.InvalidTokenError: The JWT was signed with a key that is unknown to the OIDC issuer.
+        werkzeug.exceptions.HTTPException: The key set of the OIDC issuer could not be loaded in time.
+    """
+
+    key_store: Optional[JwksKeyStore] = current_app.extensions.get(JWKS_KEY_STORE_EXTENSION)
+
+    if key_store is None:
+        return jwt_config.decode_key
+
+    if not key_store.ready:
+        key_store.load_in_background()
+
+        if not key_store.wait_until_ready():
+            abort(HTTPStatus(503), message="Authentication keys are not available yet!")
+
+    key = key_store.get_key(jwt_header.get("kid"))
+
+    if key is None:
+        raise InvalidTokenError(f"Unknown signing key ID '{jwt_header.get('kid')}'")
+
+    return key
+
+
+@JWT.token_in_blocklist_loader
+def token_in_blocklist_callback(_jwt_header: dict[str, Any], jwt_data: dict[str, Any]) -> bool:
+    """This callback function checks whether a JWT has been revoked using the revocation list of the current app.
+
+    Note: https://flask-jwt-extended.readthedocs.io/en/stable/api/#flask_jwt_extended.JWTManager.token_in_blocklist_loader
+
+    Args:
+        _jwt_header: Header data of the JWT. (Unused argument)
+        jwt_data: Payload data of the JWT.
+    """
+
+    revocation_list: Optional[RevocationList] = current_app.extensions.get(REVOCATION_LIST_EXTENSION)
+
+    if revocation_list is None or "jti" not in jwt_data:
+        return False
+
+    revocation_list.refresh_if_stale(current_app._get_current_object())  # type: ignore[attr-defined]
+
+    return revocation_list.is_revoked(jwt_data["jti"])
+
 
 # ======================================================================================================================
 # Functions: Public
 # ======================================================================================================================
-def init_app(app: Flask) -> None:  # pragma: no cover (Covered by integration tests)
-    """Initialize JWT."""
+def any_of(*roles: Union[str, RolePolicy]) -> RolePolicy:
+    """Build a role policy satisfied when the user satisfies at least one of the given roles or policies.
+
+    Args:
+        roles: Realm role names or role policies.
+    """
+
+    return _AnyOf(tuple(as_role_policy(role) for role in roles))
+
+
+def all_of(*roles: Union[str, RolePolicy]) -> RolePolicy:
+    """Build a role policy satisfied when the user satisfies all the given roles or policies.
+
+    Args:
+        roles: Realm role names or role policies.
+    """
+
+    return _AllOf(tuple(as_role_policy(role) for role in roles))
+
 
-    verify_ssl_cert = app.config["VERIFY_SSL_CERT"]
+def not_(role: Union[str, RolePolicy]) -> RolePolicy:
+    """Build a role policy satisfied when the user does not satisfy the given role or policy.
+
+    Args:
+        role: A realm role name or a role policy.
+    """
+
+    return _Not(as_role_policy(role))
+
+
+def as_role_policy(role: Union[str, RolePolicy]) -> RolePolicy:
+    """Convert a realm role name into a role policy.
+
+    Args:
+        role: A realm role name or a role policy.
+    """
+
+    return role if isinstance(role, RolePolicy) else Role(role)
+
+
+def verify_jwt_role(role: Union[str, RolePolicy]) -> User:
+    """Verify the access token of the current request and that its user satisfies a role requirement.
+
+    Args:
+        role: A realm role name or a role policy.
+
+    Returns:
+        The user of the access token.
+
+    Raises:
+        werkzeug.exceptions.HTTPException: The user does not satisfy the role requirement or the role requirement
+            references a role that is not allowed.
+    """
+
+    policy = as_role_policy(role)
+
+    # standard flask_jwt_extended token verifications
+    verify_jwt_in_request()
 
     try:
-        # Retrieve master openid-configuration endpoint from issuer realm
-        oidc_config = get(app.config["OIDC_DISCOVERY_URL"], verify=verify_ssl_cert).json()
-
-        # Retrieve data from jwks_uri endpoint
-        oidc_jwks_uri = get(oidc_config["jwks_uri"], verify=verify_ssl_cert).json()
-    except (RequestException, KeyError):
-        raise RuntimeError(
-            f"Failed to retrieve public key from the '{app.config['OIDC_DISCOVERY_URL']}' OIDC Discovery URL!"
-        )
-
-    # Retrieve first jwk entry from jwks_uri endpoint and use it to construct the RSA public key
-    app.config["JWT_PUBLIC_KEY"] = RSAAlgorithm.from_jwk(json.dumps(oidc_jwks_uri["keys"][0]))  # type: ignore
+        check = _role_registry().compile(policy)
+    except RuntimeError:
+        abort(HTTPStatus(500), message="Endpoint required role is not an allowed role!")
+
+    # custom role membership verification
+    user: User = get_current_user()
+    if not check(user.role_mask):
+        abort(HTTPStatus(403), message=policy.forbidden_message)
+
+    return user
+
+
+async def verify_jwt_role_async(role: Union[str, RolePolicy]) -> User:
+    """Asynchronous variant of :func:`verify_jwt_role` for use within ``async def`` views.
+
+    Verifying the signature of the access token is CPU bound, therefore the verification is offloaded to a worker
+    thread so that concurrent handlers running on the same event loop are not serialized behind it.
+
+    Args:
+        role: A realm role name or a role policy.
+
+    Returns:
+        The user of the access token.
+
+    Raises:
+        werkzeug.exceptions.HTTPException: The user does not satisfy the role requirement or the role requirement
+            references a role that is not allowed.
+    """
+
+    # The worker thread runs with a copy of the current context, so the request and app contexts remain available.
+    return await asyncio.to_thread(verify_jwt_role, role)
+
+
+def is_auth_ready() -> bool:
+    """Report whether the current app has the public keys needed to verify access tokens.
+
+    Use this for readiness probes when the ``OIDC_LAZY_DISCOVERY`` setting is enabled.
+
+    Returns:
+        ``True`` once the OIDC issuer key set has been loaded (or when keys are configured statically).
+    """
+
+    key_store: Optional[JwksKeyStore] = current_app.extensions.get(JWKS_KEY_STORE_EXTENSION)
+
+    return key_store is None or key_store.ready
+
+
+def invalidate_user_profile(user_id: str) -> None:
+    """Remove the cached profile of a user so that it is reloaded on the next access.
+
+    Args:
+        user_id: The ID of the user.
+    """
+
+    profile_cache: Optional[TTLCache] = current_app.extensions.get(USER_PROFILE_CACHE_EXTENSION)
+
+    if profile_cache is not None:
+        profile_cache.delete(user_id)
+
+
+def invalidate_user_profiles_on_commit(model: type, user_id_attribute: str = "id") -> None:
+    """Invalidate cached user profiles whenever instances of a model are committed.
+
+    Args:
+        model: The model class that the user profiles are loaded from.
+        user_id_attribute: The model attribute holding the user ID.
+    """
+
+    if not _USER_PROFILE_MODELS:
+        event.listen(Session, "after_flush", _collect_user_profile_changes)
+        event.listen(Session, "after_commit", _invalidate_changed_user_profiles)
+        event.listen(Session, "after_soft_rollback", _discard_user_profile_changes)
+
+    _USER_PROFILE_MODELS[model] = user_id_attribute
+
+
+def revoke_token(jti: str, expires_at: Optional[float] = None) -> None:
+    """Revoke an access token before it expires. (e.g. on logout or compromise)
+
+    Args:
+        jti: The token ID. (The ``jti`` claim of the access token)
+        expires_at: The UNIX timestamp at which the token expires. (The ``exp`` claim of the access token)
+
+    Raises:
+        RuntimeError: Token revocation is not configured for the current app.
+    """
+
+    revocation_list: Optional[RevocationList] = current_app.extensions.get(REVOCATION_LIST_EXTENSION)
+
+    if revocation_list is None:
+        raise RuntimeError("Token revocation requires the 'JWT_REVOCATION_SOURCE' or 'JWT_REVOCATION_FILE' setting!")
+
+    revocation_list.revoke(jti, expires_at)
+
+
+def get_revocation_stats() -> Optional[RevocationStats]:
+    """Retrieve the false positive and refresh lag metrics of the token revocation list for the current app.
+
+    Returns:
+        The revocation list counters or ``None`` if token revocation is not configured.
+    """
+
+    revocation_list: Optional[RevocationList] = current_app.extensions.get(REVOCATION_LIST_EXTENSION)
+
+    return revocation_list.stats if revocation_list is not None else None
+
+
+def get_service_token_headers() -> dict[str, str]:
+    """Retrieve the headers for calling other services as the client configured by the ``OIDC_CLIENT_ID`` and
+    ``OIDC_CLIENT_SECRET`` settings.
+
+    Access tokens are cached per worker and refreshed in the background before they expire.
+
+    Raises:
+        RuntimeError: The client credentials are not configured or an access token could not be retrieved.
+    """
+
+    provider: Optional[ClientCredentialsTokenProvider] = current_app.extensions.get(CLIENT_CREDENTIALS_EXTENSION)
+
+    if provider is None:
+        raise RuntimeError("Service tokens require the 'OIDC_CLIENT_ID' and 'OIDC_CLIENT_SECRET' settings!")
+
+    return provider.get_headers()
+
+
+def get_verified_token_cache_stats() -> Optional[CacheStats]:
+    """Retrieve the hit and miss counters of the verified token cache for the current app.
+
+    Returns:
+        The cache counters or ``None`` if the cache is disabled by the ``JWT_VERIFIED_TOKEN_CACHE_SIZE`` setting.
+    """
+
+    token_cache: Optional[TTLCache] = current_app.extensions.get(VERIFIED_TOKEN_CACHE_EXTENSION)
+
+    return token_cache.stats if token_cache is not None else None
+
+
+def init_app(app: Flask) -> None:  # pragma: no cover (Covered by integration tests)
+    """Initialize JWT.
+
+    When the ``OIDC_LAZY_DISCOVERY`` setting is enabled the OIDC discovery and JWKS retrieval happen in the background
+    (or on the first protected request) so that app start-up never waits on the OIDC issuer.
+    """
+
+    key_store = JwksKeyStore(
+        app.config["OIDC_DISCOVERY_URL"],
+        verify_ssl_cert=app.config["VERIFY_SSL_CERT"],
+        ttl=app.config["JWKS_CACHE_TTL"],
+        min_refresh_interval=app.config["JWKS_MIN_REFRESH_INTERVAL"],
+        timeout=app.config["OIDC_DISCOVERY_TIMEOUT"],
+        cache_file=(
+            os.path.join(app.instance_path, app.config["JWKS_CACHE_FILE"]) if app.config["JWKS_CACHE_FILE"] else None
+        ),
+        max_stale=app.config["JWKS_CACHE_MAX_STALE"],
+    )
+
+    if key_store.cache_file is not None:
+        os.makedirs(os.path.dirname(key_store.cache_file), exist_ok=True)
+
+    app.extensions[JWKS_KEY_STORE_EXTENSION] = key_store
+
+    if app.config["OIDC_LAZY_DISCOVERY"]:
+        key_store.load_in_background()
+    else:
+        key_store.refresh()
+
+        # Kept for backwards compatibility, verification selects the key by 'kid' through the key store.
+        app.config["JWT_PUBLIC_KEY"] = key_store.get_key(None)
 
     JWT.init_app(app)
@@ -0,0 +1,356 @@
+"""Access token revocation backed by an in-memory Bloom filter of revoked token IDs (``jti``)."""
+
+# ======================================================================================================================
+# Imports
+# ======================================================================================================================
+from __future__ import annotations
+
+import abc
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from sqlalchemy import exists, insert, select
+
+from flask_ligand.extensions.database import DB
+
+# ======================================================================================================================
+# Type Checking
+# ======================================================================================================================
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import Any, Iterable, Optional
+
+    from flask import Flask
+
+
+# ======================================================================================================================
+# Globals
+# ======================================================================================================================
+LOGGER = logging.getLogger(__name__)
+
+
+# ======================================================================================================================
+# Classes: Public
+# ======================================================================================================================
+class BloomFilter:
+    """
+    A compact, probabilistic set which never reports false negatives but may report false positives.
+
+    Args:
+        capacity: The number of items the filter is sized for.
+        error_rate: The false positive rate expected once the filter holds ``capacity`` items.
+
+    Raises:
+        ValueError: The capacity or error rate is out of range.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        if capacity < 1:
+            raise ValueError("The Bloom filter 'capacity' must be a positive integer!")
+        if not 0 < error_rate < 1:
+            raise ValueError("The Bloom filter 'error_rate' must be between 0 and 1!")
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[i >> 3] & (1 << (i & 7)) for i in self._indexes(item))
+
+    def _indexes(self, item: str) -> Iterable[int]:
+        """Derive the bit positions of an item from two halves of a single digest. (Kirsch-Mitzenmacher)
+
+        Args:
+            item: The item to hash.
+        """
+
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item: str) -> None:
+        """Add an item to the filter.
+
+        Args:
+            item: The item to add.
+        """
+
+        for i in self._indexes(item):
+            self._bits[i >> 3] |= 1 << (i & 7)
+
+        self._count += 1
+
+    @property
+    def size_in_bytes(self) -> int:
+        """The memory used by the bit array of the filter."""
+
+        return len(self._bits)
+
+
+class RevocationSource(abc.ABC):
+    """
+    Base class for the authoritative store of revoked token IDs (``jti``) used by a :class:`RevocationList`.
+
+    Subclasses must implement :meth:`load` and :meth:`contains` and may implement :meth:`add`.
+    """
+
+    @abc.abstractmethod
+    def load(self) -> Iterable[str]:
+        """Retrieve every revoked token ID that is still relevant.
+
+        Returns:
+            The revoked token IDs.
+        """
+
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def contains(self, jti: str) -> bool:
+        """Confirm whether a token ID has been revoked. Only called when the Bloom filter reports a match.
+
+        Args:
+            jti: The token ID.
+        """
+
+        raise NotImplementedError
+
+    def add(self, jti: str, expires_at: Optional[float] = None) -> None:
+        """Record a token ID as revoked.
+
+        Args:
+            jti: The token ID.
+            expires_at: The UNIX timestamp at which the revoked token expires, if known.
+
+        Raises:
+            NotImplementedError: The source is read-only.
+        """
+
+        raise NotImplementedError(f"The '{type(self).__name__}' revocation source is read-only!")
+
+
+class FileRevocationSource(RevocationSource):
+    """
+    A revocation source backed by a text file containing one revoked token ID per line.
+
+    Args:
+        path: The path to the file. A missing file is treated as an empty revocation list.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Iterable[str]:
+        try:
+            with open(self.path) as f:
+                return [line.strip() for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def contains(self, jti: str) -> bool:
+        return jti in set(self.load())
+
+    def add(self, jti: str, expires_at: Optional[float] = None) -> None:
+        with open(self.path, "a") as f:
+            f.write(f"{jti}{os.linesep}")
+
+
+class DatabaseRevocationSource(RevocationSource):
+    """
+    A revocation source backed by a database table of revoked token IDs.
+
+    Args:
+        jti_column: The model column holding the revoked token IDs. (e.g. ``RevokedToken.jti``)
+        expires_column: An optional model column holding the UNIX timestamp at which the revoked token expires. Rows
+            for tokens that have already expired are not loaded since those tokens are rejected anyway.
+
+    Note: Revoking a token through this source commits the current database session.
+    """
+
+    def __init__(self, jti_column: Any, expires_column: Any = None):
+        self.jti_column = jti_column
+        self.expires_column = expires_column
+
+    def load(self) -> Iterable[str]:
+        query = select(self.jti_column)
+
+        if self.expires_column is not None:
+            query = query.where(self.expires_column > time.time())
+
+        return DB.session.execute(query).scalars().all()
+
+    def contains(self, jti: str) -> bool:
+        return bool(DB.session.execute(select(exists().where(self.jti_column == jti))).scalar())
+
+    def add(self, jti: str, expires_at: Optional[float] = None) -> None:
+        values: dict[str, Any] = {self.jti_column.key: jti}
+
+        if self.expires_column is not None:
+            values[self.expires_column.key] = expires_at
+
+        DB.session.execute(insert(self.jti_column.class_).values(values))
+        DB.session.commit()
+
+
+@dataclass
+class RevocationStats:
+    """
+    A snapshot of the counters for a revocation list.
+
+    Args:
+        checks: The number of tokens checked for revocation.
+        filter_hits: The number of checks where the Bloom filter reported a match and the source was consulted.
+        revoked: The number of checks confirmed as revoked by the source.
+        size: The number of revoked token IDs held by the Bloom filter.
+        refresh_lag: The number of seconds since the Bloom filter was last refreshed from the source. (``None`` if it
+            has never been refreshed)
+    """
+
+    checks: int
+    filter_hits: int
+    revoked: int
+    size: int
+    refresh_lag: Optional[float]
+
+    @property
+    def false_positive_rate(self) -> float:
+        """The ratio of non-revoked tokens that needed confirmation by the source."""
+
+        not_revoked = self.checks - self.revoked
+
+        return (self.filter_hits - self.revoked) / not_revoked if not_revoked else 0.0
+
+
+class RevocationList:
+    """
+    Checks access tokens against a Bloom filter of revoked token IDs that is periodically rebuilt from a
+    :class:`RevocationSource`. The source is only consulted to confirm matches reported by the filter.
+
+    Args:
+        source: The authoritative store of revoked token IDs.
+        capacity: The minimum number of revoked token IDs the Bloom filter is sized for.
+        error_rate: The target false positive rate of the Bloom filter.
+        refresh_interval: The number of seconds between rebuilding the Bloom filter from the source.
+    """
+
+    def __init__(
+        self, source: RevocationSource, capacity: int = 100000, error_rate: float = 0.001, refresh_interval: float = 30
+    ):
+        self.source = source
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+
+        self._filter = BloomFilter(capacity, error_rate)
+        self._refreshed_at: Optional[float] = None
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self._checks = 0
+        self._filter_hits = 0
+        self._revoked = 0
+
+    @property
+    def stats(self) -> RevocationStats:
+        """A snapshot of the revocation list counters."""
+
+        return RevocationStats(
+            checks=self._checks,
+            filter_hits=self._filter_hits,
+            revoked=self._revoked,
+            size=len(self._filter),
+            refresh_lag=None if self._refreshed_at is None else time.time() - self._refreshed_at,
+        )
+
+    @property
+    def is_stale(self) -> bool:
+        """Whether the Bloom filter is due to be rebuilt from the source."""
+
+        return self._refreshed_at is None or time.time() - self._refreshed_at >= self.refresh_interval
+
+    def refresh(self) -> None:
+        """Rebuild the Bloom filter from the source and swap it in."""
+
+        with self._refresh_lock:
+            jtis = list(self.source.load())
+            bloom_filter = BloomFilter(max(self.capacity, len(jtis)), self.error_rate)
+
+            for jti in jtis:
+                bloom_filter.add(jti)
+
+            self._filter = bloom_filter
+            self._refreshed_at = time.time()
+
+        LOGGER.debug("Loaded %d revoked token IDs into a %d byte Bloom filter", len(jtis), bloom_filter.size_in_bytes)
+
+    def refresh_if_stale(self, app: Flask) -> None:
+        """Make sure the Bloom filter is current without blocking requests on the source.
+
+        The first call loads the Bloom filter synchronously. Afterwards a stale Bloom filter keeps serving checks while
+        it is rebuilt in a background thread.
+
+        Args:
+            app: The Flask app providing the app context for the source.
+        """
+
+        if self._refreshed_at is None:
+            self.refresh()
+        elif self.is_stale and (self._refresh_thread is None or not self._refresh_thread.is_alive()):
+            self._refresh_thread = threading.Thread(target=self._background_refresh, args=(app,), daemon=True)
+            self._refresh_thread.start()
+
+    def _background_refresh(self, app: Flask) -> None:
+        """Rebuild the Bloom filter within an app context, logging failures instead of raising them.
+
+        Args:
+            app: The Flask app providing the app context for the source.
+        """
+
+        try:
+            with app.app_context():
+                self.refresh()
+        except Exception as e:
+            LOGGER.warning("Background revocation list refresh failed, continuing to use the cached filter: %s", e)
+
+    def is_revoked(self, jti: str) -> bool:
+        """Check whether a token ID has been revoked.
+
+        Args:
+            jti: The token ID.
+        """
+
+        hit = jti in self._filter
+        revoked = hit and self.source.contains(jti)
+
+        with self._stats_lock:
+            self._checks += 1
+            self._filter_hits += hit
+            self._revoked += revoked
+
+        return revoked
+
+    def revoke(self, jti: str, expires_at: Optional[float] = None) -> None:
+        """Revoke a token ID in the source and immediately in the local Bloom filter.
+
+        Other processes observe the revocation once their Bloom filter is next refreshed.
+
+        Args:
+            jti: The token ID.
+            expires_at: The UNIX timestamp at which the revoked token expires, if known.
+        """
+
+        self.source.add(jti, expires_at)
+        self._filter.add(jti)
@@ -3,14 +3,89 @@
 # ======================================================================================================================
 # Imports
 # ======================================================================================================================
+from __future__ import annotations
+
 from http import HTTPStatus
+from typing import TYPE_CHECKING
 
 import pytest
+from flask.views import MethodView
+
+# noinspection PyPackageRequirements
+from marshmallow import fields
 
 # noinspection PyPackageRequirements
 from werkzeug.exceptions import HTTPException
 
-from flask_ligand.extensions.api import abort
+from flask_ligand.extensions.api import Blueprint, Schema, abort
+
+# ======================================================================================================================
+# Type Checking
+# ======================================================================================================================
+if TYPE_CHECKING:
+    from flask import Flask
+    from flask.testing import FlaskClient
+
+    from flask_ligand.extensions.api import Api
+
+
+# ======================================================================================================================
+# Globals
+# ======================================================================================================================
+AUTH_TEST_URL = "/authtest/"
+AUTH_BLP = Blueprint(
+    "AUTH TEST",
+    __name__,
+    url_prefix=AUTH_TEST_URL.rstrip("/"),
+    description="AUTH TEST",
+    role_required="user",
+)
+
+
+# ======================================================================================================================
+# Classes: Public
+# ======================================================================================================================
+class AuthTestSchema(Schema):
+    """A schema with a required field for verifying that arguments are parsed after authentication."""
+
+    message = fields.Str(required=True)
+
+
+@AUTH_BLP.route("/")
+class AuthTestView(MethodView):
+    @AUTH_BLP.arguments(AuthTestSchema, location="query")
+    @AUTH_BLP.response(200, AuthTestSchema)
+    def get(self, args):
+        return args
+
+    @AUTH_BLP.arguments(AuthTestSchema)
+    @AUTH_BLP.response(201, AuthTestSchema)
+    @AUTH_BLP.role_required("admin")
+    def post(self, new_item):
+        return new_item
+
+
+@AUTH_BLP.route("/async")
+class AuthTestAsyncView(MethodView):
+    @AUTH_BLP.arguments(AuthTestSchema, location="query")
+    async def get(self, args):
+        return args
+
+    async def delete(self):
+        return "", 204
+
+
+# ======================================================================================================================
+# Fixtures
+# ======================================================================================================================
+@pytest.fixture(scope="function")
+def auth_test_client(basic_flask_app: tuple[Flask, Api]) -> FlaskClient:
+    """Flask app test client with 'AuthTestView' pre-configured."""
+
+    basic_flask_app[1].register_blueprint(AUTH_BLP)
+    basic_flask_app[0].testing = True
+
+    return basic_flask_app[0].test_client()
 
 
 # ======================================================================================================================
@@ -64,3 +139,66 @@ class TestNegativeAbort(object):
         with app_test_client.application.app_context():
             with pytest.raises(ValueError):
                 abort(HTTPStatus(invalid_http_status_code), message="Oh no!")
+
+
+class TestBlueprintRoleRequired(object):
+    """Test cases for the Blueprint role requirements."""
+
+    def test_authorized(self, auth_test_client, access_token_headers):
+        """Verify that an authorized user can access routes protected at the Blueprint and route level."""
+
+        with auth_test_client.get(f"{AUTH_TEST_URL}?message=hi", headers=access_token_headers) as ret:
+            assert ret.status_code == 200
+
+        with auth_test_client.post(AUTH_TEST_URL, json={"message": "hi"}, headers=access_token_headers) as ret:
+            assert ret.status_code == 201
+
+    def test_authorized_async(self, auth_test_client, access_token_headers):
+        """Verify that an authorized user can access an 'async def' route protected at the Blueprint level."""
+
+        with auth_test_client.get(f"{AUTH_TEST_URL}async?message=hi", headers=access_token_headers) as ret:
+            assert ret.status_code == 200
+            assert ret.json == {"message": "hi"}  # noqa
+
+        with auth_test_client.delete(f"{AUTH_TEST_URL}async", headers=access_token_headers) as ret:
+            assert ret.status_code == 204
+
+    def test_bearer_auth_documented(self, auth_test_client):
+        """Verify that protected routes are documented as requiring bearer authentication."""
+
+        spec = auth_test_client.get("/openapi/api-spec.json").json
+        path = spec["paths"][AUTH_TEST_URL]
+
+        assert path["get"]["security"] == [{"bearerAuth": []}]
+        assert path["post"]["security"] == [{"bearerAuth": []}]
+
+
+class TestNegativeBlueprintRoleRequired(object):
+    """Negative test cases for the Blueprint role requirements."""
+
+    def test_unauthenticated_before_parsing(self, auth_test_client):
+        """Verify that unauthenticated requests are rejected before invalid arguments are parsed."""
+
+        with auth_test_client.get(AUTH_TEST_URL) as ret:
+            assert ret.status_code == 401
+
+        with auth_test_client.post(AUTH_TEST_URL, json={"not": "valid"}) as ret:
+            assert ret.status_code == 401
+
+    def test_unauthenticated_async(self, auth_test_client):
+        """Verify that unauthenticated requests to 'async def' routes are rejected before arguments are parsed."""
+
+        with auth_test_client.get(f"{AUTH_TEST_URL}async") as ret:
+            assert ret.status_code == 401
+
+        with auth_test_client.delete(f"{AUTH_TEST_URL}async") as ret:
+            assert ret.status_code == 401
+
+    # noinspection PyTestParametrized
+    @pytest.mark.parametrize("default_roles", [["user"]])
+    def test_route_role_overrides_blueprint_role(self, auth_test_client, access_token_headers):
+        """Verify that the route level role requirement overrides the Blueprint role requirement."""
+
+        with auth_test_client.post(AUTH_TEST_URL, json={"not": "valid"}, headers=access_token_headers) as ret:
+            assert ret.status_code == 403
+            assert ret.json["message"] == "This endpoint requires the user to have the 'admin' role!"  # noqa
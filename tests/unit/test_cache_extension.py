@@ -0,0 +1,76 @@
+"""Tests for the "extensions.cache" classes."""
+
+# ======================================================================================================================
+# Imports
+# ======================================================================================================================
+import time
+
+import pytest
+
+from flask_ligand.extensions.cache import TTLCache
+
+
+# ======================================================================================================================
+# Test Suites
+# ======================================================================================================================
+class TestTTLCache(object):
+    """Test cases for the 'TTLCache' class."""
+
+    def test_get_and_set(self):
+        """Verify that cached values are returned and the hit and miss counters are updated."""
+
+        cache = TTLCache(maxsize=2)
+        cache.set("key", "value")
+
+        assert cache.get("key") == "value"
+        assert cache.get("missing", "default") == "default"
+        assert (cache.stats.hits, cache.stats.misses, cache.stats.hit_rate) == (1, 1, 0.5)
+
+    def test_lru_eviction(self):
+        """Verify that the least recently used entry is evicted when the cache is full."""
+
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert cache.stats.evictions == 1
+
+    def test_expiration(self):
+        """Verify that entries expire after their TTL or absolute expiration time."""
+
+        cache = TTLCache(maxsize=4, ttl=60)
+        cache.set("ttl", 1, ttl=-1)
+        cache.set("expires_at", 2, expires_at=time.time() - 1)
+        cache.set("fresh", 3)
+
+        assert cache.get("ttl") is None
+        assert cache.get("expires_at") is None
+        assert cache.get("fresh") == 3
+        assert len(cache) == 1
+
+    def test_delete_and_clear(self):
+        """Verify that entries can be removed individually or all at once."""
+
+        cache = TTLCache(maxsize=4)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        cache.delete("a")
+        assert "a" not in cache
+
+        cache.clear()
+        assert len(cache) == 0
+
+
+class TestNegativeTTLCache(object):
+    """Negative test cases for the 'TTLCache' class."""
+
+    def test_invalid_maxsize(self):
+        """Verify that the correct exception is raised when the cache size is not positive."""
+
+        with pytest.raises(ValueError):
+            TTLCache(maxsize=0)
@@ -5,9 +5,16 @@
 # ======================================================================================================================
 from __future__ import annotations
 
+import asyncio
+import sqlite3
+import threading
+import time
 import uuid
+from contextlib import closing
+from pathlib import Path
 from typing import TYPE_CHECKING
 
+import flask
 import pytest
 from flask.testing import FlaskClient
 from flask.views import MethodView
@@ -18,18 +25,55 @@ from marshmallow import fields
 # noinspection PyPackageRequirements
 from marshmallow.validate import Length
 from marshmallow_sqlalchemy import field_for
+from sqlalchemy import event, func, insert, select, text
+from sqlalchemy.dialects.postgresql import pg8000
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import NullPool, QueuePool
 from sqlalchemy_utils.types.uuid import UUIDType
-
-from flask_ligand.extensions.api import AutoSchema, Blueprint, Schema, SQLCursorPage
-from flask_ligand.extensions.database import DB
+from werkzeug.exceptions import HTTPException
+
+from flask_ligand import create_app
+from flask_ligand.extensions import database
+from flask_ligand.extensions.api import (
+    AutoSchema,
+    Blueprint,
+    Query,
+    Schema,
+    SQLCursorPage,
+    SQLKeysetPage,
+)
+from flask_ligand.extensions.database import (
+    AUTO_UPGRADE_LOCK_NAME,
+    DB,
+    READ_YOUR_WRITES_COOKIE,
+    REPLICA_BIND_KEY_PREFIX,
+    REPLICA_SET_EXTENSION,
+    SLOW_QUERY_LOG_EXTENSION,
+    DBLimits,
+    DBLimitStats,
+    async_session,
+    auto_coerce,
+    bulk_delete,
+    bulk_insert,
+    bulk_update,
+    bulk_upsert,
+    cacheable,
+    get_async_engine,
+    get_db_limit_stats,
+    get_pool_metrics,
+    get_query_cache_stats,
+    get_request_query_stats,
+    use_primary,
+)
 
 # ======================================================================================================================
 # Type Checking
 # ======================================================================================================================
 if TYPE_CHECKING:
-    from typing import Any
+    from typing import Any, Callable, Iterator, Optional
 
     from flask import Flask
+    from pytest_mock import MockerFixture
 
     from flask_ligand.extensions.api import Api
 
@@ -37,8 +81,12 @@ if TYPE_CHECKING:
 # ======================================================================================================================
 # Globals
 # ======================================================================================================================
+MIGRATION_DIRECTORY = Path(__file__).parents[1] / "integration" / "migrations"
 NAME_MAX_LENGTH = 255
 NAME_VALIDATOR = Length(min=1, max=NAME_MAX_LENGTH)
+SLOW_STATEMENT = (
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 100000000) SELECT count(*) FROM c"
+)
 DATABASE_TEST_URL: str = "/dbtest/"
 BLP = Blueprint(
     "DB TEST",
@@ -60,6 +108,37 @@ class DatabaseTestModel(DB.Model):  # type: ignore
     name = DB.Column(DB.String(length=NAME_MAX_LENGTH), nullable=False)
 
 
+@cacheable(ttl=30)
+class CachedTestModel(DB.Model):  # type: ignore
+    """Test model class opted into the query cache."""
+
+    __tablename__ = "cachedtest"
+
+    id = DB.Column(DB.Integer, primary_key=True)
+    name = DB.Column(DB.String(length=NAME_MAX_LENGTH), nullable=False)
+
+
+@auto_coerce("id")
+class CoercedTestModel(DB.Model):  # type: ignore
+    """Test model class coercing the values assigned to its ID."""
+
+    __tablename__ = "coercedtest"
+
+    id = DB.Column(UUIDType(binary=False), primary_key=True, default=uuid.uuid4)
+    parent_id = DB.Column(UUIDType(binary=False), nullable=True)
+
+
+class StampedTestModel(DB.Model):  # type: ignore
+    """Test model class with values generated by the database."""
+
+    __tablename__ = "stampedtest"
+    __mapper_args__ = {"eager_defaults": True}
+
+    id = DB.Column(DB.Integer, primary_key=True)
+    name = DB.Column(DB.String(length=NAME_MAX_LENGTH), nullable=False)
+    stamp = DB.Column(DB.String(length=NAME_MAX_LENGTH), nullable=False, server_default="generated")
+
+
 class DatabaseTestSchema(AutoSchema):
     """Automatically generate schema from 'DatabaseTestModel'."""
 
@@ -70,6 +149,19 @@ class DatabaseTestSchema(AutoSchema):
     name = field_for(DatabaseTestModel, "name", required=True, validate=NAME_VALIDATOR)
 
 
+class DatabaseTestUpsertSchema(DatabaseTestSchema):
+    """Schema for upserting 'DatabaseTestModel' items by ID."""
+
+    id = field_for(DatabaseTestModel, "id", required=True)
+
+
+class StampedTestSchema(AutoSchema):
+    """Automatically generate schema from 'StampedTestModel'."""
+
+    class Meta(AutoSchema.Meta):
+        model = StampedTestModel
+
+
 class DatabaseTestQueryArgsSchema(Schema):
     """A schema for filtering 'DatabaseTestSchema'."""
 
@@ -96,6 +188,144 @@ class DatabaseTestView(MethodView):
         return item
 
 
+@BLP.route("/bulk")
+class DatabaseTestBulkView(MethodView):
+    @BLP.bulk_arguments(DatabaseTestSchema, max_items=10)
+    @BLP.response(201)
+    def post(self, new_items):
+        count = bulk_insert(DatabaseTestModel, new_items)
+        DB.session.commit()
+
+        return {"count": count}
+
+    @BLP.bulk_arguments(DatabaseTestUpsertSchema(), max_items=10)
+    @BLP.response(200)
+    def put(self, items):
+        count = bulk_upsert(DatabaseTestModel, items)
+        DB.session.commit()
+
+        return {"count": count}
+
+
+@BLP.route("/nplusone")
+class DatabaseTestNPlusOneView(MethodView):
+    @BLP.response(200, DatabaseTestSchema(many=True))
+    def get(self):
+        items = [DatabaseTestModel.query.filter_by(id=item.id).one() for item in DatabaseTestModel.query.all()]
+        stats = get_request_query_stats()
+        assert stats is not None and stats.count == len(items) + 1
+
+        return items
+
+
+@BLP.route("/keyset")
+class DatabaseTestKeysetView(MethodView):
+    @BLP.arguments(DatabaseTestQueryArgsSchema, location="query")
+    @BLP.response(200, DatabaseTestSchema(many=True))
+    @BLP.paginate(SQLKeysetPage, page_size=2)
+    def get(self, args):
+        return DatabaseTestModel.query.filter_by(**args).order_by(DatabaseTestModel.name.desc())  # noqa
+
+
+@BLP.route("/keyset/unsupported")
+class DatabaseTestKeysetUnsupportedView(MethodView):
+    @BLP.response(200, DatabaseTestSchema(many=True))
+    @BLP.paginate(SQLKeysetPage)
+    def get(self):
+        return DatabaseTestModel.query.order_by(DB.func.lower(DatabaseTestModel.name))  # noqa
+
+
+@BLP.route("/limited/rows")
+@BLP.db_limits(statement_timeout=1, max_rows=2)
+def database_test_limited_rows():
+    query = DatabaseTestModel.query.order_by(DatabaseTestModel.name)
+
+    if "limit" in flask.request.args:
+        query = query.limit(int(flask.request.args["limit"]))
+
+    return DatabaseTestSchema(many=True).dump(query.all())
+
+
+@BLP.route("/limited/slow")
+@BLP.db_limits(statement_timeout=0.05)
+def database_test_limited_slow():
+    return {"count": DB.session.execute(text(SLOW_STATEMENT)).scalar()}
+
+
+@BLP.route("/limited/broken")
+@BLP.db_limits(statement_timeout=0.05)
+def database_test_limited_broken():
+    return {"count": DB.session.execute(text("SELECT count(*) FROM missing")).scalar()}
+
+
+@BLP.route("/stream")
+@BLP.stream_response(200, DatabaseTestSchema, chunk_size=2)
+def database_test_stream():
+    return DatabaseTestModel.query.filter(DatabaseTestModel.name != flask.request.args.get("exclude")).order_by(
+        DatabaseTestModel.name
+    )
+
+
+@BLP.route("/stream/select")
+@BLP.stream_response(200, DatabaseTestSchema(), chunk_size=2)
+def database_test_stream_select():
+    return select(DatabaseTestModel).order_by(DatabaseTestModel.name.desc()), 206, {"X-Streamed": "yes"}
+
+
+@BLP.route("/stream/limited")
+@BLP.db_limits(max_rows=2)
+@BLP.stream_response(200, DatabaseTestSchema, chunk_size=1)
+def database_test_stream_limited():
+    query = DatabaseTestModel.query.order_by(DatabaseTestModel.name)
+
+    if "limit" in flask.request.args:
+        query = query.limit(int(flask.request.args["limit"]))
+
+    return query
+
+
+@BLP.route("/stream/slow")
+@BLP.db_limits(statement_timeout=0.05)
+@BLP.stream_response(200, DatabaseTestSchema)
+def database_test_stream_slow():
+    return select(DatabaseTestModel).where(text(f"({SLOW_STATEMENT}) > 0"))
+
+
+@BLP.route("/stamped")
+class StampedTestView(MethodView):
+    @BLP.arguments(StampedTestSchema)
+    @BLP.response(201, StampedTestSchema)
+    def post(self, new_item):
+        item = StampedTestModel(**new_item)
+        DB.session.add(item)
+        DB.session.commit()
+
+        return item
+
+    @BLP.expire_on_commit(False)
+    @BLP.arguments(StampedTestSchema)
+    @BLP.response(201, StampedTestSchema)
+    def put(self, new_item):
+        item = StampedTestModel(**new_item)
+        DB.session.add(item)
+        DB.session.commit()
+
+        return item
+
+
+@BLP.route("/many")
+@BLP.response(200, DatabaseTestSchema(many=True))
+def database_test_many():
+    return DatabaseTestModel.query.get_many_or_404(flask.request.args["ids"].split(","), description="Invalid items!")
+
+
+@BLP.route("/async/many")
+async def database_test_async_many():
+    return DatabaseTestSchema(many=True).dump(
+        await DatabaseTestModel.query.get_many_or_404_async(flask.request.args["ids"].split(","))
+    )
+
+
 @BLP.route("/first")
 @BLP.etag
 class DatabaseTestViewFirst(MethodView):
@@ -123,6 +353,27 @@ class DatabaseTestViewById(MethodView):
         return item
 
 
+@BLP.route("/async/first")
+async def database_test_async_first():
+    return DatabaseTestSchema().dump(await DatabaseTestModel.query.first_or_404_async(description="Database is empty!"))
+
+
+@BLP.route("/async/<uuid:item_id>")
+async def database_test_async_by_id(item_id):
+    return DatabaseTestSchema().dump(
+        await DatabaseTestModel.query.get_or_404_async(item_id, description="Invalid item!")
+    )
+
+
+@BLP.route("/async/gather")
+async def database_test_async_gather():
+    items = await asyncio.gather(
+        *(DatabaseTestModel.query.get_or_404_async(item_id) for item_id in flask.request.args["ids"].split(","))
+    )
+
+    return DatabaseTestSchema(many=True).dump(items)
+
+
 # ======================================================================================================================
 # Fixtures
 # ======================================================================================================================
@@ -169,6 +420,96 @@ def primed_test_client(
     return db_test_client
 
 
+@pytest.fixture(scope="function")
+def pooled_flask_app_factory(
+    jwt_init_app: Callable[[Flask], None], open_api_client_name: str, mocker: MockerFixture, tmp_path: Path
+) -> Callable[..., Flask]:
+    """Factory for Flask apps backed by a SQLite database file so that a connection pool is used."""
+
+    mocker.patch("flask_ligand.extensions.jwt.init_app", side_effect=jwt_init_app)
+
+    def _pooled_flask_app(**kwargs: Any) -> Flask:
+        app, _ = create_app(
+            flask_app_name="flask_ligand_unit_testing",
+            flask_env="testing",
+            api_title="Flask Ligand Unit Testing Service",
+            api_version="1.0.1",
+            openapi_client_name=open_api_client_name,
+            **{"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'pool.db'}", **kwargs},
+        )
+
+        return app
+
+    return _pooled_flask_app
+
+
+@pytest.fixture(scope="function")
+def replicated_flask_app_factory(
+    pooled_flask_app_factory: Callable[..., Flask], tmp_path: Path
+) -> Callable[..., Flask]:
+    """Factory for Flask apps with two read replicas, each holding a single item named after the database."""
+
+    def _replicated_flask_app(**kwargs: Any) -> Flask:
+        replica_uris = [f"sqlite:///{tmp_path / f'replica_{i}.db'}" for i in range(2)]
+        app = pooled_flask_app_factory(SQLALCHEMY_REPLICA_URIS=replica_uris, **kwargs)
+
+        with app.app_context():
+            DB.create_all()
+            DB.session.add(DatabaseTestModel(name="primary"))
+            DB.session.commit()
+
+            for i in range(2):
+                engine = DB.engines[f"{REPLICA_BIND_KEY_PREFIX}{i}"]
+                DB.metadata.create_all(engine)
+
+                with engine.begin() as conn:
+                    conn.execute(insert(DatabaseTestModel).values(id=uuid.uuid4(), name=f"replica_{i}"))
+
+        return app
+
+    return _replicated_flask_app
+
+
+@pytest.fixture(scope="function")
+def cached_test_app(basic_flask_app: tuple[Flask, Api]) -> Iterator[tuple[Flask, list[str]]]:
+    """App context with two cached test items committed, yielding the app and the SQL statements executed after."""
+
+    statements: list[str] = []
+
+    with basic_flask_app[0].app_context():
+        DB.session.add_all([CachedTestModel(id=1, name="first"), CachedTestModel(id=2, name="second")])
+        DB.session.commit()
+        DB.session.remove()
+
+        event.listen(DB.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        yield basic_flask_app[0], statements
+
+
+@pytest.fixture(scope="function")
+def many_test_app(basic_flask_app: tuple[Flask, Api]) -> Iterator[tuple[list[uuid.UUID], list[str]]]:
+    """App context with three test items committed, yielding their IDs and the SQL statements executed after."""
+
+    statements: list[str] = []
+
+    with basic_flask_app[0].app_context():
+        items = [DatabaseTestModel(name=f"many_{i}") for i in range(3)]
+        DB.session.add_all(items)
+        DB.session.commit()
+        ids = [item.id for item in items]
+        DB.session.remove()
+
+        event.listen(DB.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        yield ids, statements
+
+
+def _read_names() -> list[str]:
+    """Read the names of the items through the routing session."""
+
+    return [item.name for item in DatabaseTestModel.query.all()]
+
+
 # ======================================================================================================================
 # Test Suites
 # ======================================================================================================================
@@ -213,6 +554,7 @@ class TestDatabaseExtension(object):
 
             assert helpers.loads(ret.headers["X-Pagination"])["total"] == 3
             assert helpers.loads(ret.headers["X-Pagination"])["total_pages"] == 2
+            assert helpers.loads(ret.headers["X-Pagination"])["total_exact"]
 
     def test_filter_by_name(self, primed_test_client, db_test_url, db_test_data_set, helpers):
         """Verify that an item can be retrieved by name."""
@@ -237,6 +579,17 @@ class TestDatabaseExtension(object):
             assert ret.status_code == 200
             assert helpers.is_sub_dict(item_exp, ret.json)
 
+    def test_get_items_async(self, primed_test_client, db_test_url):
+        """Verify that items can be retrieved from 'async def' views."""
+
+        with primed_test_client.get(f"{db_test_url}async/first") as ret:
+            assert ret.status_code == 200
+            item_id = ret.json["id"]  # noqa
+
+        with primed_test_client.get(f"{db_test_url}async/{item_id}") as ret:
+            assert ret.status_code == 200
+            assert ret.json["id"] == item_id  # noqa
+
 
 class TestNegativeDatabaseExtension(object):
     """Negative test cases for creating DB models and auto-schemas."""
@@ -279,3 +632,1352 @@ class TestNegativeDatabaseExtension(object):
 
         with db_test_client.get(f"{db_test_url}first") as ret:
             assert ret.status_code == 404
+
+    def test_get_items_async_not_found(self, db_test_client, db_test_url, dummy_id):
+        """Verify that the correct HTTP code and message are returned from 'async def' views."""
+
+        with db_test_client.get(f"{db_test_url}async/first") as ret:
+            assert ret.status_code == 404
+            assert ret.json["message"] == "Database is empty!"  # noqa
+
+        with db_test_client.get(f"{db_test_url}async/{dummy_id}") as ret:
+            assert ret.status_code == 404
+            assert ret.json["message"] == "Invalid item!"  # noqa
+
+
+class TestBulkOperations(object):
+    """Test cases for the bulk write helpers."""
+
+    def test_bulk_insert(self, db_test_client, db_test_url, basic_flask_app):
+        """Verify that a list payload is inserted with a single statement."""
+
+        statements = []
+        items = [{"name": f"bulk_{i}"} for i in range(5)]
+
+        with basic_flask_app[0].app_context():
+            event.listen(DB.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        with db_test_client.post(f"{db_test_url}bulk", json=items) as ret:
+            assert ret.status_code == 201
+            assert ret.json == {"count": 5}
+
+        assert len([statement for statement in statements if statement.startswith("INSERT")]) == 1
+
+        with db_test_client.get(f"{db_test_url}?page_size=10") as ret:
+            assert sorted(item["name"] for item in ret.json) == [item["name"] for item in items]
+            assert all(item["id"] for item in ret.json)
+
+    def test_bulk_upsert(self, primed_test_client, db_test_url):
+        """Verify that existing items are updated and new items are inserted."""
+
+        existing = primed_test_client.get(db_test_url).json[0]
+        new_id = str(uuid.uuid4())
+        items = [{"id": existing["id"], "name": "upserted"}, {"id": new_id, "name": "inserted"}]
+
+        with primed_test_client.put(f"{db_test_url}bulk", json=items) as ret:
+            assert ret.status_code == 200
+
+        assert primed_test_client.get(f"{db_test_url}{existing['id']}").json["name"] == "upserted"
+        assert primed_test_client.get(f"{db_test_url}{new_id}").json["name"] == "inserted"
+        assert len(primed_test_client.get(db_test_url).json) == 4
+
+    def test_bulk_update_and_delete(self, primed_test_client, db_test_url, basic_flask_app):
+        """Verify that items are updated and deleted by primary key in batches."""
+
+        ids = [uuid.UUID(item["id"]) for item in primed_test_client.get(db_test_url).json]
+
+        with basic_flask_app[0].app_context():
+            assert bulk_update(DatabaseTestModel, [{"id": ids[0], "name": "updated"}]) == 1
+            assert bulk_delete(DatabaseTestModel, ids[1:] + [uuid.uuid4()], batch_size=1) == 2
+            DB.session.commit()
+
+            assert [item.name for item in DatabaseTestModel.query.all()] == ["updated"]
+
+
+class TestNegativeBulkOperations(object):
+    """Negative test cases for the bulk write helpers."""
+
+    def test_errors_for_every_item(self, db_test_client, db_test_url):
+        """Verify that the validation errors of every invalid item are reported in a single response."""
+
+        items = [{"name": "valid"}, {"name": ""}, {"name": "valid"}, {"not": "valid"}]
+
+        with db_test_client.post(f"{db_test_url}bulk", json=items) as ret:
+            assert ret.status_code == 422
+            assert sorted(ret.json["errors"]["json"]) == ["1", "3"]  # noqa
+
+        assert db_test_client.get(db_test_url).json == []
+
+    def test_too_many_items(self, db_test_client, db_test_url):
+        """Verify that payloads holding too many items are rejected."""
+
+        with db_test_client.post(f"{db_test_url}bulk", json=[{"name": "item"}] * 11) as ret:
+            assert ret.status_code == 413
+
+    def test_upsert_unsupported_dialect(self, basic_flask_app, mocker):
+        """Verify that upserts for dialects without an upsert statement are reported."""
+
+        with basic_flask_app[0].app_context():
+            mocker.patch.object(DB.engine.dialect, "name", "mssql")
+
+            with pytest.raises(RuntimeError, match="'mssql' database dialect"):
+                bulk_upsert(DatabaseTestModel, [{"id": uuid.uuid4(), "name": "item"}])
+
+
+class TestQueryCache(object):
+    """Test cases for the query cache of cacheable models."""
+
+    def test_get_across_sessions(self, cached_test_app):
+        """Verify that rows looked up by primary key are served from the cache in later sessions."""
+
+        _, statements = cached_test_app
+
+        assert CachedTestModel.query.get_or_404(1).name == "first"
+        DB.session.remove()
+
+        item = CachedTestModel.query.get(1)
+
+        assert item.name == "first"
+        assert CachedTestModel.query.get(1) is item
+        assert item in DB.session
+
+        assert len(statements) == 1
+        assert get_query_cache_stats()["CachedTestModel"].hit_rate == 0.5
+
+    def test_get_invalidated_on_commit(self, cached_test_app):
+        """Verify that a committed change invalidates the cached row."""
+
+        _, statements = cached_test_app
+
+        CachedTestModel.query.get(1).name = "changed"
+        DB.session.commit()
+        DB.session.remove()
+
+        assert CachedTestModel.query.get(1).name == "changed"
+        assert len(statements) == 3  # Load, update and reload.
+
+        # Adding the items of the fixture was the first invalidation.
+        assert get_query_cache_stats()["CachedTestModel"].invalidations == 2
+
+    def test_get_non_canonical_key_invalidated_on_commit(self, cached_test_app):
+        """Verify that a row looked up with a key of another type is invalidated by a committed change as well."""
+
+        assert CachedTestModel.query.get("1").name == "first"
+        DB.session.remove()
+
+        CachedTestModel.query.get(1).name = "changed"
+        DB.session.commit()
+        DB.session.remove()
+
+        assert CachedTestModel.query.get("1").name == "changed"
+
+    def test_rollback_keeps_cache(self, cached_test_app):
+        """Verify that changes which are rolled back do not invalidate the cached row."""
+
+        _, statements = cached_test_app
+
+        CachedTestModel.query.get(1).name = "changed"
+        DB.session.flush()
+        DB.session.rollback()
+        DB.session.remove()
+
+        assert CachedTestModel.query.get(1).name == "first"
+        assert get_query_cache_stats()["CachedTestModel"].hits == 1
+
+    def test_declared_query(self, cached_test_app):
+        """Verify that declared queries are cached until any row of the model changes."""
+
+        _, statements = cached_test_app
+        query = CachedTestModel.query.filter_by(name="second").cache
+
+        assert query().first_or_404().id == 2
+        DB.session.remove()
+        assert query().first_or_404().id == 2
+        assert [item.id for item in CachedTestModel.query.order_by(CachedTestModel.id).cache().all()] == [1, 2]
+        assert len(statements) == 2
+
+        DB.session.add(CachedTestModel(id=3, name="second"))
+        DB.session.commit()
+        DB.session.remove()
+
+        assert len(CachedTestModel.query.filter_by(name="second").cache().all()) == 2
+
+    def test_bulk_statement_invalidates_model(self, cached_test_app):
+        """Verify that bulk statements invalidate every cached row of the model."""
+
+        CachedTestModel.query.get(1)
+        DB.session.remove()
+
+        bulk_update(CachedTestModel, [{"id": 1, "name": "bulk"}])
+        DB.session.commit()
+        DB.session.remove()
+
+        assert CachedTestModel.query.get(1).name == "bulk"
+
+    def test_shared_backend(self, cached_test_app, mocker):
+        """Verify that a configured backend stores the cached rows."""
+
+        app, _ = cached_test_app
+        backend = mocker.MagicMock(get=mocker.MagicMock(return_value=None))
+        app.extensions["flask_ligand_query_cache"].backend = backend
+
+        CachedTestModel.query.get(1)
+
+        assert any(call.args[1] == {"id": 1, "name": "first"} for call in backend.set.call_args_list)
+
+
+class TestNegativeQueryCache(object):
+    """Negative test cases for the query cache of cacheable models."""
+
+    def test_pending_changes_bypass_cache(self, cached_test_app):
+        """Verify that the cache is not used while the session holds changes to the model."""
+
+        _, statements = cached_test_app
+
+        CachedTestModel.query.get(1)
+        DB.session.remove()
+
+        DB.session.add(CachedTestModel(id=3, name="third"))
+        assert CachedTestModel.query.get(1).name == "first"
+        assert get_query_cache_stats()["CachedTestModel"].hits == 0
+
+    def test_not_cacheable(self, primed_test_client, basic_flask_app):
+        """Verify that models which are not cacheable and undeclared queries are not cached."""
+
+        with basic_flask_app[0].app_context():
+            DatabaseTestModel.query.first()
+            CachedTestModel.query.first()
+
+            assert get_query_cache_stats() == {}
+
+
+class TestQueryStats(object):
+    """Test cases for the per-request SQL statement statistics."""
+
+    def test_stats_header(self, primed_test_client, db_test_url, helpers):
+        """Verify that the statements of a request are reported in a response header."""
+
+        with primed_test_client.get(f"{db_test_url}first") as ret:
+            stats = helpers.loads(ret.headers["X-DB-Queries"])
+
+            assert (stats["count"], stats["repeated"]) == (1, 0)
+            assert stats["time_ms"] >= 0
+
+    @pytest.mark.parametrize("enabled", [True, False])
+    def test_stats_header_exposed(self, pooled_flask_app_factory, enabled):
+        """Verify that the statistics header is exposed to cross-origin clients only while it is reported."""
+
+        app = pooled_flask_app_factory(DB_QUERY_STATS=enabled)
+
+        with app.test_client().get("/", headers={"Origin": "http://other.origin"}) as ret:
+            exposed = ret.headers["Access-Control-Expose-Headers"].split(", ")
+
+        assert ("x-db-queries" in exposed) is enabled
+        assert {"x-pagination", "etag"} <= set(exposed)
+
+    def test_n_plus_one_detected(self, basic_flask_app, primed_test_client, db_test_url, helpers, caplog):
+        """Verify that repeated statements are reported and logged as possible N+1 queries."""
+
+        basic_flask_app[0].config["DB_N_PLUS_ONE_THRESHOLD"] = 3
+
+        with primed_test_client.get(f"{db_test_url}nplusone") as ret:
+            assert ret.status_code == 200
+            stats = helpers.loads(ret.headers["X-DB-Queries"])
+
+            assert (stats["count"], stats["repeated"]) == (4, 1)
+
+        assert (
+            "Possible N+1 queries in the 'DB TEST.DatabaseTestNPlusOneView' endpoint, executed 3 times" in caplog.text
+        )
+
+    def test_disabled(self, pooled_flask_app_factory):
+        """Verify that statements are not counted or reported unless enabled."""
+
+        app = pooled_flask_app_factory(DB_QUERY_STATS=False)
+
+        with app.test_client() as client, client.get("/apidocs") as ret:
+            assert "X-DB-Queries" not in ret.headers
+
+
+class TestNegativeQueryStats(object):
+    """Negative test cases for the per-request SQL statement statistics."""
+
+    def test_query_budget_exceeded(self, basic_flask_app, primed_test_client, db_test_url):
+        """Verify that requests executing more statements than the query budget fail."""
+
+        basic_flask_app[0].config["DB_QUERY_BUDGET"] = 3
+
+        with pytest.raises(RuntimeError, match="executed 4 SQL statements which exceeds the query budget of 3"):
+            primed_test_client.get(f"{db_test_url}nplusone")
+
+    def test_query_budget_exceeded_in_production(self, basic_flask_app, primed_test_client, db_test_url, caplog):
+        """Verify that exceeding the query budget outside of testing and debug mode is only logged."""
+
+        basic_flask_app[0].config["DB_QUERY_BUDGET"] = 3
+        basic_flask_app[0].testing = False
+
+        with primed_test_client.get(f"{db_test_url}nplusone") as ret:
+            assert ret.status_code == 200
+
+        assert "exceeds the query budget of 3" in caplog.text
+
+
+class TestSlowQueryLog(object):
+    """Test cases for the slow query log."""
+
+    def test_slow_query_logged_with_plan(self, pooled_flask_app_factory, caplog):
+        """Verify that slow statements are logged with their parameter types and a query plan."""
+
+        app = pooled_flask_app_factory(DB_SLOW_QUERY_THRESHOLD=0, DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE=1)
+        slow_query_log = app.extensions[SLOW_QUERY_LOG_EXTENSION]
+
+        with app.app_context():
+            DB.session.execute(text("SELECT :value"), {"value": "secret"})
+            slow_query_log._queue.join()
+
+        assert "Slow query" in caplog.text
+        assert "('str',): SELECT ?" in caplog.text
+        assert "secret" not in caplog.text
+        assert "Query plan of a slow query in the 'None' endpoint" in caplog.text
+
+    def test_plan_rate_limited(self, pooled_flask_app_factory, caplog):
+        """Verify that the query plan of the same statement is only captured once per interval."""
+
+        app = pooled_flask_app_factory(DB_SLOW_QUERY_THRESHOLD=0, DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE=1)
+        slow_query_log = app.extensions[SLOW_QUERY_LOG_EXTENSION]
+
+        with app.app_context():
+            for _ in range(3):
+                DB.session.execute(text("SELECT 1"))
+                slow_query_log._queue.join()
+
+        assert caplog.text.count("with parameters (): SELECT 1\n") == 3
+        assert caplog.text.count("Query plan of a slow query") == 1
+
+    def test_plans_rate_limited_overall(self, pooled_flask_app_factory, caplog):
+        """Verify that query plans of distinct statements are captured no more often than the overall rate limit."""
+
+        app = pooled_flask_app_factory(
+            DB_SLOW_QUERY_THRESHOLD=0, DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE=1, DB_SLOW_QUERY_EXPLAIN_RATE_LIMIT=1
+        )
+        slow_query_log = app.extensions[SLOW_QUERY_LOG_EXTENSION]
+
+        with app.app_context():
+            for i in range(3):
+                DB.session.execute(text(f"SELECT {i}"))
+
+            slow_query_log._queue.join()
+
+        assert caplog.text.count("Query plan of a slow query") == 1
+
+    def test_plans_captured_outside_pool(self, pooled_flask_app_factory):
+        """Verify that query plans are captured on a dedicated engine rather than on a connection of the pool."""
+
+        app = pooled_flask_app_factory(DB_SLOW_QUERY_THRESHOLD=0, DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE=1)
+        slow_query_log = app.extensions[SLOW_QUERY_LOG_EXTENSION]
+
+        with app.app_context():
+            DB.session.execute(text("SELECT 1"))
+            slow_query_log._queue.join()
+
+            assert isinstance(slow_query_log._explain_engine(DB.engine).pool, NullPool)
+            metrics = get_pool_metrics()
+
+        assert metrics is not None
+        assert metrics.checkouts == 1
+
+    def test_plan_not_sampled(self, pooled_flask_app_factory, caplog):
+        """Verify that no query plan is captured for slow statements that are not sampled."""
+
+        app = pooled_flask_app_factory(DB_SLOW_QUERY_THRESHOLD=0, DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE=0)
+
+        with app.app_context():
+            DB.session.execute(text("SELECT 1"))
+
+        assert "Slow query" in caplog.text
+        assert app.extensions[SLOW_QUERY_LOG_EXTENSION]._worker is None
+
+    def test_disabled(self, pooled_flask_app_factory, caplog):
+        """Verify that nothing is logged when no threshold is set."""
+
+        app = pooled_flask_app_factory()
+
+        with app.app_context():
+            DB.session.execute(text("SELECT 1"))
+
+        assert SLOW_QUERY_LOG_EXTENSION not in app.extensions
+        assert "Slow query" not in caplog.text
+
+
+class TestNegativeSlowQueryLog(object):
+    """Negative test cases for the slow query log."""
+
+    def test_plan_capture_failure(self, pooled_flask_app_factory, mocker, caplog):
+        """Verify that failing to capture a query plan is logged instead of raised."""
+
+        app = pooled_flask_app_factory(DB_SLOW_QUERY_THRESHOLD=0, DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE=1)
+        slow_query_log = app.extensions[SLOW_QUERY_LOG_EXTENSION]
+        slow_query_log.explain_spacing = 0
+
+        with app.app_context():
+            DB.session.execute(text("SELECT 1"))
+            slow_query_log._queue.join()
+
+            mocker.patch.object(slow_query_log, "_explain_engine", side_effect=RuntimeError("Boom!"))
+            DB.session.execute(text("SELECT 2"))
+            slow_query_log._queue.join()
+
+        assert "Failed to capture the query plan of a slow query in the 'None' endpoint: Boom!" in caplog.text
+
+    def test_pending_plans_bounded(self, pooled_flask_app_factory, mocker):
+        """Verify that slow statements arriving while the queue of query plans is full do not queue more plans."""
+
+        app = pooled_flask_app_factory(
+            DB_SLOW_QUERY_THRESHOLD=0, DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE=1, DB_SLOW_QUERY_EXPLAIN_RATE_LIMIT=0
+        )
+        slow_query_log = app.extensions[SLOW_QUERY_LOG_EXTENSION]
+        slow_query_log.explain_spacing = 0
+        release = threading.Event()
+        explain = mocker.patch.object(slow_query_log, "_explain", side_effect=lambda *_: release.wait(5))
+
+        with app.app_context():
+            for i in range(slow_query_log.EXPLAIN_QUEUE_SIZE * 2):
+                DB.session.execute(text(f"SELECT {i}"))
+
+            assert slow_query_log._queue.qsize() <= slow_query_log.EXPLAIN_QUEUE_SIZE
+
+            release.set()
+            slow_query_log._queue.join()
+
+        assert explain.call_count <= slow_query_log.EXPLAIN_QUEUE_SIZE + 1
+
+
+class TestAutoUpgrade(object):
+    """Test cases for upgrading the database automatically upon start-up."""
+
+    def test_upgrade_once(self, pooled_flask_app_factory, mocker):
+        """Verify that the database is upgraded once and later start-ups skip the upgrade."""
+
+        upgrade_spy = mocker.spy(database, "upgrade")
+
+        for _ in range(2):
+            app = pooled_flask_app_factory(DB_AUTO_UPGRADE=True, DB_MIGRATION_DIR=str(MIGRATION_DIRECTORY))
+
+        upgrade_spy.assert_called_once()
+
+        with app.app_context():
+            assert DB.session.execute(text("SELECT version_num FROM alembic_version")).scalar() == "47f10265b5d7"
+
+
+class TestNegativeAutoUpgrade(object):
+    """Negative test cases for upgrading the database automatically upon start-up."""
+
+    def test_lock_timeout(self, pooled_flask_app_factory, mocker, tmp_path):
+        """Verify that start-up fails if another process holds the upgrade lock for too long."""
+
+        upgrade_spy = mocker.spy(database, "upgrade")
+
+        with closing(
+            sqlite3.connect(tmp_path / f"pool.db.{AUTO_UPGRADE_LOCK_NAME}.lock", isolation_level=None)
+        ) as lock:
+            lock.execute("BEGIN EXCLUSIVE")
+
+            with pytest.raises(RuntimeError, match="waiting for another process to upgrade the database"):
+                pooled_flask_app_factory(
+                    DB_AUTO_UPGRADE=True, DB_MIGRATION_DIR=str(MIGRATION_DIRECTORY), DB_AUTO_UPGRADE_LOCK_TIMEOUT=0.1
+                )
+
+        upgrade_spy.assert_not_called()
+
+
+class TestAsyncSession(object):
+    """Test cases for the async engine and sessions."""
+
+    @pytest.fixture(scope="function")
+    def async_flask_app(self, pooled_flask_app_factory: Callable[..., Flask]) -> Iterator[Flask]:
+        """A Flask app with async database support and three items, yielded within an app context."""
+
+        app = pooled_flask_app_factory(DB_ASYNC=True)
+
+        with app.app_context():
+            DB.create_all()
+            DB.session.add_all(DatabaseTestModel(name=name) for name in ("a", "b", "c"))
+            DB.session.commit()
+
+            yield app
+
+    def test_derived_uri(self, async_flask_app):
+        """Verify that the async engine uses the async driver for the database of the app."""
+
+        assert get_async_engine().url.drivername == "sqlite+aiosqlite"
+        assert get_async_engine().url.database == DB.engine.url.database
+
+    def test_derived_uri_relative_path(self, pooled_flask_app_factory, tmp_path, mocker):
+        """Verify that a relative SQLite path is resolved against the instance folder like the regular engine."""
+
+        mocker.patch.object(flask.Flask, "auto_find_instance_path", return_value=str(tmp_path / "instance"))
+        app = pooled_flask_app_factory(DB_ASYNC=True, SQLALCHEMY_DATABASE_URI="sqlite:///relative.db")
+
+        with app.app_context():
+            assert get_async_engine().url.database == str(tmp_path / "instance" / "relative.db")
+            assert get_async_engine().url.database == DB.engine.url.database
+
+    def test_concurrent_queries(self, async_flask_app):
+        """Verify that independent queries can run concurrently in sessions of their own."""
+
+        async def count(statement):
+            async with async_session() as session:
+                return await session.scalar(statement)
+
+        async def fan_out():
+            return await asyncio.gather(
+                count(select(func.count()).select_from(DatabaseTestModel)),
+                count(select(func.count()).select_from(DatabaseTestModel).where(DatabaseTestModel.name != "a")),
+            )
+
+        assert asyncio.run(fan_out()) == [3, 2]
+
+    def test_get_or_404(self, async_flask_app):
+        """Verify that items are looked up by primary key with the regular models."""
+
+        item = DatabaseTestModel.query.filter_by(name="b").one()
+
+        async def get():
+            async with async_session() as session:
+                return await session.get_or_404(DatabaseTestModel, item.id)
+
+        assert asyncio.run(get()).name == "b"
+
+    def test_first_or_404(self, async_flask_app):
+        """Verify that the first item found by a select statement is returned."""
+
+        async def first():
+            async with async_session() as session:
+                return await session.first_or_404(select(DatabaseTestModel).order_by(DatabaseTestModel.name.desc()))
+
+        assert asyncio.run(first()).name == "c"
+
+
+class TestNegativeAsyncSession(object):
+    """Negative test cases for the async engine and sessions."""
+
+    def test_get_or_404_missing(self, pooled_flask_app_factory):
+        """Verify that looking up a missing item aborts with the customized 404 error message."""
+
+        app = pooled_flask_app_factory(DB_ASYNC=True)
+
+        async def get():
+            async with async_session() as session:
+                return await session.get_or_404(DatabaseTestModel, uuid.uuid4(), description="Missing item!")
+
+        with app.app_context():
+            DB.create_all()
+
+            with pytest.raises(HTTPException) as e:
+                asyncio.run(get())
+
+        response = e.value.response
+        assert isinstance(response, flask.Response)
+        assert response.status_code == 404
+        assert response.json is not None and response.json["message"] == "Missing item!"
+
+    def test_first_or_404_missing(self, pooled_flask_app_factory):
+        """Verify that a select statement finding nothing aborts with the default 404 error message."""
+
+        app = pooled_flask_app_factory(DB_ASYNC=True)
+
+        async def first():
+            async with async_session() as session:
+                return await session.first_or_404(select(DatabaseTestModel))
+
+        with app.app_context():
+            DB.create_all()
+
+            with pytest.raises(HTTPException) as e:
+                asyncio.run(first())
+
+        response = e.value.response
+        assert isinstance(response, flask.Response)
+        assert response.json is not None and response.json["message"] == "Not Found"
+
+    def test_memory_database(self, pooled_flask_app_factory):
+        """Verify that an in-memory SQLite database is not shared with the async engine."""
+
+        with pytest.raises(RuntimeError, match="in-memory SQLite database cannot be shared"):
+            pooled_flask_app_factory(DB_ASYNC=True, SQLALCHEMY_DATABASE_URI="sqlite://")
+
+    def test_not_enabled(self, pooled_flask_app_factory):
+        """Verify that async sessions cannot be opened unless async database support is enabled."""
+
+        with pooled_flask_app_factory().app_context():
+            with pytest.raises(RuntimeError, match="Async database support is not enabled"):
+                async_session()
+
+
+class TestDBLimits(object):
+    """Test cases for the statement timeouts and row limits of routes."""
+
+    def test_within_limits(self, basic_flask_app, primed_test_client, db_test_url):
+        """Verify that requests within their limits are served as usual."""
+
+        with primed_test_client.get(f"{db_test_url}limited/rows?limit=2") as ret:
+            assert ret.status_code == 200
+            assert [item["name"] for item in ret.json] == ["test_name_0", "test_name_1"]
+
+        with basic_flask_app[0].app_context():
+            assert get_db_limit_stats() == DBLimitStats()
+
+    def test_max_rows_exceeded(self, basic_flask_app, primed_test_client, db_test_url):
+        """Verify that loading more rows than allowed aborts with 413 and is counted."""
+
+        with primed_test_client.get(f"{db_test_url}limited/rows") as ret:
+            assert ret.status_code == 413
+            assert ret.json["message"] == "The request matches more than 2 rows!"
+
+        with basic_flask_app[0].app_context():
+            assert get_db_limit_stats() == DBLimitStats(row_limits=1)
+
+    def test_statement_timeout(self, basic_flask_app, primed_test_client, db_test_url):
+        """Verify that a statement running longer than its timeout is interrupted, aborts with 503 and is counted."""
+
+        start = time.monotonic()
+
+        with primed_test_client.get(f"{db_test_url}limited/slow") as ret:
+            assert ret.status_code == 503
+            assert ret.json["message"] == "The database did not respond in time!"
+
+        assert time.monotonic() - start < 5
+        with basic_flask_app[0].app_context():
+            assert get_db_limit_stats() == DBLimitStats(statement_timeouts=1)
+
+        # Statements of routes without a timeout are not interrupted.
+        with primed_test_client.get(db_test_url) as ret:
+            assert ret.status_code == 200
+
+    def test_blueprint_limits(self, basic_flask_app, db_test_client):
+        """Verify that the limits of a Blueprint apply to every route of it."""
+
+        blp = Blueprint("DB LIMITS TEST", __name__, url_prefix="/limits", max_rows=1)
+
+        @blp.route("/")
+        def database_limits_test():
+            return DatabaseTestSchema(many=True).dump(DatabaseTestModel.query.all())
+
+        basic_flask_app[1].register_blueprint(blp)
+
+        with basic_flask_app[0].app_context():
+            DB.session.add_all(DatabaseTestModel(name=name) for name in ("a", "b"))
+            DB.session.commit()
+
+        with db_test_client.get("/limits/") as ret:
+            assert ret.status_code == 413
+
+    def test_statement_timeout_listener_registered_on_demand(self, basic_flask_app):
+        """Verify that statements are only inspected once a Blueprint declaring statement timeouts is registered."""
+
+        app, api = basic_flask_app
+
+        with app.app_context():
+            assert not event.contains(DB.engine, "before_cursor_execute", database._apply_statement_timeout)
+
+        api.register_blueprint(BLP)
+
+        with app.app_context():
+            assert event.contains(DB.engine, "before_cursor_execute", database._apply_statement_timeout)
+
+    def test_transaction_scoped_timeout_forgotten(self, basic_flask_app, db_test_client):
+        """Verify that the transaction scoped statement timeout of a connection is forgotten once the transaction
+        ends."""
+
+        with basic_flask_app[0].app_context():
+            for end in ("commit", "rollback"):
+                with DB.engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+                    conn.info[database._STATEMENT_TIMEOUT_KEY] = 1.0
+                    getattr(conn, end)()
+
+                    assert database._STATEMENT_TIMEOUT_KEY not in conn.info
+
+
+class TestNegativeDBLimits(object):
+    """Negative test cases for the statement timeouts and row limits of routes."""
+
+    def test_other_errors_raised(self, basic_flask_app, db_test_client, db_test_url):
+        """Verify that database errors other than statement timeouts are not turned into 503 responses."""
+
+        with pytest.raises(OperationalError, match="no such table"):
+            db_test_client.get(f"{db_test_url}limited/broken")
+
+        with basic_flask_app[0].app_context():
+            assert get_db_limit_stats() == DBLimitStats()
+
+
+class TestStreamResponse(object):
+    """Test cases for streaming list responses."""
+
+    def test_query_streamed_in_chunks(self, primed_test_client, db_test_url, db_test_data_set):
+        """Verify that the rows of a query are sent as a JSON array written chunk by chunk."""
+
+        with primed_test_client.get(f"{db_test_url}stream") as ret:
+            assert ret.is_streamed
+            assert ret.status_code == 200
+            assert ret.mimetype == "application/json"
+            assert [item["name"] for item in ret.json] == [item["name"] for item in db_test_data_set]
+
+            # The opening bracket, two chunks and the closing bracket.
+            assert len(list(ret.response)) == 4
+
+    def test_select_streamed(self, primed_test_client, db_test_url, db_test_data_set):
+        """Verify that the rows of a select statement are streamed with the returned status code and headers."""
+
+        with primed_test_client.get(f"{db_test_url}stream/select") as ret:
+            assert ret.status_code == 206
+            assert ret.headers["X-Streamed"] == "yes"
+            assert [item["name"] for item in ret.json] == [item["name"] for item in reversed(db_test_data_set)]
+
+    def test_empty(self, db_test_client, db_test_url):
+        """Verify that an empty result is streamed as an empty JSON array."""
+
+        with db_test_client.get(f"{db_test_url}stream") as ret:
+            assert ret.status_code == 200
+            assert ret.json == []
+
+    def test_within_limits(self, primed_test_client, db_test_url):
+        """Verify that streamed rows within the row limit of the route are sent as usual."""
+
+        with primed_test_client.get(f"{db_test_url}stream/limited?limit=2") as ret:
+            assert ret.status_code == 200
+            assert [item["name"] for item in ret.json] == ["test_name_0", "test_name_1"]
+
+    def test_max_rows_exceeded(self, basic_flask_app, primed_test_client, db_test_url):
+        """Verify that streaming more rows than allowed aborts with 413 before the response starts."""
+
+        with primed_test_client.get(f"{db_test_url}stream/limited") as ret:
+            assert ret.status_code == 413
+            assert ret.json["message"] == "The request matches more than 2 rows!"
+
+        with basic_flask_app[0].app_context():
+            assert get_db_limit_stats() == DBLimitStats(row_limits=1)
+
+    def test_statement_timeout(self, basic_flask_app, primed_test_client, db_test_url):
+        """Verify that a streamed statement running longer than its timeout aborts with 503."""
+
+        with primed_test_client.get(f"{db_test_url}stream/slow") as ret:
+            assert ret.status_code == 503
+            assert ret.json["message"] == "The database did not respond in time!"
+
+        with basic_flask_app[0].app_context():
+            assert get_db_limit_stats() == DBLimitStats(statement_timeouts=1)
+
+    def test_documented(self, basic_flask_app, primed_test_client):
+        """Verify that the streamed response is documented as an array of items."""
+
+        operation = basic_flask_app[1].spec.to_dict()["paths"][f"{DATABASE_TEST_URL}stream"]["get"]
+
+        assert operation["responses"]["200"]["content"]["application/json"]["schema"]["type"] == "array"
+
+
+class TestAutoCoercion(object):
+    """Test cases for coercing the values assigned to model attributes."""
+
+    def test_model_columns_coerced(self, basic_flask_app):
+        """Verify that only the declared columns of models declared 'auto_coerce' are coerced."""
+
+        ident = uuid.uuid4()
+
+        with basic_flask_app[0].app_context():
+            item = CoercedTestModel(id=str(ident), parent_id=str(ident))
+            other = DatabaseTestModel(id=str(ident))
+
+        assert item.id == ident
+        assert item.parent_id == str(ident)
+        assert other.id == str(ident)
+
+    def test_forced_once(self, pooled_flask_app_factory, mocker):
+        """Verify that forced coercion of every model is registered once no matter how many apps are created."""
+
+        mocker.patch.object(database, "_FORCED_AUTO_COERCION", threading.Event())
+        force_auto_coercion_mock = mocker.patch.object(database, "force_auto_coercion")
+
+        for _ in range(2):
+            pooled_flask_app_factory(DB_FORCE_AUTO_COERCION=True)
+
+        force_auto_coercion_mock.assert_called_once_with()
+
+    def test_not_forced_by_default(self, pooled_flask_app_factory, mocker):
+        """Verify that coercion of every model is opt-in."""
+
+        mocker.patch.object(database, "_FORCED_AUTO_COERCION", threading.Event())
+        force_auto_coercion_mock = mocker.patch.object(database, "force_auto_coercion")
+
+        pooled_flask_app_factory()
+
+        force_auto_coercion_mock.assert_not_called()
+
+
+class TestExpireOnCommit(object):
+    """Test cases for controlling whether committing expires the objects of the session."""
+
+    def test_expired_by_default(self, db_test_client, db_test_url, helpers):
+        """Verify that committed objects are reloaded to dump them by default."""
+
+        with db_test_client.post(f"{db_test_url}stamped", json={"name": "expired"}) as ret:
+            assert ret.status_code == 201
+            assert ret.json["stamp"] == "generated"
+            assert helpers.loads(ret.headers["X-DB-Queries"])["count"] == 2
+
+    def test_route_opt_out(self, db_test_client, db_test_url, helpers):
+        """Verify that routes not expiring committed objects dump them including database generated values without
+        reloading them."""
+
+        with db_test_client.put(f"{db_test_url}stamped", json={"name": "kept"}) as ret:
+            assert ret.status_code == 201
+            assert (ret.json["name"], ret.json["stamp"]) == ("kept", "generated")
+            assert helpers.loads(ret.headers["X-DB-Queries"])["count"] == 1
+
+    def test_setting(self, basic_flask_app, db_test_client, db_test_url, helpers):
+        """Verify that the setting controls whether committed objects are expired for every route."""
+
+        basic_flask_app[0].config["DB_EXPIRE_ON_COMMIT"] = False
+
+        with db_test_client.post(f"{db_test_url}stamped", json={"name": "kept"}) as ret:
+            assert ret.json["stamp"] == "generated"
+            assert helpers.loads(ret.headers["X-DB-Queries"])["count"] == 1
+
+    def test_explicit_option(self, basic_flask_app):
+        """Verify that sessions opened with an explicit option ignore the setting."""
+
+        basic_flask_app[0].config["DB_EXPIRE_ON_COMMIT"] = False
+
+        with basic_flask_app[0].app_context():
+            assert DB.session.session_factory().expire_on_commit is False
+            assert DB.session.session_factory(expire_on_commit=True).expire_on_commit is True
+
+    def test_route_option_restored(self, basic_flask_app):
+        """Verify that the session option set for a route is restored once the route returns or raises."""
+
+        seen = []
+
+        @BLP.expire_on_commit(False)
+        def failing_view():
+            seen.append(DB.session().expire_on_commit)
+            raise RuntimeError("Boom!")
+
+        @BLP.expire_on_commit(False)
+        async def async_view():
+            seen.append(DB.session().expire_on_commit)
+
+        with basic_flask_app[0].test_request_context():
+            with pytest.raises(RuntimeError):
+                BLP._apply_db_policies(failing_view)()
+
+            assert DB.session().expire_on_commit is True
+
+            asyncio.run(BLP._apply_db_policies(async_view)())
+
+            assert DB.session().expire_on_commit is True
+
+        assert seen == [False, False]
+
+    def test_eager_defaults_opt_in(self):
+        """Verify that only models opting in fetch the values generated by the database while flushing."""
+
+        assert StampedTestModel.__mapper__.eager_defaults is True
+        assert DatabaseTestModel.__mapper__.eager_defaults == "auto"
+
+
+class TestGetMany(object):
+    """Test cases for looking up many primary keys at once."""
+
+    def test_single_query_in_order(self, many_test_app):
+        """Verify that the keys are resolved with a single query and the objects returned in the order of the keys."""
+
+        ids, statements = many_test_app
+        idents = [ids[2], str(ids[0]), ids[2]]
+
+        items = DatabaseTestModel.query.get_many_or_404(idents)
+
+        assert [item.name for item in items] == ["many_2", "many_0", "many_2"]
+        assert items[0] is items[2]
+        assert len(statements) == 1
+
+    def test_identity_map(self, many_test_app):
+        """Verify that objects already in the identity map are returned without querying them."""
+
+        ids, statements = many_test_app
+        loaded = DatabaseTestModel.query.get(ids[1])
+
+        items = DatabaseTestModel.query.get_many_or_404([ids[1], ids[0]])
+
+        assert items[0] is loaded
+        assert len(statements) == 2
+        assert "IN" in statements[-1]
+
+    def test_chunked(self, many_test_app):
+        """Verify that large key lists are looked up in chunks."""
+
+        ids, statements = many_test_app
+
+        items = DatabaseTestModel.query.get_many_or_404(ids, chunk_size=2)
+
+        assert [item.id for item in items] == ids
+        assert len(statements) == 2
+
+    def test_ignores_max_rows(self, basic_flask_app, many_test_app):
+        """Verify that chunks holding more keys than the row limit of the route are not aborted."""
+
+        ids, statements = many_test_app
+
+        with basic_flask_app[0].test_request_context():
+            flask.g._flask_ligand_db_limits = DBLimits(None, 1)
+
+            items = DatabaseTestModel.query.get_many_or_404(ids, chunk_size=2)
+
+        assert [item.id for item in items] == ids
+        assert len(statements) == 2
+
+    def test_routes(self, primed_test_client, db_test_url, db_test_data_set):
+        """Verify that the regular and asynchronous routes return the items in the order of the keys."""
+
+        with primed_test_client.get(db_test_url) as ret:
+            ids = [item["id"] for item in reversed(ret.json)]
+
+        for route in ("many", "async/many"):
+            with primed_test_client.get(f"{db_test_url}{route}?ids={','.join(ids)}") as ret:
+                assert ret.status_code == 200
+                assert [item["id"] for item in ret.json] == ids
+
+    def test_concurrent_async_lookups(self, primed_test_client, db_test_url, mocker):
+        """Verify that asynchronous lookups awaited concurrently do not use the session from several threads at once."""
+
+        with primed_test_client.get(db_test_url) as ret:
+            ids = [item["id"] for item in ret.json]
+
+        get_or_404 = Query.get_or_404
+        active: list[object] = []
+        overlapping: list[int] = []
+
+        def _slow_get_or_404(query: Query, ident: object, description: Optional[str] = None) -> Any:
+            active.append(ident)
+            overlapping.append(len(active))
+            time.sleep(0.02)
+
+            try:
+                return get_or_404(query, ident, description)
+            finally:
+                active.remove(ident)
+
+        mocker.patch.object(Query, "get_or_404", _slow_get_or_404)
+
+        with primed_test_client.get(f"{db_test_url}async/gather?ids={','.join(ids)}") as ret:
+            assert ret.status_code == 200
+            assert [item["id"] for item in ret.json] == ids
+
+        assert max(overlapping) == 1
+
+
+class TestNegativeGetMany(object):
+    """Negative test cases for looking up many primary keys at once."""
+
+    def test_missing_keys(self, primed_test_client, db_test_url):
+        """Verify that a single 404 lists every missing key."""
+
+        with primed_test_client.get(db_test_url) as ret:
+            existing = ret.json[0]["id"]
+
+        missing = str(uuid.uuid4())
+
+        with primed_test_client.get(f"{db_test_url}many?ids={existing},{missing},bogus,{missing}") as ret:
+            assert ret.status_code == 404
+            assert ret.json["message"] == f"Invalid items! Missing keys: {missing}, bogus"
+
+    def test_filter_criteria(self, many_test_app):
+        """Verify that the filter criteria of the query apply to objects in the identity map as well."""
+
+        ids, _ = many_test_app
+        DatabaseTestModel.query.get(ids[1])
+
+        with pytest.raises(HTTPException) as e:
+            DatabaseTestModel.query.filter_by(name="many_0").get_many_or_404(ids[:2])
+
+        response = e.value.response
+        assert isinstance(response, flask.Response)
+        assert response.json is not None and response.json["message"] == f"Missing keys: {ids[1]}"
+
+
+class TestPaginationCountModes(object):
+    """Test cases for the count modes of the SQL cursor pager."""
+
+    def test_exact(self, primed_test_client, db_test_url, helpers):
+        """Verify that exact totals are reported as exact."""
+
+        with primed_test_client.get(f"{db_test_url}?page=1&page_size=2") as ret:
+            metadata = helpers.loads(ret.headers["X-Pagination"])
+
+            assert (metadata["total"], metadata["total_exact"]) == (3, True)
+
+    def test_has_next(self, basic_flask_app, primed_test_client, db_test_url, helpers):
+        """Verify that no total is reported and the next page is determined without counting."""
+
+        basic_flask_app[0].config["PAGINATION_COUNT_MODE"] = "has_next"
+
+        with primed_test_client.get(f"{db_test_url}?page=1&page_size=2") as ret:
+            assert len(ret.json) == 2  # noqa
+            assert helpers.loads(ret.headers["X-Pagination"]) == {
+                "first_page": 1,
+                "page": 1,
+                "next_page": 2,
+                "total_exact": False,
+            }
+
+        with primed_test_client.get(f"{db_test_url}?page=2&page_size=2") as ret:
+            assert len(ret.json) == 1  # noqa
+            assert helpers.loads(ret.headers["X-Pagination"]) == {
+                "first_page": 1,
+                "page": 2,
+                "previous_page": 1,
+                "total_exact": False,
+            }
+
+    def test_cached(self, basic_flask_app, primed_test_client, db_test_url, helpers):
+        """Verify that counts are reused per query until they expire and are reported as not exact when reused."""
+
+        basic_flask_app[0].config["PAGINATION_COUNT_MODE"] = "cached"
+
+        with primed_test_client.get(f"{db_test_url}?page_size=2") as ret:
+            metadata = helpers.loads(ret.headers["X-Pagination"])
+            assert (metadata["total"], metadata["total_exact"]) == (3, True)
+
+        with primed_test_client.post(db_test_url, json={"name": "test_name_3"}) as ret:
+            assert ret.status_code == 201
+
+        with primed_test_client.get(f"{db_test_url}?page_size=2") as ret:
+            metadata = helpers.loads(ret.headers["X-Pagination"])
+            assert (metadata["total"], metadata["total_exact"]) == (3, False)
+
+        with primed_test_client.get(f"{db_test_url}?page_size=2&name=test_name_3") as ret:
+            metadata = helpers.loads(ret.headers["X-Pagination"])
+            assert (metadata["total"], metadata["total_exact"]) == (1, True)
+
+    def test_estimate(self, basic_flask_app, primed_test_client, db_test_url, helpers, mocker):
+        """Verify that planner estimates are reported as not exact."""
+
+        basic_flask_app[0].config["PAGINATION_COUNT_MODE"] = "estimate"
+        mocker.patch.object(SQLCursorPage, "estimate_count", return_value=1000)
+
+        with primed_test_client.get(f"{db_test_url}?page_size=2") as ret:
+            metadata = helpers.loads(ret.headers["X-Pagination"])
+            assert (metadata["total"], metadata["total_pages"], metadata["total_exact"]) == (1000, 500, False)
+
+    def test_estimate_statement(self, basic_flask_app, primed_test_client, mocker):
+        """Verify that the planner estimate is requested with the paramstyle of the PostgreSQL driver."""
+
+        connection = mocker.MagicMock()
+        connection.dialect = pg8000.dialect()
+        connection.execute.return_value.scalar.return_value = [{"Plan": {"Plan Rows": 42}}]
+
+        with basic_flask_app[0].test_request_context():
+            query = DatabaseTestModel.query.filter_by(name="test_name_1")
+            mocker.patch.object(query.session, "connection", return_value=connection)
+
+            assert SQLCursorPage(query, mocker.MagicMock()).estimate_count() == 42
+
+        compiled = connection.execute.call_args.args[0].compile(dialect=connection.dialect)
+
+        assert str(compiled).startswith("EXPLAIN (FORMAT JSON) SELECT")
+        assert "= %s" in str(compiled)
+        assert list(compiled.params.values()) == ["test_name_1"]
+
+    def test_estimate_unsupported_dialect(self, basic_flask_app, primed_test_client, db_test_url, helpers):
+        """Verify that dialects without planner estimates fall back to an exact count."""
+
+        basic_flask_app[0].config["PAGINATION_COUNT_MODE"] = "estimate"
+
+        with primed_test_client.get(f"{db_test_url}?page_size=2") as ret:
+            metadata = helpers.loads(ret.headers["X-Pagination"])
+            assert (metadata["total"], metadata["total_exact"]) == (3, True)
+
+    def test_documented(self, db_test_client, basic_flask_app):
+        """Verify that the pagination header documents whether the total is exact."""
+
+        spec = basic_flask_app[1].spec.to_dict()
+        header = spec["paths"][DATABASE_TEST_URL]["get"]["responses"]["200"]["headers"]["X-Pagination"]
+
+        assert "total_exact" in spec["components"]["schemas"][header["schema"]["$ref"].split("/")[-1]]["properties"]
+
+
+class TestNegativePaginationCountModes(object):
+    """Negative test cases for the count modes of the SQL cursor pager."""
+
+    def test_unsupported_mode(self, basic_flask_app, primed_test_client, db_test_url):
+        """Verify that an unsupported count mode is reported."""
+
+        basic_flask_app[0].config["PAGINATION_COUNT_MODE"] = "guess"
+
+        with pytest.raises(RuntimeError, match="'guess' pagination count mode is not supported"):
+            primed_test_client.get(db_test_url)
+
+
+class TestKeysetPagination(object):
+    """Test cases for keyset pagination."""
+
+    def test_walk_pages(self, primed_test_client, db_test_url, helpers):
+        """Verify that following the cursors returns every item exactly once in sort order, even with tied values."""
+
+        for _ in range(2):
+            with primed_test_client.post(db_test_url, json={"name": "test_name_1"}) as ret:
+                assert ret.status_code == 201
+
+        names: list[str] = []
+        ids: list[str] = []
+        url = f"{db_test_url}keyset"
+
+        while True:
+            with primed_test_client.get(url) as ret:
+                assert ret.status_code == 200
+
+                metadata = helpers.loads(ret.headers["X-Pagination"])
+                names.extend(item["name"] for item in ret.json)
+                ids.extend(item["id"] for item in ret.json)
+
+            assert "total" not in metadata
+            assert metadata["page_size"] == 2
+
+            if not metadata["has_next"]:
+                assert "next_cursor" not in metadata
+                break
+
+            url = f"{db_test_url}keyset?cursor={metadata['next_cursor']}"
+
+        assert names == ["test_name_2", "test_name_1", "test_name_1", "test_name_1", "test_name_0"]
+        assert len(set(ids)) == 5
+
+    def test_pages_stable_under_inserts(self, primed_test_client, db_test_url, helpers):
+        """Verify that items added before the current position do not shift the following page."""
+
+        with primed_test_client.get(f"{db_test_url}keyset?page_size=1") as ret:
+            cursor = helpers.loads(ret.headers["X-Pagination"])["next_cursor"]
+
+        with primed_test_client.post(db_test_url, json={"name": "test_name_9"}) as ret:
+            assert ret.status_code == 201
+
+        with primed_test_client.get(f"{db_test_url}keyset?page_size=1&cursor={cursor}") as ret:
+            assert ret.status_code == 200
+            assert [item["name"] for item in ret.json] == ["test_name_1"]
+
+    def test_filter_with_cursor(self, primed_test_client, db_test_url, helpers):
+        """Verify that query arguments are combined with the cursor."""
+
+        with primed_test_client.get(f"{db_test_url}keyset?name=test_name_0") as ret:
+            assert ret.status_code == 200
+            assert len(ret.json) == 1  # noqa
+            assert not helpers.loads(ret.headers["X-Pagination"])["has_next"]
+
+    def test_documented(self, db_test_client, basic_flask_app):
+        """Verify that the cursor argument and pagination header are documented."""
+
+        operation = basic_flask_app[1].spec.to_dict()["paths"][f"{DATABASE_TEST_URL}keyset"]["get"]
+        parameters = [parameter["name"] for parameter in operation["parameters"]]
+
+        assert "cursor" in parameters
+        assert "page" not in parameters
+        assert "X-Pagination" in operation["responses"]["200"]["headers"]
+
+
+class TestNegativeKeysetPagination(object):
+    """Negative test cases for keyset pagination."""
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", "W10", "WyJhIl0"])
+    def test_invalid_cursor(self, primed_test_client, db_test_url, cursor):
+        """Verify that a malformed cursor or one not matching the sort columns is rejected."""
+
+        with primed_test_client.get(f"{db_test_url}keyset?cursor={cursor}") as ret:
+            assert ret.status_code == 400
+            assert ret.json["message"] == "Invalid pagination cursor!"  # noqa
+
+    def test_unsupported_sort(self, primed_test_client, db_test_url):
+        """Verify that sorting by an expression rather than a model column is reported."""
+
+        with pytest.raises(RuntimeError, match="only supports sorting by columns"):
+            primed_test_client.get(f"{db_test_url}keyset/unsupported")
+
+
+class TestConnectionPool(object):
+    """Test cases for the connection pool settings and metrics."""
+
+    @pytest.mark.parametrize(
+        "settings,pool_size_exp,max_overflow_exp",
+        [
+            ({}, 1, 1),
+            ({"WORKER_THREADS": 8}, 8, 8),
+            ({"WORKER_THREADS": 8, "DB_MAX_OVERFLOW": 2}, 8, 2),
+            ({"WORKER_COUNT": 4, "WORKER_THREADS": 8, "DB_MAX_CONNECTIONS": 40}, 8, 2),
+            ({"WORKER_COUNT": 4, "WORKER_THREADS": 8, "DB_MAX_CONNECTIONS": 16}, 4, 0),
+            ({"DB_POOL_SIZE": 3}, 3, 3),
+        ],
+    )
+    def test_pool_sized_from_workers(self, pooled_flask_app_factory, settings, pool_size_exp, max_overflow_exp):
+        """Verify that the pool is sized from the worker and thread count within the connection budget."""
+
+        app = pooled_flask_app_factory(**settings)
+
+        with app.app_context():
+            pool = DB.engine.pool
+
+            assert isinstance(pool, QueuePool)
+            assert (pool.size(), pool._max_overflow) == (pool_size_exp, max_overflow_exp)
+            assert pool._pre_ping is False
+            assert pool._recycle == 1800
+            assert pool._timeout == 5
+
+    def test_engine_options_take_precedence(self, pooled_flask_app_factory):
+        """Verify that explicitly configured engine options override the pool settings."""
+
+        app = pooled_flask_app_factory(SQLALCHEMY_ENGINE_OPTIONS={"pool_recycle": 60})
+
+        with app.app_context():
+            assert DB.engine.pool._recycle == 60
+
+    def test_pool_metrics(self, pooled_flask_app_factory):
+        """Verify that the pool reports checkouts, waits on the pool and connection age."""
+
+        app = pooled_flask_app_factory(DB_POOL_SIZE=1, DB_MAX_OVERFLOW=0)
+        holding = threading.Event()
+
+        def _hold_connection() -> None:
+            with app.app_context(), DB.engine.connect():
+                holding.set()
+                time.sleep(0.2)
+
+        thread = threading.Thread(target=_hold_connection)
+        thread.start()
+        holding.wait()
+
+        with app.app_context():
+            with DB.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                metrics = get_pool_metrics()
+
+        thread.join()
+
+        assert metrics is not None
+        assert (metrics.size, metrics.checked_out, metrics.overflow, metrics.checkouts) == (1, 1, 0, 2)
+        assert metrics.wait_time_max >= 0.1
+        assert metrics.wait_time_mean == pytest.approx(metrics.wait_time_total / 2)
+        assert metrics.connection_age_max > 0
+
+    def test_memory_database_not_pooled(self, basic_flask_app):
+        """Verify that in-memory SQLite databases keep their default pool and report no metrics."""
+
+        with basic_flask_app[0].app_context():
+            assert get_pool_metrics() is None
+
+
+class TestReadReplicas(object):
+    """Test cases for routing read-only queries to the read replicas."""
+
+    def test_round_robin_reads(self, replicated_flask_app_factory):
+        """Verify that read-only queries alternate between the replicas."""
+
+        app = replicated_flask_app_factory()
+
+        with app.app_context():
+            names = [_read_names() for _ in range(4)]
+
+        assert names == [["replica_0"], ["replica_1"], ["replica_0"], ["replica_1"]]
+
+    def test_least_connections_reads(self, replicated_flask_app_factory):
+        """Verify that read-only queries are sent to the replica with the fewest connections in use."""
+
+        app = replicated_flask_app_factory(DB_REPLICA_STRATEGY="least_connections")
+
+        with app.app_context(), DB.engines[f"{REPLICA_BIND_KEY_PREFIX}0"].connect():
+            assert _read_names() == ["replica_1"]
+
+    def test_transaction_stays_on_primary_after_write(self, replicated_flask_app_factory):
+        """Verify that a transaction that has written reads from the primary until it ends."""
+
+        app = replicated_flask_app_factory()
+
+        with app.app_context():
+            DB.session.add(DatabaseTestModel(name="new"))
+            assert sorted(_read_names()) == ["new", "primary"]
+
+            DB.session.rollback()
+            assert _read_names() == ["replica_0"]
+
+    @pytest.mark.parametrize("method,names_exp", [("GET", ["replica_0"]), ("PATCH", ["primary"])])
+    def test_write_requests_on_primary(self, replicated_flask_app_factory, method, names_exp):
+        """Verify that requests meant for changing data read from the primary before they write."""
+
+        app = replicated_flask_app_factory()
+
+        with app.test_request_context(method=method):
+            assert _read_names() == names_exp
+
+    def test_read_your_writes(self, replicated_flask_app_factory):
+        """Verify that a client reads from the primary for a short window after committing a write."""
+
+        app = replicated_flask_app_factory()
+        writer = {"Authorization": "Bearer writer"}
+
+        with app.test_request_context(headers=writer):
+            DB.session.add(DatabaseTestModel(name="new"))
+            DB.session.commit()
+
+        with app.test_request_context(headers=writer):
+            assert sorted(_read_names()) == ["new", "primary"]
+
+        with app.test_request_context(headers={"Authorization": "Bearer reader"}):
+            assert _read_names() == ["replica_0"]
+
+    def test_read_your_writes_cookie(self, replicated_flask_app_factory):
+        """Verify that a client without credentials is pinned to the primary in every worker by a cookie."""
+
+        app = replicated_flask_app_factory()
+
+        with app.test_request_context():
+            DB.session.add(DatabaseTestModel(name="new"))
+            DB.session.commit()
+            cookie = app.process_response(app.response_class()).headers["Set-Cookie"].split(";")[0]
+
+        assert cookie.startswith(f"{READ_YOUR_WRITES_COOKIE}=")
+
+        # Another worker only knows about the write through the cookie.
+        app.extensions[REPLICA_SET_EXTENSION]._pinned_clients.clear()
+
+        with app.test_request_context(headers={"Cookie": cookie}):
+            assert sorted(_read_names()) == ["new", "primary"]
+
+        with app.test_request_context():
+            assert _read_names() == ["replica_0"]
+
+    def test_use_primary(self, replicated_flask_app_factory):
+        """Verify that reads can be forced to the primary."""
+
+        app = replicated_flask_app_factory()
+
+        with app.app_context():
+            with use_primary():
+                assert _read_names() == ["primary"]
+
+            assert _read_names() == ["replica_0"]
+
+
+class TestNegativeReadReplicas(object):
+    """Negative test cases for routing read-only queries to the read replicas."""
+
+    def test_unsupported_strategy(self, replicated_flask_app_factory):
+        """Verify that an unsupported replica selection strategy is reported."""
+
+        with pytest.raises(RuntimeError, match="'random' replica selection strategy is not supported"):
+            replicated_flask_app_factory(DB_REPLICA_STRATEGY="random")
+
+    def test_forged_cookie(self, replicated_flask_app_factory):
+        """Verify that a cookie pinning the client beyond the read-your-writes window is ignored."""
+
+        app = replicated_flask_app_factory()
+
+        for until in (time.time() + 3600, "bogus"):
+            with app.test_request_context(headers={"Cookie": f"{READ_YOUR_WRITES_COOKIE}={until}"}):
+                assert "primary" not in _read_names()
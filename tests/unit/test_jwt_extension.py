@@ -5,24 +5,64 @@
 # ======================================================================================================================
 from __future__ import annotations
 
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import TYPE_CHECKING
+from unittest.mock import MagicMock
 
 import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
 from flask.testing import FlaskClient
 from flask.views import MethodView
+from flask_jwt_extended import (
+    JWTManager,
+    create_access_token,
+    decode_token,
+    get_current_user,
+    verify_jwt_in_request,
+)
+from jwt.algorithms import RSAAlgorithm
 from marshmallow_sqlalchemy import auto_field
+from requests.exceptions import ConnectionError
 
 from flask_ligand.extensions.api import AutoSchema, Blueprint
 from flask_ligand.extensions.database import DB
-from flask_ligand.extensions.jwt import jwt_role_required
+from flask_ligand.extensions.jwt import _role_registry  # noqa
+from flask_ligand.extensions.jwt import (
+    JWKS_KEY_STORE_EXTENSION,
+    JWT,
+    REVOCATION_LIST_EXTENSION,
+    USER_PROFILE_CACHE_EXTENSION,
+    ClientCredentialsTokenProvider,
+    JwksKeyStore,
+    Role,
+    RolePolicy,
+    all_of,
+    any_of,
+    as_role_policy,
+    get_revocation_stats,
+    get_service_token_headers,
+    get_verified_token_cache_stats,
+    invalidate_user_profiles_on_commit,
+    is_auth_ready,
+    jwt_role_required,
+    not_,
+    revoke_token,
+    verify_jwt_role,
+)
 
 # ======================================================================================================================
 # Type Checking
 # ======================================================================================================================
 if TYPE_CHECKING:
-    from typing import Any
+    from pathlib import Path
+    from typing import Any, Callable, Iterator, Optional
 
     from flask import Flask
+    from pytest_mock import MockerFixture
 
     from flask_ligand.extensions.api import Api
 
@@ -37,8 +77,24 @@ BLP = Blueprint(
     url_prefix=JWT_TEST_URL.rstrip("/"),
     description="JWT TEST",
 )
+BROKEN_BLP = Blueprint(
+    "JWT BROKEN TEST",
+    __name__,
+    url_prefix=f"{JWT_TEST_URL}broken",
+    description="JWT BROKEN TEST",
+)
+POLICY_BLP = Blueprint(
+    "JWT POLICY TEST",
+    __name__,
+    url_prefix=f"{JWT_TEST_URL}policy",
+    description="JWT POLICY TEST",
+)
+POLICY_ALLOWED_ROLES = ["user", "admin", "auditor", "billing:reader"]
 USER_ROLES = ["user"]
 ADMIN_ROLES = ["user", "admin"]
+DISCOVERY_URL = "http://oidc.discovery.url/.well-known/openid-configuration"
+JWKS_URI = "http://oidc.discovery.url/certs"
+TOKEN_URL = "http://oidc.discovery.url/token"
 
 
 # ======================================================================================================================
@@ -52,6 +108,15 @@ class JwtTestModel(DB.Model):  # type: ignore
     message = DB.Column(DB.String(), primary_key=True, nullable=False)
 
 
+class UserProfileTestModel(DB.Model):  # type: ignore
+    """Test model class for user profiles."""
+
+    __tablename__ = "userprofiletest"
+
+    user_id = DB.Column(DB.String(), primary_key=True, nullable=False)
+    display_name = DB.Column(DB.String(), nullable=False)
+
+
 class JwtTestSchema(AutoSchema):
     """Automatically generate schema from 'JwtTestModel'."""
 
@@ -81,10 +146,10 @@ class JwtTestView(MethodView):
         return item
 
 
-@BLP.route("/broken/")
-@BLP.etag
+@BROKEN_BLP.route("/")
+@BROKEN_BLP.etag
 class JwtBrokenView(MethodView):
-    @BLP.response(200, JwtTestSchema(many=True))
+    @BROKEN_BLP.response(200, JwtTestSchema(many=True))
     @jwt_role_required(role="broken")
     def get(self):
         items: list[JwtTestModel] = JwtTestModel.query.all()  # noqa
@@ -92,6 +157,46 @@ class JwtBrokenView(MethodView):
         return items
 
 
+@BLP.route("/profile")
+@jwt_role_required(role="user")
+def profile_view():
+    return {"profile": get_current_user().profile}
+
+
+@POLICY_BLP.route("/any/")
+@POLICY_BLP.response(204)
+@jwt_role_required(role=any_of("admin", "auditor"))
+def any_of_view():
+    pass
+
+
+@POLICY_BLP.route("/all/")
+@POLICY_BLP.response(204)
+@jwt_role_required(role=all_of("user", "admin"))
+def all_of_view():
+    pass
+
+
+@POLICY_BLP.route("/not/")
+@POLICY_BLP.response(204)
+@jwt_role_required(role=all_of("user", not_(any_of("admin", "auditor"))))
+def not_view():
+    pass
+
+
+@POLICY_BLP.route("/client/")
+@POLICY_BLP.response(204)
+@jwt_role_required(role=Role("reader", client="billing"))
+def client_view():
+    pass
+
+
+@POLICY_BLP.route("/async/")
+@jwt_role_required(role=any_of("admin", "auditor"))
+async def async_view():
+    return "", 204
+
+
 # ======================================================================================================================
 # Fixtures
 # ======================================================================================================================
@@ -138,6 +243,138 @@ def primed_test_client(
     return jwt_test_client
 
 
+@pytest.fixture(scope="session")
+def rsa_private_keys() -> dict[str, rsa.RSAPrivateKey]:
+    """RSA private keys indexed by key ID for signing JWTs."""
+
+    return {kid: rsa.generate_private_key(public_exponent=65537, key_size=2048) for kid in ("key-1", "key-2")}
+
+
+@pytest.fixture(scope="function")
+def mock_jwks_endpoints(
+    mocker: MockerFixture, rsa_private_keys: dict[str, rsa.RSAPrivateKey]
+) -> Callable[[list[str]], MagicMock]:
+    """Factory for mocking the OIDC discovery and JWKS endpoints to publish the public keys for the given key IDs."""
+
+    def _mock_jwks_endpoints(kids: list[str]) -> MagicMock:
+        jwks = {
+            "keys": [
+                {**RSAAlgorithm.to_jwk(rsa_private_keys[kid].public_key(), as_dict=True), "kid": kid, "use": "sig"}
+                for kid in kids
+            ]
+        }
+
+        def _get(url: str, **_: Any) -> MagicMock:
+            resp = mocker.MagicMock()
+            resp.json.return_value = {"jwks_uri": JWKS_URI} if url == DISCOVERY_URL else jwks
+            return resp
+
+        return mocker.patch("flask_ligand.extensions.jwt.get", side_effect=_get)
+
+    return _mock_jwks_endpoints
+
+
+@pytest.fixture(scope="function")
+def mock_token_endpoint(mocker: MockerFixture) -> MagicMock:
+    """Mock the token endpoint of the OIDC issuer to issue numbered access tokens valid for 300 seconds."""
+
+    issued: list[str] = []
+
+    def _post(_url: str, **_: Any) -> MagicMock:
+        issued.append(f"token-{len(issued) + 1}")
+        resp = mocker.MagicMock()
+        resp.json.return_value = {"access_token": issued[-1], "expires_in": 300, "token_type": "Bearer"}
+        return resp
+
+    return mocker.patch("flask_ligand.extensions.jwt.post", side_effect=_post)
+
+
+@pytest.fixture(scope="function")
+def rs256_test_client(
+    jwt_test_client: FlaskClient, rsa_private_keys: dict[str, rsa.RSAPrivateKey]
+) -> Callable[[str], dict[str, str]]:
+    """Configure the JWT test client for RS256 and return a factory for access token headers signed by a key ID."""
+
+    app = jwt_test_client.application
+    app.config["JWT_ALGORITHM"] = "RS256"
+    app.extensions[JWKS_KEY_STORE_EXTENSION] = JwksKeyStore(DISCOVERY_URL, ttl=300, min_refresh_interval=0)
+
+    def _access_token_headers(kid: str) -> dict[str, str]:
+        app.config["JWT_PRIVATE_KEY"] = rsa_private_keys[kid].private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+        with app.app_context():
+            token = create_access_token(
+                "username",
+                additional_claims={"sub": "user-id", "realm_access": {"roles": USER_ROLES}},
+                additional_headers={"kid": kid},
+            )
+
+        return {"Authorization": f"Bearer {token}"}
+
+    return _access_token_headers
+
+
+@pytest.fixture(scope="function")
+def policy_test_client(basic_flask_app: tuple[Flask, Api]) -> Callable[[dict[str, Any]], dict[str, str]]:
+    """Register the role policy test endpoints and return a factory for access token headers with the given claims."""
+
+    app, api = basic_flask_app
+    app.config["ALLOWED_ROLES"] = POLICY_ALLOWED_ROLES
+    api.register_blueprint(POLICY_BLP)
+    app.testing = True
+
+    def _access_token_headers(claims: dict[str, Any]) -> dict[str, str]:
+        with app.app_context():
+            token = create_access_token("username", additional_claims={"sub": "user-id", **claims})
+
+        return {"Authorization": f"Bearer {token}"}
+
+    return _access_token_headers
+
+
+@pytest.fixture(scope="function")
+def token_cache_test_client(jwt_test_client: FlaskClient) -> FlaskClient:
+    """Flask app test client with the verified token cache enabled."""
+
+    jwt_test_client.application.config["JWT_VERIFIED_TOKEN_CACHE_SIZE"] = 2
+    JWT.init_app(jwt_test_client.application)
+
+    return jwt_test_client
+
+
+@pytest.fixture(scope="function")
+def revocation_test_client(jwt_test_client: FlaskClient, tmp_path: Path) -> FlaskClient:
+    """Flask app test client with token revocation backed by a file."""
+
+    jwt_test_client.application.config["JWT_REVOCATION_FILE"] = str(tmp_path / "revoked_tokens")
+    JWT.init_app(jwt_test_client.application)
+
+    return jwt_test_client
+
+
+@pytest.fixture(scope="function")
+def user_profile_loader(jwt_test_client: FlaskClient, user_info: dict[str, Any]) -> Iterator[MagicMock]:
+    """Register a user profile loader backed by 'UserProfileTestModel' and return a spy for the loader."""
+
+    def _load_user_profile(user_id: str) -> Optional[str]:
+        profile = DB.session.get(UserProfileTestModel, user_id)
+
+        return profile.display_name if profile is not None else None
+
+    loader = MagicMock(side_effect=_load_user_profile)
+    JWT.user_profile_loader(loader)
+    invalidate_user_profiles_on_commit(UserProfileTestModel, "user_id")
+
+    with jwt_test_client.application.app_context():
+        DB.session.add(UserProfileTestModel(user_id=user_info["id"], display_name="Original"))
+        DB.session.commit()
+
+    yield loader
+
+    JWT._user_profile_callback = None
+
+
 # ======================================================================================================================
 # Test Suites
 # ======================================================================================================================
@@ -174,17 +411,602 @@ class TestNegativeJwtExtension(object):
             assert ret.status_code == 403
             assert ret.json["message"] == "This endpoint requires the user to have the 'user' role!"  # noqa
 
-    def test_role_not_allowed(self, primed_test_client, jwt_test_url, access_token_headers):
+    def test_role_not_allowed(self, basic_flask_app):
+        """
+        Verify that the correct exception is raised when registering an endpoint that is decorated with a role that
+        is not allowed.
         """
-        Verify that the correct exception is raised when trying to access an endpoint that is decorated with a role
-        that is not allowed.
 
-        Note: This test does a trick with parameterization to override the implicitly imported "default_roles"
-        fixture. See this documentation for more details:
+        with pytest.raises(RuntimeError, match="'JWT BROKEN TEST.JwtBrokenView' endpoint is misconfigured"):
+            basic_flask_app[1].register_blueprint(BROKEN_BLP)
 
-        https://docs.pytest.org/en/6.2.x/fixture.html#override-a-fixture-with-direct-test-parametrization
+    def test_role_not_allowed_unvalidated_route(self, basic_flask_app, jwt_test_url, access_token_headers, mocker):
+        """
+        Verify that the correct HTTP code is returned when accessing an endpoint that is decorated with a role that
+        is not allowed and was registered without validation.
         """
 
-        with primed_test_client.get(f"{jwt_test_url}broken/", headers=access_token_headers) as ret:
+        app, api = basic_flask_app
+        mocker.patch.object(Blueprint, "validate_role_policies")
+        api.register_blueprint(BROKEN_BLP)
+
+        with app.test_client().get(f"{jwt_test_url}broken/", headers=access_token_headers) as ret:
             assert ret.status_code == 500
             assert ret.json["message"] == "Endpoint required role is not an allowed role!"  # noqa
+
+
+class TestJwksKeyStore(object):
+    """Test cases for the 'JwksKeyStore' class."""
+
+    def test_refresh(self, mock_jwks_endpoints, rsa_private_keys):
+        """Verify that the keys are indexed by key ID and the first key is used for tokens without a key ID."""
+
+        mock_jwks_endpoints(["key-1", "key-2"])
+        key_store = JwksKeyStore(DISCOVERY_URL)
+
+        key_store.refresh()
+
+        assert key_store.kids == ["key-1", "key-2"]
+        assert key_store.get_key("key-2").public_numbers() == rsa_private_keys["key-2"].public_key().public_numbers()
+        assert key_store.get_key(None).public_numbers() == rsa_private_keys["key-1"].public_key().public_numbers()
+
+    def test_unknown_kid_refetch(self, mock_jwks_endpoints):
+        """Verify that a rotated key is fetched on demand when a token references an unknown key ID."""
+
+        mock_jwks_endpoints(["key-1"])
+        key_store = JwksKeyStore(DISCOVERY_URL, min_refresh_interval=0)
+        key_store.refresh()
+
+        mock_get = mock_jwks_endpoints(["key-2"])
+
+        assert key_store.get_key("key-2") is not None
+        assert key_store.kids == ["key-2"]
+        assert mock_get.call_count == 2
+
+    def test_background_refresh(self, mock_jwks_endpoints):
+        """Verify that a stale key set is refreshed in the background while the stale keys are still served."""
+
+        mock_jwks_endpoints(["key-1"])
+        key_store = JwksKeyStore(DISCOVERY_URL, ttl=0, min_refresh_interval=0)
+        key_store.refresh()
+
+        mock_jwks_endpoints(["key-2"])
+
+        assert key_store.get_key(None) is not None
+
+        for _ in range(100):
+            if key_store.kids == ["key-2"]:
+                break
+            time.sleep(0.01)
+
+        assert key_store.kids == ["key-2"]
+
+    def test_rotated_key_verification(self, rs256_test_client, mock_jwks_endpoints, primed_test_client, jwt_test_url):
+        """Verify that tokens signed by a rotated key are accepted without restarting the app."""
+
+        mock_jwks_endpoints(["key-1"])
+        primed_test_client.application.extensions[JWKS_KEY_STORE_EXTENSION].refresh()
+
+        with primed_test_client.get(jwt_test_url, headers=rs256_test_client("key-1")) as ret:
+            assert ret.status_code == 200
+
+        mock_jwks_endpoints(["key-1", "key-2"])
+
+        with primed_test_client.get(jwt_test_url, headers=rs256_test_client("key-2")) as ret:
+            assert ret.status_code == 200
+
+
+class TestNegativeJwksKeyStore(object):
+    """Negative test cases for the 'JwksKeyStore' class."""
+
+    def test_refresh_failure(self, mocker):
+        """Verify that the correct exception is raised when the OIDC issuer is unavailable."""
+
+        mocker.patch("flask_ligand.extensions.jwt.get", side_effect=ConnectionError)
+
+        with pytest.raises(RuntimeError, match="Failed to retrieve public key"):
+            JwksKeyStore(DISCOVERY_URL).refresh()
+
+    def test_unknown_kid_rate_limited(self, mock_jwks_endpoints):
+        """Verify that unknown key IDs do not refetch the key set more than once per refresh interval."""
+
+        mock_get = mock_jwks_endpoints(["key-1"])
+        key_store = JwksKeyStore(DISCOVERY_URL, min_refresh_interval=60)
+        key_store.refresh()
+
+        assert key_store.get_key("bogus") is None
+        assert mock_get.call_count == 2
+
+    def test_unknown_kid_rejected(self, rs256_test_client, mock_jwks_endpoints, primed_test_client, jwt_test_url):
+        """Verify that the correct HTTP code is returned for a token signed with a key unknown to the OIDC issuer."""
+
+        mock_jwks_endpoints(["key-1"])
+        primed_test_client.application.extensions[JWKS_KEY_STORE_EXTENSION].refresh()
+
+        with primed_test_client.get(jwt_test_url, headers=rs256_test_client("key-2")) as ret:
+            assert ret.status_code == 422
+            assert ret.json["message"] == "Unknown signing key ID 'key-2'"  # noqa
+
+
+class TestVerifiedTokenCache(object):
+    """Test cases for the verified token cache."""
+
+    def test_repeated_token_is_cached(self, token_cache_test_client, jwt_test_url, access_token_headers, mocker):
+        """Verify that a repeated bearer token is only verified once and reuses the constructed user."""
+
+        spy = mocker.spy(JWTManager, "_decode_jwt_from_config")
+        users = []
+
+        for _ in range(3):
+            with token_cache_test_client.get(jwt_test_url, headers=access_token_headers) as ret:
+                assert ret.status_code == 200
+
+        with token_cache_test_client.application.test_request_context(headers=access_token_headers):
+            for _ in range(2):
+                verify_jwt_in_request()
+                users.append(get_current_user())
+
+        with token_cache_test_client.application.app_context():
+            stats = get_verified_token_cache_stats()
+
+        assert spy.call_count == 1
+        assert stats is not None
+        assert (stats.hits, stats.misses, stats.size) == (4, 1, 1)
+        assert users[0] is users[1]
+
+    def test_cache_disabled_by_default(self, jwt_test_client):
+        """Verify that the verified token cache is opt-in."""
+
+        with jwt_test_client.application.app_context():
+            assert get_verified_token_cache_stats() is None
+
+
+class TestTokenRevocation(object):
+    """Test cases for revoking access tokens."""
+
+    def test_revoke_token(self, revocation_test_client, jwt_test_url, access_token_headers):
+        """Verify that a revoked access token is rejected while other access tokens are still accepted."""
+
+        app = revocation_test_client.application
+
+        with revocation_test_client.get(jwt_test_url, headers=access_token_headers) as ret:
+            assert ret.status_code == 200
+
+        with app.app_context():
+            other_headers = {"Authorization": f"Bearer {create_access_token('other')}"}
+            revoke_token(decode_token(access_token_headers["Authorization"].split()[1])["jti"])
+
+        with revocation_test_client.get(jwt_test_url, headers=access_token_headers) as ret:
+            assert ret.status_code == 401
+            assert ret.json["message"] == "Token has been revoked"  # noqa
+
+        with revocation_test_client.get(jwt_test_url, headers=other_headers) as ret:
+            assert ret.status_code == 403
+
+        with app.app_context():
+            stats = get_revocation_stats()
+
+        assert stats is not None
+        assert (stats.checks, stats.revoked) == (3, 1)
+        assert stats.refresh_lag is not None
+
+    def test_revoked_by_other_worker(self, revocation_test_client, jwt_test_url, access_token_headers):
+        """Verify that token IDs revoked in the source by other workers are picked up by the background refresh."""
+
+        app = revocation_test_client.application
+        revocation_list = app.extensions[REVOCATION_LIST_EXTENSION]
+        revocation_list.refresh_interval = 0
+
+        with app.app_context():
+            jti = decode_token(access_token_headers["Authorization"].split()[1])["jti"]
+
+        with revocation_test_client.get(jwt_test_url, headers=access_token_headers) as ret:
+            assert ret.status_code == 200
+
+        with open(app.config["JWT_REVOCATION_FILE"], "a") as f:
+            f.write(f"{jti}\n")
+
+        # The stale filter keeps serving the current request while it is rebuilt in the background.
+        with revocation_test_client.get(jwt_test_url, headers=access_token_headers):
+            revocation_list._refresh_thread.join()
+
+        with revocation_test_client.get(jwt_test_url, headers=access_token_headers) as ret:
+            assert ret.status_code == 401
+
+    def test_revocation_disabled_by_default(self, jwt_test_client):
+        """Verify that token revocation is opt-in."""
+
+        with jwt_test_client.application.app_context():
+            assert get_revocation_stats() is None
+
+
+class TestNegativeTokenRevocation(object):
+    """Negative test cases for revoking access tokens."""
+
+    def test_revocation_not_configured(self, jwt_test_client):
+        """Verify that revoking a token without a revocation source is reported."""
+
+        with jwt_test_client.application.app_context():
+            with pytest.raises(RuntimeError, match="JWT_REVOCATION_SOURCE"):
+                revoke_token("jti")
+
+
+class TestUserProfile(object):
+    """Test cases for enriching users with cached profiles."""
+
+    def test_profile_cached(self, jwt_test_client, user_profile_loader, access_token_headers):
+        """Verify that the profile of a user is loaded once and then served from the cache."""
+
+        for _ in range(3):
+            with jwt_test_client.get(f"{JWT_TEST_URL}profile", headers=access_token_headers) as ret:
+                assert ret.status_code == 200
+                assert ret.json == {"profile": "Original"}  # noqa
+
+        user_profile_loader.assert_called_once()
+
+    def test_profile_invalidated_on_commit(self, jwt_test_client, user_profile_loader, access_token_headers, user_info):
+        """Verify that committing a change to a profile model invalidates the cached profile of the user."""
+
+        with jwt_test_client.get(f"{JWT_TEST_URL}profile", headers=access_token_headers) as ret:
+            assert ret.json == {"profile": "Original"}  # noqa
+
+        with jwt_test_client.application.app_context():
+            profile = DB.session.get(UserProfileTestModel, user_info["id"])
+            assert profile is not None
+            profile.display_name = "Updated"
+            DB.session.flush()
+            DB.session.rollback()
+
+        with jwt_test_client.get(f"{JWT_TEST_URL}profile", headers=access_token_headers) as ret:
+            assert ret.json == {"profile": "Original"}  # noqa
+
+        with jwt_test_client.application.app_context():
+            profile = DB.session.get(UserProfileTestModel, user_info["id"])
+            assert profile is not None
+            profile.display_name = "Updated"
+            DB.session.commit()
+
+        with jwt_test_client.get(f"{JWT_TEST_URL}profile", headers=access_token_headers) as ret:
+            assert ret.json == {"profile": "Updated"}  # noqa
+
+        assert user_profile_loader.call_count == 2
+
+    def test_profile_cache_disabled(self, jwt_test_client, user_profile_loader, access_token_headers):
+        """Verify that the profile is loaded on every access when the cache is disabled."""
+
+        jwt_test_client.application.extensions.pop(USER_PROFILE_CACHE_EXTENSION)
+
+        for _ in range(2):
+            with jwt_test_client.get(f"{JWT_TEST_URL}profile", headers=access_token_headers) as ret:
+                assert ret.json == {"profile": "Original"}  # noqa
+
+        assert user_profile_loader.call_count == 2
+
+    def test_no_profile_loader(self, jwt_test_client, access_token_headers):
+        """Verify that users have no profile when no loader is registered."""
+
+        with jwt_test_client.get(f"{JWT_TEST_URL}profile", headers=access_token_headers) as ret:
+            assert ret.json == {"profile": None}  # noqa
+
+
+class TestClientCredentialsTokenProvider(object):
+    """Test cases for the cached client credentials tokens."""
+
+    def test_token_cached(self, mock_token_endpoint):
+        """Verify that an access token is requested once and then served from the cache."""
+
+        provider = ClientCredentialsTokenProvider("client", "secret", token_url=TOKEN_URL)
+
+        assert [provider.get_token() for _ in range(3)] == ["token-1"] * 3
+        assert provider.get_headers() == {"Authorization": "Bearer token-1"}
+        assert mock_token_endpoint.call_args.kwargs["data"]["grant_type"] == "client_credentials"
+        assert mock_token_endpoint.call_count == 1
+
+    def test_proactive_background_refresh(self, mock_token_endpoint):
+        """Verify that a token near expiry keeps being served while a new one is requested in the background."""
+
+        provider = ClientCredentialsTokenProvider("client", "secret", token_url=TOKEN_URL)
+        provider.get_token()
+        provider._refresh_at = 0
+
+        assert provider.get_token() == "token-1"
+
+        deadline = time.monotonic() + 5
+        while provider.get_token() == "token-1" and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert provider.get_token() == "token-2"
+        assert mock_token_endpoint.call_count == 2
+
+    def test_concurrent_refreshes_coalesced(self, mock_token_endpoint):
+        """Verify that a burst of callers waiting on an expired token triggers a single token request."""
+
+        provider = ClientCredentialsTokenProvider("client", "secret", token_url=TOKEN_URL)
+        post_side_effect = mock_token_endpoint.side_effect
+
+        def _slow_post(*args: Any, **kwargs: Any) -> MagicMock:
+            time.sleep(0.1)
+            return post_side_effect(*args, **kwargs)
+
+        mock_token_endpoint.side_effect = _slow_post
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            tokens = list(executor.map(lambda _: provider.get_token(), range(10)))
+
+        assert tokens == ["token-1"] * 10
+        assert mock_token_endpoint.call_count == 1
+
+    def test_token_url_discovery(self, mock_token_endpoint, mocker):
+        """Verify that the token endpoint is located through the OIDC discovery URL."""
+
+        mock_get = mocker.patch("flask_ligand.extensions.jwt.get")
+        mock_get.return_value.json.return_value = {"token_endpoint": TOKEN_URL}
+
+        provider = ClientCredentialsTokenProvider("client", "secret", discovery_url=DISCOVERY_URL)
+
+        assert provider.get_token() == "token-1"
+        assert mock_token_endpoint.call_args.args[0] == TOKEN_URL
+
+    def test_service_token_headers(self, jwt_test_client, mock_token_endpoint):
+        """Verify that the client credentials configured for the app are used for service tokens."""
+
+        app = jwt_test_client.application
+        app.config.update(OIDC_CLIENT_ID="client", OIDC_CLIENT_SECRET="secret", OIDC_TOKEN_URL=TOKEN_URL)
+        JWT.init_app(app)
+
+        with app.app_context():
+            assert get_service_token_headers() == {"Authorization": "Bearer token-1"}
+            assert get_service_token_headers() == {"Authorization": "Bearer token-1"}
+
+
+class TestNegativeClientCredentialsTokenProvider(object):
+    """Negative test cases for the cached client credentials tokens."""
+
+    def test_token_unavailable(self, mocker):
+        """Verify that a token request failure is reported when there is no usable cached token."""
+
+        mocker.patch("flask_ligand.extensions.jwt.post", side_effect=ConnectionError)
+        provider = ClientCredentialsTokenProvider("client", "secret", token_url=TOKEN_URL)
+
+        with pytest.raises(RuntimeError, match="Failed to retrieve an access token for the 'client' client!"):
+            provider.get_token()
+
+    def test_background_refresh_failure(self, mock_token_endpoint):
+        """Verify that the cached token keeps being served when the background refresh fails."""
+
+        provider = ClientCredentialsTokenProvider("client", "secret", token_url=TOKEN_URL)
+        provider.get_token()
+        provider._refresh_at = 0
+        mock_token_endpoint.side_effect = ConnectionError
+
+        assert provider.get_token() == "token-1"
+
+        deadline = time.monotonic() + 5
+        while provider._refreshing and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert provider.get_token() == "token-1"
+
+    def test_missing_urls(self):
+        """Verify that either the token URL or the OIDC discovery URL is required."""
+
+        with pytest.raises(ValueError):
+            ClientCredentialsTokenProvider("client", "secret")
+
+    def test_service_token_not_configured(self, jwt_test_client):
+        """Verify that requesting a service token without client credentials is reported."""
+
+        with jwt_test_client.application.app_context():
+            with pytest.raises(RuntimeError, match="OIDC_CLIENT_ID"):
+                get_service_token_headers()
+
+
+class TestLazyDiscovery(object):
+    """Test cases for deferring the OIDC discovery until after start-up."""
+
+    def test_load_in_background(self, mock_jwks_endpoints):
+        """Verify that the key set can be loaded without blocking the caller."""
+
+        mock_jwks_endpoints(["key-1"])
+        key_store = JwksKeyStore(DISCOVERY_URL)
+
+        key_store.load_in_background()
+
+        assert key_store.wait_until_ready(timeout=1)
+        assert key_store.kids == ["key-1"]
+
+    def test_first_protected_request(self, rs256_test_client, mock_jwks_endpoints, primed_test_client, jwt_test_url):
+        """Verify that the first protected request loads the key set when it is not available yet."""
+
+        mock_jwks_endpoints(["key-1"])
+
+        with primed_test_client.application.app_context():
+            assert not is_auth_ready()
+
+        with primed_test_client.get(jwt_test_url, headers=rs256_test_client("key-1")) as ret:
+            assert ret.status_code == 200
+
+        with primed_test_client.application.app_context():
+            assert is_auth_ready()
+
+
+class TestNegativeLazyDiscovery(object):
+    """Negative test cases for deferring the OIDC discovery until after start-up."""
+
+    def test_issuer_unavailable(self, rs256_test_client, primed_test_client, jwt_test_url, mocker):
+        """
+        Verify that protected endpoints return the correct HTTP code while the OIDC issuer is unavailable and that
+        unprotected endpoints keep working.
+        """
+
+        mocker.patch("flask_ligand.extensions.jwt.get", side_effect=ConnectionError)
+        primed_test_client.application.extensions[JWKS_KEY_STORE_EXTENSION].timeout = 0.5
+
+        with primed_test_client.get(jwt_test_url, headers=rs256_test_client("key-1")) as ret:
+            assert ret.status_code == 503
+            assert ret.json["message"] == "Authentication keys are not available yet!"  # noqa
+
+        with primed_test_client.get("/openapi/api-spec.json") as ret:
+            assert ret.status_code == 200
+
+        with primed_test_client.application.app_context():
+            assert not is_auth_ready()
+
+
+class TestSharedJwksCacheFile(object):
+    """Test cases for sharing the key set between processes through a cache file."""
+
+    def test_single_fetch_for_all_workers(self, mock_jwks_endpoints, tmp_path):
+        """Verify that only the first worker contacts the OIDC issuer while the other workers read the cache file."""
+
+        mock_get = mock_jwks_endpoints(["key-1"])
+        cache_file = str(tmp_path / "jwks.json")
+
+        for _ in range(3):
+            key_store = JwksKeyStore(DISCOVERY_URL, cache_file=cache_file)
+            key_store.refresh()
+            assert key_store.kids == ["key-1"]
+
+        assert mock_get.call_count == 2
+
+    def test_stale_cache_file_when_issuer_unavailable(self, mock_jwks_endpoints, tmp_path, mocker):
+        """Verify that a stale but valid cache file is used when the OIDC issuer is unavailable."""
+
+        mock_jwks_endpoints(["key-1"])
+        cache_file = str(tmp_path / "jwks.json")
+        JwksKeyStore(DISCOVERY_URL, cache_file=cache_file).refresh()
+
+        mocker.patch("flask_ligand.extensions.jwt.get", side_effect=ConnectionError)
+        key_store = JwksKeyStore(DISCOVERY_URL, ttl=0, cache_file=cache_file)
+        key_store.refresh()
+
+        assert key_store.kids == ["key-1"]
+
+    def test_wait_on_lock_holder(self, mock_jwks_endpoints, tmp_path):
+        """Verify that a worker does not contact the OIDC issuer while another worker holds the lock."""
+
+        mock_get = mock_jwks_endpoints(["key-2"])
+        cache_file = tmp_path / "jwks.json"
+        cache_file.write_text(
+            json.dumps({"discovery_url": DISCOVERY_URL, "fetched_at": time.time() - 60, "keys": []}), encoding="utf-8"
+        )
+        (tmp_path / "jwks.json.lock").touch()
+
+        key_store = JwksKeyStore(DISCOVERY_URL, ttl=30, timeout=0.1, cache_file=str(cache_file))
+
+        with pytest.raises(RuntimeError, match="did not provide any signing keys"):
+            key_store.refresh()
+
+        assert mock_get.call_count == 0
+
+    def test_rotated_key_with_fresh_cache_file(self, mock_jwks_endpoints, tmp_path):
+        """Verify that an unknown key ID bypasses a fresh cache file and that the refreshed keys are shared."""
+
+        mock_jwks_endpoints(["key-1"])
+        cache_file = str(tmp_path / "jwks.json")
+        key_store = JwksKeyStore(DISCOVERY_URL, min_refresh_interval=0, cache_file=cache_file)
+        key_store.refresh()
+
+        mock_get = mock_jwks_endpoints(["key-1", "key-2"])
+
+        assert key_store.get_key("key-2") is not None
+        assert mock_get.call_count == 2
+
+        other_key_store = JwksKeyStore(DISCOVERY_URL, min_refresh_interval=0, cache_file=cache_file)
+        other_key_store.refresh()
+
+        assert other_key_store.get_key("key-2") is not None
+        assert mock_get.call_count == 2
+
+
+class TestNegativeSharedJwksCacheFile(object):
+    """Negative test cases for sharing the key set between processes through a cache file."""
+
+    def test_cache_file_too_stale(self, mock_jwks_endpoints, tmp_path, mocker):
+        """Verify that the correct exception is raised when the cache file is older than the allowed staleness."""
+
+        mock_jwks_endpoints(["key-1"])
+        cache_file = str(tmp_path / "jwks.json")
+        JwksKeyStore(DISCOVERY_URL, cache_file=cache_file).refresh()
+
+        mocker.patch("flask_ligand.extensions.jwt.get", side_effect=ConnectionError)
+
+        with pytest.raises(RuntimeError, match="Failed to retrieve public key"):
+            JwksKeyStore(DISCOVERY_URL, ttl=0, max_stale=0, cache_file=cache_file).refresh()
+
+
+class TestRolePolicies(object):
+    """Test cases for the compiled role policies."""
+
+    @pytest.mark.parametrize(
+        "url,claims,status_code_exp",
+        [
+            ("any/", {"realm_access": {"roles": ["auditor"]}}, 204),
+            ("any/", {"realm_access": {"roles": ["user"]}}, 403),
+            ("all/", {"realm_access": {"roles": ["user", "admin"]}}, 204),
+            ("all/", {"realm_access": {"roles": ["admin"]}}, 403),
+            ("not/", {"realm_access": {"roles": ["user"]}}, 204),
+            ("not/", {"realm_access": {"roles": ["user", "auditor"]}}, 403),
+            ("client/", {"resource_access": {"billing": {"roles": ["reader"]}}}, 204),
+            ("client/", {"realm_access": {"roles": ["reader"]}}, 403),
+            ("async/", {"realm_access": {"roles": ["auditor"]}}, 204),
+            ("async/", {"realm_access": {"roles": ["user"]}}, 403),
+        ],
+    )
+    def test_policy(self, policy_test_client, basic_flask_app, jwt_test_url, url, claims, status_code_exp):
+        """Verify that role policies grant or deny access based on the realm and client roles of the user."""
+
+        headers = policy_test_client(claims)
+
+        with basic_flask_app[0].test_client().get(f"{jwt_test_url}policy/{url}", headers=headers) as ret:
+            assert ret.status_code == status_code_exp
+
+    def test_forbidden_message(self, policy_test_client, basic_flask_app, jwt_test_url):
+        """Verify that the forbidden message describes the role policy."""
+
+        headers = policy_test_client({"realm_access": {"roles": ["user"]}})
+
+        with basic_flask_app[0].test_client().get(f"{jwt_test_url}policy/all/", headers=headers) as ret:
+            assert ret.json["message"] == (  # noqa
+                "This endpoint requires the user to satisfy the 'all_of(user, admin)' role policy!"
+            )
+
+    def test_abstract_policy(self):
+        """Verify that a role policy must implement listing its roles and compiling its check."""
+
+        with pytest.raises(TypeError):
+            RolePolicy()  # type: ignore[abstract]
+
+    def test_async_view_offloads_verification(self, policy_test_client, basic_flask_app, jwt_test_url, mocker):
+        """Verify that the access token of an 'async def' view is verified in a worker thread."""
+
+        headers = policy_test_client({"realm_access": {"roles": ["admin"]}})
+        to_thread_spy = mocker.spy(asyncio, "to_thread")
+
+        with basic_flask_app[0].test_client().get(f"{jwt_test_url}policy/async/", headers=headers) as ret:
+            assert ret.status_code == 204
+
+        to_thread_spy.assert_called_once()
+        assert to_thread_spy.call_args.args[0] is verify_jwt_role
+
+    def test_equivalent_policies_compiled_once(self, policy_test_client, basic_flask_app):
+        """Verify that rebuilding an equivalent role policy on every request reuses the compiled check."""
+
+        app = basic_flask_app[0]
+
+        with app.app_context():
+            registry = _role_registry()
+
+            for _ in range(3):
+                registry.compile(any_of("user", all_of("admin", not_("auditor"))))
+                registry.compile(as_role_policy("admin"))
+
+        assert len(registry._compiled) == 2
+        assert Role("reader", client="billing") == Role("reader", client="billing")
+        assert any_of("user", "admin") != all_of("user", "admin")
+
+    def test_policy_validation(self):
+        """Verify that role policies report the roles that are not allowed."""
+
+        with pytest.raises(RuntimeError, match="requires roles that are not allowed: billing:reader, nope"):
+            any_of("user", all_of(Role("reader", client="billing"), not_("nope"))).validate(["user"])
@@ -0,0 +1,196 @@
+"""Tests for the "extensions.revocation" classes and functions."""
+
+# ======================================================================================================================
+# Imports
+# ======================================================================================================================
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+
+import pytest
+
+from flask_ligand.extensions.database import DB
+from flask_ligand.extensions.revocation import (
+    BloomFilter,
+    DatabaseRevocationSource,
+    FileRevocationSource,
+    RevocationList,
+    RevocationSource,
+)
+
+# ======================================================================================================================
+# Type Checking
+# ======================================================================================================================
+if TYPE_CHECKING:
+    from typing import Iterable
+
+    from flask import Flask
+    from pytest_mock import MockerFixture
+
+    from flask_ligand.extensions.api import Api
+
+
+# ======================================================================================================================
+# Classes: Public
+# ======================================================================================================================
+class RevokedTokenModel(DB.Model):  # type: ignore
+    """Test model class for revoked token IDs."""
+
+    __tablename__ = "revokedtokentest"
+
+    jti = DB.Column(DB.String(length=36), primary_key=True)
+    expires_at = DB.Column(DB.Float, nullable=True)
+
+
+class StaticRevocationSource(RevocationSource):
+    """Test revocation source holding a fixed set of revoked token IDs."""
+
+    def __init__(self, jtis: Iterable[str] = ()):
+        self.jtis = set(jtis)
+
+    def load(self) -> Iterable[str]:
+        return self.jtis
+
+    def contains(self, jti: str) -> bool:
+        return jti in self.jtis
+
+
+# ======================================================================================================================
+# Test Suites
+# ======================================================================================================================
+class TestBloomFilter(object):
+    """Test cases for the Bloom filter."""
+
+    def test_no_false_negatives(self):
+        """Verify that every added item is reported as present."""
+
+        bloom_filter = BloomFilter(1000, error_rate=0.01)
+        items = [f"jti-{i}" for i in range(1000)]
+
+        for item in items:
+            bloom_filter.add(item)
+
+        assert all(item in bloom_filter for item in items)
+        assert len(bloom_filter) == 1000
+
+    def test_false_positive_rate(self):
+        """Verify that the false positive rate stays near the target rate when filled to capacity."""
+
+        bloom_filter = BloomFilter(1000, error_rate=0.01)
+
+        for i in range(1000):
+            bloom_filter.add(f"jti-{i}")
+
+        false_positives = sum(f"other-{i}" in bloom_filter for i in range(10000))
+
+        assert false_positives / 10000 < 0.03
+        assert bloom_filter.size_in_bytes < 1500
+
+
+class TestNegativeBloomFilter(object):
+    """Negative test cases for the Bloom filter."""
+
+    @pytest.mark.parametrize("capacity,error_rate", [(0, 0.01), (10, 0), (10, 1)])
+    def test_invalid_parameters(self, capacity, error_rate):
+        """Verify that the Bloom filter rejects parameters which are out of range."""
+
+        with pytest.raises(ValueError):
+            BloomFilter(capacity, error_rate)
+
+
+class TestRevocationList(object):
+    """Test cases for the revocation list."""
+
+    def test_false_positive_confirmed_by_source(self, mocker):
+        """Verify that filter hits are confirmed against the source and counted as false positives when not revoked."""
+
+        source = mocker.MagicMock(spec=RevocationSource)
+        source.load.return_value = ["revoked"]
+        source.contains.side_effect = lambda jti: jti == "revoked"
+
+        revocation_list = RevocationList(source, capacity=10)
+        revocation_list.refresh()
+        revocation_list._filter = mocker.MagicMock(__contains__=lambda _, jti: jti != "fresh", __len__=lambda _: 1)
+
+        assert revocation_list.is_revoked("revoked")
+        assert not revocation_list.is_revoked("unlucky")
+        assert not revocation_list.is_revoked("fresh")
+
+        stats = revocation_list.stats
+
+        assert (stats.checks, stats.filter_hits, stats.revoked) == (3, 2, 1)
+        assert stats.false_positive_rate == 0.5
+        assert source.contains.call_count == 2
+
+    def test_filter_sized_for_source(self):
+        """Verify that the filter grows beyond its capacity when the source holds more revoked token IDs."""
+
+        source = StaticRevocationSource(f"jti-{i}" for i in range(50))
+
+        revocation_list = RevocationList(source, capacity=10)
+        revocation_list.refresh()
+
+        assert revocation_list._filter.capacity == 50
+        assert revocation_list.stats.size == 50
+
+    def test_file_source(self, tmp_path):
+        """Verify that token IDs are loaded from and revoked into a file."""
+
+        source = FileRevocationSource(str(tmp_path / "revoked_tokens"))
+        revocation_list = RevocationList(source)
+
+        revocation_list.refresh()
+        assert revocation_list.stats.size == 0
+
+        revocation_list.revoke("jti-1")
+
+        assert revocation_list.is_revoked("jti-1")
+        assert list(FileRevocationSource(source.path).load()) == ["jti-1"]
+
+    def test_database_source(self, basic_flask_app: tuple[Flask, Api]) -> None:
+        """Verify that token IDs are loaded from and revoked into a database table, skipping expired tokens."""
+
+        source = DatabaseRevocationSource(RevokedTokenModel.jti, RevokedTokenModel.expires_at)
+        revocation_list = RevocationList(source)
+
+        with basic_flask_app[0].app_context():
+            revocation_list.revoke("expired", expires_at=time.time() - 1)
+            revocation_list.revoke("active", expires_at=time.time() + 60)
+            revocation_list.refresh()
+
+            assert revocation_list.stats.size == 1
+            assert revocation_list.is_revoked("active")
+            assert not revocation_list.is_revoked("unknown")
+
+
+class TestNegativeRevocationList(object):
+    """Negative test cases for the revocation list."""
+
+    def test_read_only_source(self):
+        """Verify that revoking a token through a read-only source is reported."""
+
+        with pytest.raises(NotImplementedError, match="read-only"):
+            RevocationList(StaticRevocationSource()).revoke("jti")
+
+    def test_abstract_source(self):
+        """Verify that a revocation source must implement loading and confirming revoked token IDs."""
+
+        with pytest.raises(TypeError):
+            RevocationSource()  # type: ignore[abstract]
+
+    def test_background_refresh_failure(self, basic_flask_app: tuple[Flask, Api], mocker: MockerFixture) -> None:
+        """Verify that a failed background refresh keeps serving the previous filter."""
+
+        source = mocker.MagicMock(spec=RevocationSource)
+        source.load.side_effect = [["revoked"], RuntimeError("source unavailable")]
+        source.contains.return_value = True
+
+        revocation_list = RevocationList(source, refresh_interval=0)
+        revocation_list.refresh_if_stale(basic_flask_app[0])
+        revocation_list.refresh_if_stale(basic_flask_app[0])
+        assert revocation_list._refresh_thread is not None
+        revocation_list._refresh_thread.join()
+
+        assert revocation_list.is_revoked("revoked")
+        assert source.load.call_count == 2
@@ -92,18 +92,66 @@ class TestDefaultConfig(object):
             "SERVICE_PUBLIC_URL": mocked_req_env_vars["SERVICE_PUBLIC_URL"],
             "SERVICE_PRIVATE_URL": mocked_req_env_vars["SERVICE_PRIVATE_URL"],
             "ALLOWED_ROLES": mocked_req_env_vars["ALLOWED_ROLES"].split(","),
+            "WORKER_COUNT": 1,
+            "WORKER_THREADS": 1,
             "SQLALCHEMY_DATABASE_URI": mocked_req_env_vars["SQLALCHEMY_DATABASE_URI"],
+            "SQLALCHEMY_REPLICA_URIS": None,
+            "DB_REPLICA_STRATEGY": "round_robin",
+            "DB_READ_YOUR_WRITES_WINDOW": 5,
+            "DB_READ_YOUR_WRITES_BACKEND": None,
+            "DB_ASYNC": False,
+            "SQLALCHEMY_ASYNC_DATABASE_URI": None,
+            "DB_ASYNC_POOLED": False,
             "SQLALCHEMY_TRACK_MODIFICATIONS": False,
             "DB_AUTO_UPGRADE": False,
             "DB_MIGRATION_DIR": "migrations",
+            "DB_AUTO_UPGRADE_LOCK_TIMEOUT": 300,
+            "DB_FORCE_AUTO_COERCION": False,
+            "DB_EXPIRE_ON_COMMIT": True,
+            "DB_POOL_SIZE": None,
+            "DB_MAX_OVERFLOW": None,
+            "DB_MAX_CONNECTIONS": None,
+            "DB_POOL_TIMEOUT": 30,
+            "DB_POOL_RECYCLE": 1800,
+            "DB_POOL_PRE_PING": True,
+            "DB_QUERY_CACHE_SIZE": 4096,
+            "DB_QUERY_CACHE_TTL": 60,
+            "DB_QUERY_CACHE_BACKEND": None,
+            "DB_QUERY_STATS": False,
+            "DB_QUERY_BUDGET": None,
+            "DB_N_PLUS_ONE_THRESHOLD": 5,
+            "DB_SLOW_QUERY_THRESHOLD": None,
+            "DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE": 0.1,
+            "DB_SLOW_QUERY_EXPLAIN_INTERVAL": 300,
+            "DB_SLOW_QUERY_EXPLAIN_RATE_LIMIT": 10,
+            "PAGINATION_COUNT_MODE": "exact",
+            "PAGINATION_COUNT_CACHE_SIZE": 1024,
+            "PAGINATION_COUNT_CACHE_TTL": 60,
             "JSON_SORT_KEYS": False,
             "OIDC_DISCOVERY_URL": mocked_req_env_vars["OIDC_DISCOVERY_URL"],
+            "OIDC_DISCOVERY_TIMEOUT": 10,
+            "OIDC_LAZY_DISCOVERY": False,
+            "OIDC_CLIENT_ID": None,
+            "OIDC_CLIENT_SECRET": None,
+            "OIDC_TOKEN_URL": None,
             "VERIFY_SSL_CERT": True,
             "JWT_TOKEN_LOCATION": "headers",
             "JWT_HEADER_NAME": "Authorization",
             "JWT_HEADER_TYPE": "Bearer",
             "JWT_ERROR_MESSAGE_KEY": "message",
             "JWT_PUBLIC_KEY": "",
+            "JWKS_CACHE_TTL": 300,
+            "JWKS_MIN_REFRESH_INTERVAL": 30,
+            "JWKS_CACHE_FILE": None,
+            "JWKS_CACHE_MAX_STALE": 86400,
+            "JWT_VERIFIED_TOKEN_CACHE_SIZE": 0,
+            "JWT_USER_PROFILE_CACHE_SIZE": 1024,
+            "JWT_USER_PROFILE_CACHE_TTL": 60,
+            "JWT_REVOCATION_SOURCE": None,
+            "JWT_REVOCATION_FILE": None,
+            "JWT_REVOCATION_CAPACITY": 100000,
+            "JWT_REVOCATION_ERROR_RATE": 0.001,
+            "JWT_REVOCATION_REFRESH_INTERVAL": 30,
             "OPENAPI_GEN_SERVER_URL": mocked_req_env_vars["OPENAPI_GEN_SERVER_URL"],
             "OPENAPI_VERSION": "3.0.3",
             "OPENAPI_URL_PREFIX": "/",
@@ -338,7 +386,13 @@ class TestStagingConfig(object):
     ) -> None:
         """Verify that the correct config settings are created for the 'dev' environment."""
 
-        config_exp: dict[str, Any] = {"VERIFY_SSL_CERT": False}
+        config_exp: dict[str, Any] = {
+            "VERIFY_SSL_CERT": False,
+            "DB_POOL_SIZE": 2,
+            "DB_MAX_OVERFLOW": 2,
+            "DB_POOL_RECYCLE": 300,
+            "DB_QUERY_STATS": True,
+        }
 
         config_actual = StagingConfig(
             default_config_args["api_title"],
@@ -478,6 +532,9 @@ class TestTestingConfig(object):
             "JWT_ACCESS_TOKEN_EXPIRES": 300,
             "JWT_SECRET_KEY": "super-duper-secret",
             "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "DB_POOL_TIMEOUT": 5,
+            "DB_POOL_PRE_PING": False,
+            "DB_QUERY_STATS": True,
             "OPENAPI_GEN_SERVER_URL": "http://openapi.fake.address",
             "API_SPEC_OPTIONS": {"servers": [{"url": "http://public.url", "description": "Public URL"}]},
         }